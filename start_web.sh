@@ -6,4 +6,11 @@ python manage.py loaddata youtubers/fixtures/categories.json && \
 python manage.py loaddata youtubers/fixtures/youtubers.json && \
 python manage.py loaddata users/fixtures/users.json && \
 python manage.py clearcache | python manage.py shell
+python manage.py warm_sidebar_cache
+python manage.py persist_view_counts --all
+python manage.py rebuild_filter_index
+python manage.py reconcile_counters
+python manage.py manage_action_partitions
+python manage.py rebuild_timelines
+python manage.py flush_actions --interval 5 &
 python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
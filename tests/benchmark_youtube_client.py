@@ -0,0 +1,68 @@
+"""
+Measures the per-lookup latency of the YouTube client against a local stand-in of the API.
+
+"before" builds the service and a new HTTP connection for every lookup, as YoutubeApi used to do.
+"after" uses the process-wide service and the keep-alive connection of the calling thread.
+
+Usage:
+    python -m tests.benchmark_youtube_client --lookups 200 --threads 8
+
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.fake_youtube_api import FakeYoutubeApi
+from youtube_api.service import build_youtube_service, execute, get_youtube_service
+
+CHANNEL_ID = 'UCBR8-60-B28hp2BmDPdntcQ'
+
+
+def lookup_before():
+    youtube = build_youtube_service()
+    youtube.channels().list(part='snippet', id=CHANNEL_ID).execute()
+
+
+def lookup_after():
+    execute(get_youtube_service().channels().list(part='snippet', id=CHANNEL_ID))
+
+
+def measure(lookup, lookups, threads):
+    """Runs the lookups and returns their latencies in milliseconds."""
+    def timed(_):
+        start = time.perf_counter()
+        lookup()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(timed, range(lookups)))
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f'{name:>6}: median {statistics.median(latencies):7.2f} ms, p95 {p95:7.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+
+    with FakeYoutubeApi({CHANNEL_ID: {'title': 'YouTube', 'handle': 'youtube'}}) as api:
+        os.environ['YOUTUBE_API_ENDPOINT'] = api.url
+        os.environ.setdefault('API_KEY', 'benchmark')
+
+        report('before', measure(lookup_before, args.lookups, args.threads))
+        before_connections = api.connections
+        report('after', measure(lookup_after, args.lookups, args.threads))
+        print(f'connections: before {before_connections}, '
+              f'after {api.connections - before_connections}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeYoutubeApi:
+    """
+    A local stand-in of the YouTube Data API for tests and benchmarks.
+
+    It serves the channels.list and search.list methods from an in-memory dict of channels and
+    records every request it receives. channels.list responses carry ETags and are answered with
+    304 Not Modified when the If-None-Match header matches. Point the client at it by setting the
+    YOUTUBE_API_ENDPOINT environment variable to `url`.
+
+    Usage:
+        with FakeYoutubeApi({'UC1': {'title': 'Title', 'handle': 'name'}}) as api:
+            os.environ['YOUTUBE_API_ENDPOINT'] = api.url
+
+    """
+
+    def __init__(self, channels=None):
+        #: (dict): The channels by channel id. Each channel is a dict with 'title',
+        #: 'description' and 'handle' keys.
+        self.channels = channels or {}
+
+        #: (list): The (method, params) pairs of the received requests.
+        self.requests = []
+
+        #: (int): The number of TCP connections opened by clients.
+        self.connections = 0
+
+        #: (float): The number of seconds every response is delayed by.
+        self.delay = 0
+
+        #: (int): The number of next requests to answer with 503 Service Unavailable.
+        self.failures = 0
+
+        #: (int): The number of channels.list requests answered with 304 Not Modified.
+        self.not_modified = 0
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base URL of the fake API."""
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        """Starts serving requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def requests_for(self, method):
+        """Returns the params of the received requests for an API method, e.g. 'channels'."""
+        return [params for name, params in self.requests if name == method]
+
+    def channels_list(self, params):
+        """Answers a channels.list request."""
+        if 'forHandle' in params:
+            handle = params['forHandle'].lstrip('@').lower()
+            ids = [channel_id for channel_id, channel in self.channels.items()
+                   if channel.get('handle', '').lower() == handle]
+        else:
+            ids = [channel_id for channel_id in params.get('id', '').split(',')
+                   if channel_id in self.channels]
+        items = [self._channel_item(channel_id) for channel_id in ids]
+        return {'etag': _etag(items), 'items': items}
+
+    def search_list(self, params):
+        """Answers a search.list request by matching the query with the handles and titles."""
+        query = params.get('q', '').lstrip('@').lower()
+        items = [
+            {'id': {'kind': 'youtube#channel', 'channelId': channel_id},
+             'snippet': {'title': channel['title']}}
+            for channel_id, channel in self.channels.items()
+            if query in (channel.get('handle', '').lower(), channel['title'].lower())
+        ]
+        return {'items': items[:int(params.get('maxResults', 5))]}
+
+    def _channel_item(self, channel_id):
+        channel = self.channels[channel_id]
+        item = {
+            'kind': 'youtube#channel',
+            'id': channel_id,
+            'snippet': {
+                'title': channel['title'],
+                'description': channel.get('description', ''),
+                'customUrl': '@' + channel['handle'] if channel.get('handle') else '',
+            },
+        }
+        item['etag'] = _etag(item)
+        return item
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # The headers and the body are written separately; without TCP_NODELAY the body of a
+            # keep-alive response waits for the delayed ACK of the headers.
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                api.connections += 1
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                method = url.path.rstrip('/').rsplit('/', 1)[-1]
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                api.requests.append((method, params))
+                time.sleep(api.delay)
+
+                if api.failures:
+                    api.failures -= 1
+                    self._send(503, {'error': {'code': 503, 'message': 'Backend Error'}})
+                elif method == 'channels':
+                    response = api.channels_list(params)
+                    if response['etag'] == self.headers.get('If-None-Match'):
+                        api.not_modified += 1
+                        self._send(304, None)
+                    else:
+                        self._send(200, response)
+                elif method == 'search':
+                    self._send(200, api.search_list(params))
+                else:
+                    self._send(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode() if payload is not None else b''
+                self.send_response(status)
+                if payload is not None:
+                    self.send_header('Content-Type', 'application/json; charset=UTF-8')
+                    if 'etag' in payload:
+                        self.send_header('ETag', payload['etag'])
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _etag(payload):
+    """Returns an ETag that changes whenever the payload changes."""
+    return '"%s"' % hashlib.md5(json.dumps(payload, sort_keys=True).encode()).hexdigest()
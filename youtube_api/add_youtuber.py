@@ -1,12 +1,17 @@
-import os
-from urllib.parse import unquote, urlparse
-
-from dotenv import load_dotenv
-from googleapiclient.discovery import build
+from youtube_api.resolver import ChannelResolver, parse_channel_url
 
 
 class YoutubeApi:
-    """A class to interact with the YouTube API."""
+    """
+    A class to interact with the YouTube API.
+
+    Args:
+    channel_url (str): The URL of the YouTube channel.
+    cache (ChannelCache): The cache of resolved channels. No cache is used if None.
+    refresh (bool): Whether to skip the cached snapshot and query the API. The fresh result is
+        still cached.
+
+    """
 
     #: (str): The URL of the YouTube channel.
     channel_url = ''
@@ -23,58 +28,10 @@ class YoutubeApi:
     #: (str): The full description of the channel.
     channel_description = ''
 
-    def __init__(self, channel_url) -> None:
-        load_dotenv()
-        self.__api_key = os.environ.get('API_KEY')
+    def __init__(self, channel_url, cache=None, refresh=False) -> None:
         self.channel_url = channel_url
-
-    def __build_youtube_service(self):
-        """
-        Builds the YouTube service.
-        This method uses the Google API client library to build a service object for interacting
-        with the YouTube API.
-
-        Returns:
-        (googleapiclient.discovery.Resource): The service object for the YouTube API.
-
-        """
-        return build('youtube', 'v3', developerKey=self.__api_key)
-
-    def __get_snippet_using_channel_username(self, youtube, channel_username):
-        """
-        Gets the snippet data for a YouTube channel using the channel username.
-
-        Args:
-        youtube (googleapiclient.discovery.Resource): The service object YouTube object.
-        channel_username (str): The channel username of the YouTube channel.
-
-        Returns:
-        (dict): The snippet data of the YouTube channel.
-
-        """
-        return youtube.search().list(
-            q=channel_username,
-            part="snippet",
-            type="channel",
-            maxResults=1
-        )
-
-    def __get_snippet_using_id(self, youtube, channel_id):
-        """
-        Gets the snippet data for a YouTube channel using the channel ID. Can return more full data.
-
-        Args:
-        youtube (googleapiclient.discovery.Resource): The service object YouTube object.
-        channel_id (str): The ID of the YouTube channel.
-
-        Returns:
-        (dict): The snippet data for the YouTube channel.
-
-        """
-        return youtube.channels().list(
-            part="snippet",
-            id=channel_id
-        )
+        self.cache = cache
+        self.refresh = refresh
 
     def __get_channel_username_from_url(self, channel_url: str) -> str:
         """
@@ -84,18 +41,9 @@ class YoutubeApi:
         channel_url (str): The URL of the YouTube channel.
 
         """
-        parsed_url = urlparse(channel_url)
-        if parsed_url.path.startswith("/@"):
-            # Example: "https://www.youtube.com/@Google"
-            self.channel_username = unquote(parsed_url.path[2:])
-            return True
-        elif parsed_url.path.startswith("/channel/"):
-            # Example: "https://www.youtube.com/channel/UCBR8-60-B28hp2BmDPdntcQ"
-            self.channel_username = unquote(parsed_url.path[9:])
-            return True
-        elif parsed_url.path.startswith("/c/"):
-            # Example: "https://www.youtube.com/c/YouTubeCreators"
-            self.channel_username = unquote(parsed_url.path[3:])
+        parsed_url = parse_channel_url(channel_url)
+        if parsed_url:
+            self.channel_username = parsed_url[1]
             return True
         return False
 
@@ -104,24 +52,42 @@ class YoutubeApi:
         Get the channel data from the channel url.
 
         It sets the channel_id, channel_title, and channel_description attributes of the YoutubeApi
-        object based on the retrieved data.
+        object based on the retrieved data. The URL is resolved with the cheapest API method it
+        allows, see ChannelResolver.
+
+        Returns:
+        (bool): Whether the channel was found.
 
         """
         if self.__get_channel_username_from_url(self.channel_url):
             if not self.channel_username:
                 return False
-            youtube = self.__build_youtube_service()
-            request = self.__get_snippet_using_channel_username(youtube, self.channel_username)
-            response = request.execute()
-            response_items = response.get('items', [])
-            if response_items:
-                self.channel_id = response_items[0]['id']['channelId']
-                self.channel_title = response_items[0]['snippet']['title']
-
-                request = self.__get_snippet_using_id(youtube, self.channel_id)
-                response = request.execute()
-                response_items = response.get('items', [])
-                if response_items:
-                    self.channel_description = response_items[0]['snippet']['description']
-            return True
+            if self.cache is not None and not self.refresh:
+                snapshot = self.cache.get(self.channel_url)
+                if snapshot is not None:
+                    self.__set_snapshot(snapshot)
+                    return bool(self.channel_id)
+
+            item = ChannelResolver().get_channel(self.channel_url)
+            if item:
+                self.channel_id = item['id']
+                self.channel_title = item['snippet']['title']
+                self.channel_description = item['snippet']['description']
+
+            if self.cache is not None:
+                if self.channel_id:
+                    self.cache.set(self.channel_url, {
+                        'channel_id': self.channel_id,
+                        'channel_title': self.channel_title,
+                        'channel_description': self.channel_description,
+                    })
+                else:
+                    self.cache.set_not_found(self.channel_url)
+            return bool(self.channel_id)
         return False
+
+    def __set_snapshot(self, snapshot):
+        """Sets the channel attributes from a cached snapshot. An empty snapshot sets nothing."""
+        self.channel_id = snapshot.get('channel_id', '')
+        self.channel_title = snapshot.get('channel_title', '')
+        self.channel_description = snapshot.get('channel_description', '')
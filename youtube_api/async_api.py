@@ -0,0 +1,142 @@
+import asyncio
+import random
+
+from googleapiclient.errors import HttpError
+from httplib2 import HttpLib2Error
+
+from youtube_api.batch import parse_channel_item
+from youtube_api.resolver import ChannelResolver
+
+#: (set): The HTTP statuses of the responses that are worth retrying.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AsyncYoutubeApi:
+    """
+    An asyncio counterpart of YoutubeApi that resolves many channel URLs at once.
+
+    The URLs are resolved by the ChannelResolver in worker threads, so no async HTTP library is
+    needed. At most `concurrency` resolutions are in flight at a time, every resolution is limited
+    to `timeout` seconds, and timed out resolutions, connection errors and responses with a status
+    from RETRY_STATUSES are retried up to `retries` times with an exponential backoff.
+
+    Usage:
+        api = AsyncYoutubeApi(concurrency=10)
+        channels = await api.get_channels(urls)
+
+    Args:
+    concurrency (int): The maximum number of resolutions in flight.
+    timeout (float): The time limit of a single resolution in seconds.
+    retries (int): The number of retries of a failed resolution.
+    backoff (float): The delay before the first retry in seconds. It doubles with every retry.
+
+    """
+
+    def __init__(self, concurrency=10, timeout=10, retries=3, backoff=0.5) -> None:
+        self.resolver = ChannelResolver()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def requests_made(self):
+        """The number of API requests made by this object, retries included."""
+        return self.resolver.requests_made
+
+    async def resolve_channel_id(self, channel_url):
+        """
+        Gets the channel id for a channel URL.
+
+        Args:
+        channel_url (str): The URL of the YouTube channel.
+
+        Returns:
+        (str): The id of the channel, or None if the channel was not found.
+
+        """
+        return await self._call(self.resolver.resolve_channel_id, channel_url)
+
+    async def resolve_channel_ids(self, channel_urls, progress=None):
+        """
+        Gets the channel ids for many channel URLs concurrently.
+
+        Args:
+        channel_urls (list): The URLs of the YouTube channels.
+        progress (callable): Called with the number of resolved URLs every time a resolution
+            completes.
+
+        Returns:
+        (dict): The channel id, or None if the channel was not found, by channel URL.
+
+        """
+        async def resolve(channel_url):
+            return channel_url, await self.resolve_channel_id(channel_url)
+
+        channel_ids = {}
+        resolutions = asyncio.as_completed(map(resolve, channel_urls))
+        for number, resolution in enumerate(resolutions, start=1):
+            channel_url, channel_id = await resolution
+            channel_ids[channel_url] = channel_id
+            if progress is not None:
+                progress(number)
+        return {channel_url: channel_ids[channel_url] for channel_url in channel_urls}
+
+    async def get_channel(self, channel_url):
+        """
+        Gets the data of the channel a URL points to.
+
+        Args:
+        channel_url (str): The URL of the YouTube channel.
+
+        Returns:
+        (dict): The channel data as returned by parse_channel_item, or None if the channel was
+            not found.
+
+        """
+        item = await self._call(self.resolver.get_channel, channel_url)
+        return parse_channel_item(item) if item else None
+
+    async def get_channels(self, channel_urls):
+        """
+        Gets the data of the channels many URLs point to concurrently.
+
+        Args:
+        channel_urls (list): The URLs of the YouTube channels.
+
+        Returns:
+        (dict): The channel data, or None if the channel was not found, by channel URL.
+
+        """
+        channels = await asyncio.gather(*map(self.get_channel, channel_urls))
+        return dict(zip(channel_urls, channels))
+
+    async def _call(self, func, *args):
+        """
+        Calls a blocking resolver method in a worker thread with a timeout and retries.
+
+        A thread can not be stopped, so a timed out call keeps its slot of the semaphore until
+        its thread finishes, and no more than `concurrency` requests ever run at a time.
+
+        """
+        for attempt in range(self.retries + 1):
+            await self._semaphore.acquire()
+            call = asyncio.ensure_future(asyncio.to_thread(func, *args))
+            call.add_done_callback(self._release)
+            try:
+                return await asyncio.wait_for(asyncio.shield(call), self.timeout)
+            except HttpError as error:
+                if error.resp.status not in RETRY_STATUSES or attempt == self.retries:
+                    raise
+            except (asyncio.TimeoutError, HttpLib2Error, OSError):
+                if attempt == self.retries:
+                    raise
+            # The jitter spreads the retries out.
+            await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def _release(self, call):
+        """Frees the semaphore slot of a finished call."""
+        self._semaphore.release()
+        if not call.cancelled():
+            # Retrieved, so the error of a timed out call is not reported as never retrieved.
+            call.exception()
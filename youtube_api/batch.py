@@ -0,0 +1,117 @@
+from googleapiclient.errors import HttpError
+
+from youtube_api.resolver import ChannelResolver
+from youtube_api.service import MAX_IDS_PER_REQUEST, chunks, execute, get_youtube_service
+
+
+def parse_channel_item(item):
+    """
+    Gets the channel data from an item of a channels.list response.
+
+    Args:
+    item (dict): The channel resource with the snippet part.
+
+    Returns:
+    (dict): The channel_id, channel_title, channel_description and channel_username of the
+        channel. The username is the handle of the channel, or its id if it has no handle.
+
+    """
+    snippet = item['snippet']
+    return {
+        'channel_id': item['id'],
+        'channel_title': snippet['title'],
+        'channel_description': snippet.get('description', ''),
+        'channel_username': snippet.get('customUrl', '').lstrip('@') or item['id'],
+    }
+
+
+class YoutubeBatchApi:
+    """
+    A class to resolve many YouTube channels with as few API requests as possible.
+
+    Channel URLs that already contain the channel id are resolved without any request, the others
+    with the ChannelResolver. The snippets of all channels are fetched with channels.list, which
+    accepts up to 50 ids per request.
+
+    """
+
+    def __init__(self) -> None:
+        self.youtube = get_youtube_service()
+        self.resolver = ChannelResolver()
+        self._batch_requests = 0
+
+    @property
+    def requests_made(self):
+        """The number of API requests made by this object."""
+        return self._batch_requests + self.resolver.requests_made
+
+    def resolve_channel_id(self, channel_url):
+        """
+        Gets the channel id for a channel URL.
+
+        Args:
+        channel_url (str): The URL of the YouTube channel.
+
+        Returns:
+        (str): The id of the channel, or None if the channel was not found.
+
+        """
+        return self.resolver.resolve_channel_id(channel_url)
+
+    def get_channels(self, channel_ids):
+        """
+        Gets the snippet data of many channels in batches.
+
+        Args:
+        channel_ids (list): The ids of the YouTube channels.
+
+        Returns:
+        (dict): The channel data by channel id. Channels that were not found are left out.
+
+        """
+        channels = {}
+        for chunk in chunks(list(channel_ids), MAX_IDS_PER_REQUEST):
+            response = self._execute(self.youtube.channels().list(
+                part="snippet",
+                id=','.join(chunk),
+                maxResults=MAX_IDS_PER_REQUEST
+            ))
+            for item in response.get('items', []):
+                channels[item['id']] = parse_channel_item(item)
+        return channels
+
+    def get_channels_if_changed(self, channel_ids, etag=None):
+        """
+        Gets the channel resources of up to 50 channels unless they have not changed.
+
+        The ETag of a previous response for the same ids is sent as If-None-Match, so unchanged
+        channels are answered with an empty 304 Not Modified response.
+
+        Args:
+        channel_ids (list): The ids of the YouTube channels, at most MAX_IDS_PER_REQUEST.
+        etag (str): The ETag of the previous response for the same ids.
+
+        Returns:
+        (tuple): The ETag of the response and the channel resources with the snippet part, or the
+            given ETag and None if the channels have not changed.
+
+        """
+        request = self.youtube.channels().list(
+            part="snippet",
+            id=','.join(channel_ids),
+            maxResults=MAX_IDS_PER_REQUEST
+        )
+        if etag:
+            request.headers['If-None-Match'] = etag
+        try:
+            response = self._execute(request)
+        except HttpError as error:
+            if error.resp.status == 304:
+                return etag, None
+            raise
+        return response.get('etag', ''), response.get('items', [])
+
+    def _execute(self, request):
+        """Executes an API request and counts it."""
+        self._batch_requests += 1
+        return execute(request)
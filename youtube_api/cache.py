@@ -0,0 +1,95 @@
+import json
+
+from redis import RedisError
+
+from youtube_api.resolver import parse_channel_url
+
+
+class ChannelCache:
+    """
+    A Redis cache of resolved YouTube channels shared by all workers.
+
+    A channel snapshot (its id, title and description) is stored under the normalized channel URL,
+    i.e. the kind of the URL and its case-folded handle or name, and under the channel id, so
+    "https://www.youtube.com/@Name/" and "https://www.youtube.com/@name" share an entry and a later
+    lookup by the channel id is a hit as well. URLs that resolve to no channel are cached for a
+    shorter time. Redis errors are treated as misses, so the cache never breaks a lookup.
+
+    Args:
+    redis_client (redis.Redis): The Redis connection.
+    ttl (int): The number of seconds the snapshots are kept for.
+    negative_ttl (int): The number of seconds the not found URLs are kept for.
+
+    """
+
+    #: (str): The prefix of the cache keys.
+    key_prefix = 'youtube_api:channel'
+
+    def __init__(self, redis_client, ttl=24 * 60 * 60, negative_ttl=10 * 60) -> None:
+        self.redis = redis_client
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    def get(self, channel_url):
+        """
+        Gets the cached snapshot of the channel a URL points to.
+
+        Args:
+        channel_url (str): The URL of the YouTube channel.
+
+        Returns:
+        (dict): The channel_id, channel_title and channel_description of the channel, an empty
+            dict if the URL is cached as not found, or None on a miss.
+
+        """
+        key = self.url_key(channel_url)
+        if key is None:
+            return None
+        try:
+            value = self.redis.get(key)
+        except RedisError:
+            return None
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def set(self, channel_url, snapshot):
+        """
+        Caches the snapshot of a channel under its URL and its id.
+
+        Args:
+        channel_url (str): The URL the channel was resolved from.
+        snapshot (dict): The channel_id, channel_title and channel_description of the channel.
+
+        """
+        value = json.dumps(snapshot)
+        keys = {self.url_key(channel_url), self._key('id', snapshot['channel_id'])}
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys - {None}:
+                    pipe.set(key, value, ex=self.ttl)
+                pipe.execute()
+        except RedisError:
+            pass
+
+    def set_not_found(self, channel_url):
+        """Caches a URL that resolves to no channel for the negative_ttl seconds."""
+        key = self.url_key(channel_url)
+        if key is None:
+            return
+        try:
+            self.redis.set(key, json.dumps({}), ex=self.negative_ttl)
+        except RedisError:
+            pass
+
+    def url_key(self, channel_url):
+        """Returns the cache key of the normalized channel URL, or None if it is not a channel URL."""
+        parsed_url = parse_channel_url(channel_url)
+        if not parsed_url or not parsed_url[1]:
+            return None
+        kind, value = parsed_url
+        # Channel ids are case-sensitive, handles and custom names are not.
+        return self._key(kind, value if kind == 'id' else value.casefold())
+
+    def _key(self, kind, value):
+        return f'{self.key_prefix}:{kind}:{value}'
@@ -0,0 +1,254 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+
+from youtube_api.service import execute, get_youtube_service
+
+#: (dict): The quota cost of the API methods used to resolve channels.
+QUOTA_COSTS = {
+    'channels.list': 1,
+    'search.list': 100,
+}
+
+#: (dict): The URL path prefixes of the channel URL formats and the kind of value they hold.
+CHANNEL_URL_PREFIXES = {
+    # Example: "https://www.youtube.com/@Google"
+    '/@': 'handle',
+    # Example: "https://www.youtube.com/channel/UCBR8-60-B28hp2BmDPdntcQ"
+    '/channel/': 'id',
+    # Example: "https://www.youtube.com/c/YouTubeCreators"
+    '/c/': 'custom',
+}
+
+
+def parse_channel_url(channel_url):
+    """
+    Parses a YouTube channel URL.
+
+    Args:
+    channel_url (str): The URL of the YouTube channel.
+
+    Returns:
+    (tuple): The kind of the URL ('handle', 'id' or 'custom') and the value it holds, or None if
+        the URL is not a channel URL.
+
+    """
+    path = urlparse(channel_url.strip()).path
+    for prefix, kind in CHANNEL_URL_PREFIXES.items():
+        if path.startswith(prefix):
+            return kind, unquote(path[len(prefix):]).strip('/')
+    return None
+
+
+class HandleIndex:
+    """
+    A process-local table of channel handles and custom names mapped to channel ids.
+
+    Handles never change their channel, so once a handle is resolved the later resolutions of it
+    never leave the process. The table keeps the `max_size` most recently used entries.
+
+    Args:
+    max_size (int): The maximum number of entries.
+
+    """
+
+    def __init__(self, max_size=10_000) -> None:
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind, name):
+        """Returns the channel id of a handle or custom name, or None if it is not known."""
+        key = (kind, name.casefold())
+        with self._lock:
+            channel_id = self._entries.get(key)
+            if channel_id is not None:
+                self._entries.move_to_end(key)
+            return channel_id
+
+    def set(self, kind, name, channel_id):
+        """Remembers the channel id of a handle or custom name."""
+        key = (kind, name.casefold())
+        with self._lock:
+            self._entries[key] = channel_id
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ResolutionStats:
+    """
+    Counts the resolutions, the quota units and the time spent per resolution path.
+
+    The paths are 'id' (channels.list by id), 'handle' (channels.list by forHandle), 'custom'
+    (search.list followed by channels.list), 'index' (the channel id was found in the HandleIndex)
+    and 'invalid' (not a channel URL).
+
+    """
+
+    def __init__(self) -> None:
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def record(self, path, quota, seconds):
+        """Records a resolution that took the given path."""
+        with self._lock:
+            stats = self._paths.setdefault(path, {'resolutions': 0, 'quota': 0, 'seconds': 0.0})
+            stats['resolutions'] += 1
+            stats['quota'] += quota
+            stats['seconds'] += seconds
+
+    def get_stats(self):
+        """
+        Returns the statistics of every path taken so far.
+
+        Returns:
+        (dict): The number of resolutions, the quota units spent, and the average latency in
+            milliseconds by path.
+
+        """
+        with self._lock:
+            return {
+                path: {
+                    'resolutions': stats['resolutions'],
+                    'quota': stats['quota'],
+                    'avg_ms': stats['seconds'] * 1000 / stats['resolutions'],
+                }
+                for path, stats in self._paths.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._paths.clear()
+
+
+#: (HandleIndex): The handle index shared by all resolvers of the process.
+handle_index = HandleIndex()
+
+#: (ResolutionStats): The resolution statistics of the process.
+resolution_stats = ResolutionStats()
+
+
+class ChannelResolver:
+    """
+    Resolves channel URLs with the cheapest API method the URL allows.
+
+    "/channel/<id>" URLs go straight to channels.list by id, "/@handle" URLs to channels.list by
+    forHandle, and only the legacy "/c/<name>" URLs fall back to the fuzzy search.list, which costs
+    100 quota units. Resolved handles and names are kept in the HandleIndex.
+
+    """
+
+    #: (int): The number of API requests made by this object.
+    requests_made = 0
+
+    #: (int): The quota units spent by this object.
+    quota_spent = 0
+
+    def __init__(self, index=handle_index, stats=resolution_stats) -> None:
+        self.youtube = get_youtube_service()
+        self.index = index
+        self.stats = stats
+        self._lock = threading.Lock()
+
+    def resolve_channel_id(self, channel_url):
+        """
+        Gets the channel id for a channel URL.
+
+        Args:
+        channel_url (str): The URL of the YouTube channel.
+
+        Returns:
+        (str): The id of the channel, or None if the channel was not found.
+
+        """
+        item, channel_id = self._resolve(channel_url, snippet=False)
+        return channel_id
+
+    def get_channel(self, channel_url):
+        """
+        Gets the channel a URL points to.
+
+        Args:
+        channel_url (str): The URL of the YouTube channel.
+
+        Returns:
+        (dict): The channel resource with the snippet part, or None if the channel was not found.
+
+        """
+        item, channel_id = self._resolve(channel_url, snippet=True)
+        return item
+
+    def _resolve(self, channel_url, snippet):
+        """
+        Resolves a URL to its channel id and records the path it took.
+
+        Returns:
+        (tuple): The channel resource if the path fetched it anyway, and the channel id.
+
+        """
+        start = time.perf_counter()
+        path, item, channel_id, quota = self._take_path(channel_url)
+        # The channels.list request that fetches the snippet counts as a part of the path.
+        if snippet and item is None and channel_id:
+            item = self._get_by_id(channel_id)
+            quota += QUOTA_COSTS['channels.list']
+        self.stats.record(path, quota, time.perf_counter() - start)
+        return item, channel_id
+
+    def _take_path(self, channel_url):
+        """
+        Returns the path taken, the channel resource if it was fetched, the channel id, and the
+        quota units spent.
+
+        """
+        parsed_url = parse_channel_url(channel_url)
+        if not parsed_url or not parsed_url[1]:
+            return 'invalid', None, None, 0
+        kind, value = parsed_url
+        if kind == 'id':
+            return 'id', None, value, 0
+
+        channel_id = self.index.get(kind, value)
+        if channel_id:
+            return 'index', None, channel_id, 0
+
+        if kind == 'handle':
+            item = self._request('channels.list', self.youtube.channels().list(
+                part="snippet",
+                forHandle=value
+            ))
+            channel_id = item['id'] if item else None
+        else:
+            item = None
+            result = self._request('search.list', self.youtube.search().list(
+                q=value,
+                part="snippet",
+                type="channel",
+                maxResults=1
+            ))
+            channel_id = result['id']['channelId'] if result else None
+
+        if channel_id:
+            self.index.set(kind, value, channel_id)
+        method = 'channels.list' if kind == 'handle' else 'search.list'
+        return kind, item, channel_id, QUOTA_COSTS[method]
+
+    def _get_by_id(self, channel_id):
+        return self._request('channels.list', self.youtube.channels().list(
+            part="snippet",
+            id=channel_id
+        ))
+
+    def _request(self, method, request):
+        """Executes an API request and returns its first item, or None if there are no items."""
+        with self._lock:
+            self.requests_made += 1
+            self.quota_spent += QUOTA_COSTS[method]
+        items = execute(request).get('items', [])
+        return items[0] if items else None
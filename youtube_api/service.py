@@ -0,0 +1,95 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+
+#: (int): The maximum number of channel ids accepted by one channels.list request.
+MAX_IDS_PER_REQUEST = 50
+
+_services = {}
+_services_lock = threading.Lock()
+_local = threading.local()
+
+
+def build_youtube_service():
+    """
+    Builds the YouTube service.
+
+    This function uses the Google API client library to build a service object for interacting
+    with the YouTube API from the static discovery document bundled with the library. The API key
+    is read from the API_KEY environment variable. The YOUTUBE_API_ENDPOINT environment variable,
+    when set, replaces the public API endpoint, e.g. with a local stand-in of the API.
+
+    Returns:
+    (googleapiclient.discovery.Resource): The service object for the YouTube API.
+
+    """
+    load_dotenv()
+    client_options = None
+    endpoint = os.environ.get('YOUTUBE_API_ENDPOINT')
+    if endpoint:
+        client_options = {'api_endpoint': endpoint}
+    return build('youtube', 'v3', developerKey=os.environ.get('API_KEY'),
+                 client_options=client_options, static_discovery=True, cache_discovery=False)
+
+
+def get_youtube_service():
+    """
+    Returns the process-wide YouTube service.
+
+    Building the service parses the discovery document, so it is built once per process (and per
+    API key and endpoint) and shared by all threads. The service object is only used to create
+    requests; run them with `execute`, which sends them over a connection of the calling thread.
+
+    Returns:
+    (googleapiclient.discovery.Resource): The shared service object for the YouTube API.
+
+    """
+    load_dotenv()
+    key = (os.environ.get('API_KEY'), os.environ.get('YOUTUBE_API_ENDPOINT'))
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.get(key)
+            if service is None:
+                service = _services[key] = build_youtube_service()
+    return service
+
+
+def get_http():
+    """
+    Returns the HTTP transport of the calling thread.
+
+    httplib2.Http is not thread-safe, so every thread gets its own instance. Each instance keeps
+    its connections alive, which saves the TCP and TLS handshakes on repeated requests.
+
+    Returns:
+    (httplib2.Http): The HTTP transport of the calling thread.
+
+    """
+    http = getattr(_local, 'http', None)
+    if http is None:
+        http = _local.http = build_http()
+    return http
+
+
+def execute(request):
+    """
+    Executes an API request over the keep-alive connection of the calling thread.
+
+    Args:
+    request (googleapiclient.http.HttpRequest): The API request to execute.
+
+    Returns:
+    (dict): The deserialized response.
+
+    """
+    return request.execute(http=get_http())
+
+
+def chunks(items, size=MAX_IDS_PER_REQUEST):
+    """Splits a list into consecutive chunks of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
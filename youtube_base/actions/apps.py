@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ActionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'youtube_base.actions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
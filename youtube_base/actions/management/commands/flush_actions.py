@@ -0,0 +1,48 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from youtube_base.actions.utils import flush_actions
+from youtubers.redis_client import r
+
+logger = logging.getLogger(__name__)
+
+#: (float): The maximum number of seconds between the attempts while flushing fails.
+MAX_RETRY_DELAY = 60
+
+
+class Command(BaseCommand):
+    """
+    Writes the actions buffered in Redis by create_action to the database.
+
+    Runs once by default, e.g. from cron, or keeps flushing every --interval seconds when it runs
+    next to the web server. The loop survives errors, e.g. while the database is down, and
+    retries with a growing delay.
+
+    """
+    help = 'Writes the buffered actions from Redis to the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Keep flushing, waiting the given number of seconds in between.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['interval'] is None:
+            written = flush_actions(r, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} actions.'))
+            return
+
+        delay = options['interval']
+        while True:
+            try:
+                flush_actions(r, options['batch_size'])
+            except Exception:
+                # The unwritten batch stays in Redis, so the next attempt writes it.
+                logger.exception('Cannot flush the buffered actions, retrying in %s s.', delay)
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+            else:
+                delay = options['interval']
+                time.sleep(delay)
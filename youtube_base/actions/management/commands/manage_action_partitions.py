@@ -0,0 +1,33 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from youtube_base.actions.partitions import (MONTHS_AHEAD, RETENTION_MONTHS, create_partitions,
+                                             expire_partitions)
+
+
+class Command(BaseCommand):
+    """
+    Creates the monthly partitions of the Action table in advance and expires the old ones.
+
+    Meant to run periodically, e.g. daily from cron, so the partition of a month exists before
+    its first action is written.
+
+    """
+    help = 'Creates the upcoming monthly partitions of the actions and detaches or archives the old ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD)
+        parser.add_argument('--retention-months', type=int, default=RETENTION_MONTHS)
+        parser.add_argument('--archive-dir',
+                            help='Dump the expired partitions to gzipped CSV files in the '
+                                 'directory and drop them, instead of only detaching them.')
+
+    def handle(self, *args, **options):
+        if options['archive_dir'] is not None and not os.path.isdir(options['archive_dir']):
+            raise CommandError(f'{options["archive_dir"]} is not a directory.')
+        created = create_partitions(options['months_ahead'])
+        expired = expire_partitions(options['retention_months'], options['archive_dir'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(created)} partitions, '
+            f'{"archived" if options["archive_dir"] else "detached"} {len(expired)}.'))
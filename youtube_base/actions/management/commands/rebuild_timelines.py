@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from youtube_base.actions.timeline import rebuild_timelines
+
+
+class Command(BaseCommand):
+    """
+    Fills the Redis timelines of the users and the channels again from the actions in Postgres.
+
+    Meant to run when Redis lost its data, e.g. on start.
+
+    """
+    help = 'Rebuilds the Redis timelines of the action dashboard from the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        pushed = rebuild_timelines(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Pushed {pushed} actions to the timelines.'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='action',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,106 @@
+from django.db import migrations
+
+# The table is rebuilt as a table partitioned by the month of created, with the primary key
+# (id, created), because a unique constraint of a partitioned table has to contain the partition
+# key. The rows are copied over and the ids keep coming from one sequence, so id stays unique.
+# The partitions of the months with rows, of the previous month and of the next three months are
+# created here, later ones by the manage_action_partitions command. Rows outside of all partitions
+# land in the default partition.
+PARTITION_SQL = """
+CREATE SEQUENCE actions_action_new_id_seq;
+
+CREATE TABLE actions_action_new (
+    id bigint NOT NULL DEFAULT nextval('actions_action_new_id_seq'),
+    action varchar(255) NOT NULL,
+    created timestamp with time zone NOT NULL,
+    target_id integer NULL CONSTRAINT actions_action_target_id_check CHECK (target_id >= 0),
+    target_ct_id integer NULL,
+    user_id integer NOT NULL,
+    CONSTRAINT actions_action_new_pkey PRIMARY KEY (id, created)
+) PARTITION BY RANGE (created);
+
+CREATE TABLE actions_action_default PARTITION OF actions_action_new DEFAULT;
+
+DO $$
+DECLARE
+    month timestamp;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', LEAST((SELECT min(created) FROM actions_action),
+                                      now() - interval '1 month') AT TIME ZONE 'UTC'),
+            date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months',
+            interval '1 month')
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF actions_action_new FOR VALUES FROM (%L) TO (%L)',
+            'actions_action_' || to_char(month, '"y"YYYY"m"MM'),
+            month AT TIME ZONE 'UTC', (month + interval '1 month') AT TIME ZONE 'UTC');
+    END LOOP;
+END $$;
+
+INSERT INTO actions_action_new (id, action, created, target_id, target_ct_id, user_id)
+SELECT id, action, created, target_id, target_ct_id, user_id FROM actions_action;
+SELECT setval('actions_action_new_id_seq', COALESCE((SELECT max(id) FROM actions_action), 0) + 1,
+              false);
+
+DROP TABLE actions_action;
+ALTER TABLE actions_action_new RENAME TO actions_action;
+ALTER TABLE actions_action RENAME CONSTRAINT actions_action_new_pkey TO actions_action_pkey;
+ALTER SEQUENCE actions_action_new_id_seq RENAME TO actions_action_id_seq;
+ALTER SEQUENCE actions_action_id_seq OWNED BY actions_action.id;
+
+ALTER TABLE actions_action
+    ADD CONSTRAINT actions_action_target_ct_id_63e2300e_fk_django_content_type_id
+    FOREIGN KEY (target_ct_id) REFERENCES django_content_type (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE actions_action
+    ADD CONSTRAINT actions_action_user_id_f34f0949_fk_auth_user_id
+    FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX actions_action_target_ct_id_63e2300e ON actions_action (target_ct_id);
+CREATE INDEX actions_action_user_id_f34f0949 ON actions_action (user_id);
+CREATE INDEX actions_act_created_64f10d_idx ON actions_action (created DESC);
+CREATE INDEX actions_act_target__f20513_idx ON actions_action (target_ct_id, target_id);
+"""
+
+UNPARTITION_SQL = """
+ALTER SEQUENCE actions_action_id_seq OWNED BY NONE;
+
+CREATE TABLE actions_action_new (
+    id bigint NOT NULL DEFAULT nextval('actions_action_id_seq')
+        CONSTRAINT actions_action_new_pkey PRIMARY KEY,
+    action varchar(255) NOT NULL,
+    created timestamp with time zone NOT NULL,
+    target_id integer NULL CONSTRAINT actions_action_target_id_check CHECK (target_id >= 0),
+    target_ct_id integer NULL,
+    user_id integer NOT NULL
+);
+INSERT INTO actions_action_new (id, action, created, target_id, target_ct_id, user_id)
+SELECT id, action, created, target_id, target_ct_id, user_id FROM actions_action;
+
+DROP TABLE actions_action;
+ALTER TABLE actions_action_new RENAME TO actions_action;
+ALTER TABLE actions_action RENAME CONSTRAINT actions_action_new_pkey TO actions_action_pkey;
+ALTER SEQUENCE actions_action_id_seq OWNED BY actions_action.id;
+
+ALTER TABLE actions_action
+    ADD CONSTRAINT actions_action_target_ct_id_63e2300e_fk_django_content_type_id
+    FOREIGN KEY (target_ct_id) REFERENCES django_content_type (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE actions_action
+    ADD CONSTRAINT actions_action_user_id_f34f0949_fk_auth_user_id
+    FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX actions_action_target_ct_id_63e2300e ON actions_action (target_ct_id);
+CREATE INDEX actions_action_user_id_f34f0949 ON actions_action (user_id);
+CREATE INDEX actions_act_created_64f10d_idx ON actions_action (created DESC);
+CREATE INDEX actions_act_target__f20513_idx ON actions_action (target_ct_id, target_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actions', '0002_action_created_default'),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION_SQL, UNPARTITION_SQL),
+    ]
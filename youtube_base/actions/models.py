@@ -1,5 +1,6 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 
@@ -11,7 +12,8 @@ class Action(models.Model):
     Attributes:
         user (ForeignKey): A reference to the User model.
         action (CharField): Describes the action performed by the user.
-        created (DateTimeField): The date and time when the action was created.
+        created (DateTimeField): The date and time when the action was created. It is set when
+            the action is buffered, not when it is written, see utils.flush_actions.
         target_ct (ForeignKey): A reference to the ContentType model, allowing the action to be
             associated with any model.
         target_id (PositiveIntegerField): The ID of the target object the action is associated with.
@@ -22,7 +24,7 @@ class Action(models.Model):
     """
     user = models.ForeignKey(User, related_name='actions', on_delete=models.CASCADE)
     action = models.CharField(max_length=255)
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(default=timezone.now, editable=False)
     target_ct = models.ForeignKey(ContentType,
                                   blank=True,
                                   null=True,
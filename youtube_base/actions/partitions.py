@@ -0,0 +1,143 @@
+import datetime
+import gzip
+import os
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from youtube_base.actions.models import Action
+
+#: (int): The number of months after the current one that get their partitions in advance.
+MONTHS_AHEAD = 3
+
+#: (int): The number of months before the current one whose partitions are kept attached.
+RETENTION_MONTHS = 12
+
+#: (str): The partition that takes the actions outside of all monthly partitions.
+DEFAULT_PARTITION = 'actions_action_default'
+
+PARTITION_NAME_RE = re.compile(r'^actions_action_y(\d{4})m(\d{2})$')
+
+COLUMNS = 'id, action, created, target_id, target_ct_id, user_id'
+
+
+def partition_name(month):
+    """Returns the name of the partition of the actions created in a month."""
+    return f'actions_action_y{month:%Y}m{month:%m}'
+
+
+def month_start(value, months=0):
+    """Returns the start of the month of a datetime in UTC, moved by a number of months."""
+    value = value.astimezone(datetime.timezone.utc)
+    index = value.year * 12 + value.month - 1 + months
+    return datetime.datetime(index // 12, index % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def get_partitions():
+    """
+    Returns the attached monthly partitions of the Action table.
+
+    Returns:
+        (dict): The start of the month of every partition, by the name of the partition.
+
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass',
+            [Action._meta.db_table],
+        )
+        names = [name for name, in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            year, month = map(int, match.groups())
+            partitions[name] = datetime.datetime(year, month, 1, tzinfo=datetime.timezone.utc)
+    return partitions
+
+
+def create_partitions(months_ahead=MONTHS_AHEAD, now=None):
+    """
+    Creates the missing partitions of the current month and of the months_ahead next months.
+
+    A partition can not be created while the default partition holds rows of its month, so such
+    rows are moved into the new partition: the default partition is detached for the move and
+    attached again, all in one transaction.
+
+    Args:
+        months_ahead (int): The number of months after the current one to create partitions for.
+        now (datetime): The current time, timezone.now() by default.
+
+    Returns:
+        (list): The names of the created partitions.
+
+    """
+    current = month_start(now or timezone.now())
+    existing = get_partitions()
+    created = []
+    quote = connection.ops.quote_name
+    table = quote(Action._meta.db_table)
+    default = quote(DEFAULT_PARTITION)
+    for months in range(months_ahead + 1):
+        start, end = month_start(current, months), month_start(current, months + 1)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {default} '
+                           'WHERE created >= %s AND created < %s)', [start, end])
+            move_rows = cursor.fetchone()[0]
+            if move_rows:
+                cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {default}')
+            cursor.execute(f'CREATE TABLE {quote(name)} PARTITION OF {table} '
+                           'FOR VALUES FROM (%s) TO (%s)', [start, end])
+            if move_rows:
+                cursor.execute(f'INSERT INTO {quote(name)} ({COLUMNS}) SELECT {COLUMNS} '
+                               f'FROM {default} WHERE created >= %s AND created < %s',
+                               [start, end])
+                cursor.execute(f'DELETE FROM {default} WHERE created >= %s AND created < %s',
+                               [start, end])
+                cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT')
+        created.append(name)
+    return created
+
+
+def expire_partitions(retention_months=RETENTION_MONTHS, archive_dir=None, now=None):
+    """
+    Detaches the partitions of the months older than retention_months.
+
+    A detached partition is no longer read by the queries of the Action table but stays in the
+    database. With an archive_dir, it is dumped to a gzipped CSV file named after it and dropped
+    instead; the dump and the drop happen in one transaction, so a failed dump keeps the
+    partition attached.
+
+    Args:
+        retention_months (int): The number of months before the current one to keep.
+        archive_dir (str): The directory to archive the expired partitions to, or None to only
+            detach them.
+        now (datetime): The current time, timezone.now() by default.
+
+    Returns:
+        (list): The names of the expired partitions.
+
+    """
+    oldest = month_start(now or timezone.now(), -retention_months)
+    quote = connection.ops.quote_name
+    table = quote(Action._meta.db_table)
+    expired = []
+    for name, month in sorted(get_partitions().items(), key=lambda item: item[1]):
+        if month >= oldest:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {quote(name)}')
+            if archive_dir is not None:
+                path = os.path.join(archive_dir, f'{name}.csv.gz')
+                with gzip.open(path, 'wt', encoding='utf-8') as archive:
+                    cursor.copy_expert(f'COPY {quote(name)} ({COLUMNS}) TO STDOUT '
+                                       'WITH (FORMAT csv, HEADER)', archive)
+                cursor.execute(f'DROP TABLE {quote(name)}')
+        expired.append(name)
+    return expired
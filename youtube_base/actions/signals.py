@@ -0,0 +1,63 @@
+import logging
+
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import Signal, receiver
+from redis import RedisError
+
+from users.models import Profile
+from youtube_base.actions import timeline
+from youtube_base.actions.models import Action
+
+logger = logging.getLogger(__name__)
+
+#: (Signal): Sent by flush_actions after a batch of buffered actions is written, with the written
+#: actions under 'actions'. bulk_create sends no post_save signals.
+actions_flushed = Signal()
+
+
+def _fan_out(actions):
+    """Pushes actions to the timelines, see timeline.fan_out."""
+    try:
+        timeline.fan_out(actions)
+    except RedisError:
+        logger.warning('Cannot push the actions to the timelines.', exc_info=True)
+
+
+@receiver(actions_flushed, sender=Action)
+def fan_out_on_flush(sender, actions, **kwargs):
+    """Pushes the buffered actions to the timelines once they are written."""
+    _fan_out(actions)
+
+
+@receiver(post_save, sender=Action)
+def fan_out_on_save(sender, instance, created, raw, **kwargs):
+    """Pushes an action saved directly, without the buffer, to the timelines."""
+    if created and not raw:
+        _fan_out([instance])
+
+
+@receiver(m2m_changed, sender=Profile.subscriptions.through)
+def update_timeline_on_subscriptions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Merges or removes the actions on channels when a user subscribes or unsubscribes."""
+    if action == 'pre_clear':
+        # post_clear carries no pk_set, so the cleared ids are read beforehand.
+        related = instance.profiles if reverse else instance.subscriptions
+        instance._cleared_subscriptions = set(related.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_subscriptions', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        subscriptions = [(user_id, [instance.id]) for user_id in
+                         Profile.objects.filter(id__in=pk_set).values_list('user_id', flat=True)]
+    else:
+        subscriptions = [(instance.user_id, pk_set)]
+    update = timeline.follow if action == 'post_add' else timeline.unfollow
+    try:
+        for user_id, youtuber_ids in subscriptions:
+            if youtuber_ids:
+                update(user_id, youtuber_ids)
+    except RedisError:
+        logger.warning('Cannot update the timeline.', exc_info=True)
@@ -0,0 +1,70 @@
+import datetime
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from django.contrib.contenttypes.models import ContentType
+
+
+class ActionRecord(NamedTuple):
+    """
+    An action ready to be rendered, with the name of its user and the title and the URL of its
+    target. It holds no model instances, so it stays small in the sidebar cache.
+    """
+    id: int
+    username: str
+    action: str
+    created: datetime.datetime
+    target_title: Optional[str]
+    target_url: Optional[str]
+
+
+def load_targets(actions):
+    """
+    Loads the targets of actions with one query per content type.
+
+    Reading Action.target would cost a query for every action. The content types are read from
+    the cache of the ContentType manager.
+
+    Args:
+        actions (list): The Action instances.
+
+    Returns:
+        (dict): The target instances by (content type id, target id). The targets deleted since
+            the actions were recorded are missing.
+
+    """
+    ids_by_ct = defaultdict(set)
+    for action in actions:
+        if action.target_ct_id is not None and action.target_id is not None:
+            ids_by_ct[action.target_ct_id].add(action.target_id)
+    targets = {}
+    for ct_id, ids in ids_by_ct.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model is None:
+            continue
+        for target_id, target in model._default_manager.in_bulk(ids).items():
+            targets[ct_id, target_id] = target
+    return targets
+
+
+def build_stream(actions):
+    """
+    Turns actions into records to render, loading their targets in bulk, see load_targets.
+
+    Args:
+        actions (list): The Action instances, with their users selected.
+
+    Returns:
+        (list): The ActionRecord of every action, in the same order. The title and the URL of
+            a deleted target are None.
+
+    """
+    targets = load_targets(actions)
+    stream = []
+    for action in actions:
+        target = targets.get((action.target_ct_id, action.target_id))
+        target_title = str(target) if target is not None else None
+        target_url = target.get_absolute_url() if hasattr(target, 'get_absolute_url') else None
+        stream.append(ActionRecord(action.id, action.user.username, action.action, action.created,
+                                   target_title, target_url))
+    return stream
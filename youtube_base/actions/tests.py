@@ -1,3 +1,303 @@
+import datetime
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from redis import RedisError
+
+from users.models import Profile
+from youtube_base.actions.models import Action
+from youtube_base.actions.partitions import (DEFAULT_PARTITION, create_partitions,
+                                             expire_partitions, get_partitions, month_start,
+                                             partition_name)
+from youtube_base.actions.streams import ActionRecord, build_stream
+from youtube_base.actions.timeline import TIMELINE_PAGE_SIZE, get_timeline, user_timeline_key
+from youtube_base.actions.utils import (ACTION_BUFFER_KEY, ACTION_PROCESSING_KEY, create_action,
+                                        flush_actions)
+from youtubers.models import Category, Youtuber
+from youtubers.redis_client import r
+from youtubers.sidebar import build_sidebar, get_sidebar
+
+
+def _delete_action_keys():
+    keys = list(r.scan_iter('actions:*'))
+    if keys:
+        r.delete(*keys)
+
+
+class CreateActionTest(TestCase):
+    def setUp(self):
+        _delete_action_keys()
+        cache.clear()
+        self.user = User.objects.create_user(username='actor', password='12345')
+        self.youtuber = Youtuber.objects.create(channel_title='Target', slug_name='target')
+        ContentType.objects.get_for_model(Youtuber)
+
+    def tearDown(self):
+        _delete_action_keys()
+
+    def test_duplicates_are_dropped_without_queries(self):
+        other = Youtuber.objects.create(channel_title='Other', slug_name='other')
+        with self.assertNumQueries(0):
+            self.assertTrue(create_action(self.user, 'Доданий канал', self.youtuber))
+            self.assertFalse(create_action(self.user, 'Доданий канал', self.youtuber))
+            self.assertTrue(create_action(self.user, 'Доданий канал', other))
+            self.assertTrue(create_action(self.user, 'Увійшов'))
+        self.assertEqual(r.llen(ACTION_BUFFER_KEY), 3)
+        self.assertFalse(Action.objects.exists())
+
+    def test_flush_writes_buffered_actions(self):
+        self.assertEqual(get_sidebar()['actions'], [])
+        create_action(self.user, 'Доданий канал', self.youtuber)
+        gone = User.objects.create_user(username='gone', password='12345')
+        create_action(gone, 'Доданий канал', self.youtuber)
+        gone.delete()
+
+        self.assertEqual(flush_actions(r, batch_size=1), 1)
+        action = Action.objects.get()
+        self.assertEqual((action.user, action.target), (self.user, self.youtuber))
+        self.assertLess(datetime.datetime.now(datetime.timezone.utc) - action.created,
+                        datetime.timedelta(minutes=1))
+        self.assertEqual(r.llen(ACTION_BUFFER_KEY), 0)
+        self.assertEqual([record.id for record in get_sidebar()['actions']], [action.id])
+
+    def test_failed_flush_keeps_the_batch(self):
+        create_action(self.user, 'Доданий канал', self.youtuber)
+        create_action(self.user, 'Увійшов')
+        with mock.patch.object(Action.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                flush_actions(r)
+        self.assertEqual(r.llen(ACTION_PROCESSING_KEY), 2)
+        create_action(self.user, 'Вийшов')
+        call_command('flush_actions', stdout=StringIO())
+        self.assertEqual(list(Action.objects.order_by('created').values_list('action', flat=True)),
+                         ['Доданий канал', 'Увійшов', 'Вийшов'])
+        self.assertFalse(r.exists(ACTION_PROCESSING_KEY))
+
+    def test_broken_records_are_dropped(self):
+        create_action(self.user, 'Доданий канал', self.youtuber)
+        r.rpush(ACTION_BUFFER_KEY, 'not json', json.dumps([self.user.id, 'x' * 300, None, None,
+                                                           '2026-01-01T00:00:00+00:00']))
+        create_action(self.user, 'Увійшов')
+        with self.assertLogs('youtube_base.actions.utils', 'ERROR') as logs:
+            self.assertEqual(flush_actions(r), 2)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(set(Action.objects.values_list('action', flat=True)),
+                         {'Доданий канал', 'Увійшов'})
+
+    def test_flush_loop_survives_errors(self):
+        create_action(self.user, 'Увійшов')
+        sleeps = []
+
+        def sleep(delay):
+            sleeps.append(delay)
+            if len(sleeps) == 3:
+                raise KeyboardInterrupt
+
+        with mock.patch.object(Action.objects, 'bulk_create',
+                               side_effect=[RuntimeError, RuntimeError, []]), \
+                mock.patch('time.sleep', side_effect=sleep), \
+                self.assertLogs('youtube_base.actions.management.commands.flush_actions', 'ERROR'):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('flush_actions', interval=1, stdout=StringIO())
+        self.assertEqual(sleeps, [1, 2, 1])
+
+    def test_saves_directly_without_redis(self):
+        with mock.patch.object(r, 'set', side_effect=RedisError), \
+                self.assertLogs('youtube_base.actions.utils', 'WARNING'):
+            self.assertTrue(create_action(self.user, 'Доданий канал', self.youtuber))
+            self.assertFalse(create_action(self.user, 'Доданий канал', self.youtuber))
+        self.assertEqual(Action.objects.count(), 1)
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        _delete_action_keys()
+        self._delete_timelines()
+        self.actor = User.objects.create_user(username='actor', password='12345')
+        self.follower = User.objects.create_user(username='follower', password='12345')
+        self.outsider = User.objects.create_user(username='outsider', password='12345')
+        for user in (self.actor, self.follower, self.outsider):
+            Profile.objects.create(user=user)
+        self.youtuber = Youtuber.objects.create(channel_title='Followed', slug_name='followed')
+        self.follower.profile.subscriptions.add(self.youtuber)
+        self.actor.profile.subscriptions.add(self.youtuber)
+
+    def tearDown(self):
+        _delete_action_keys()
+        self._delete_timelines()
+
+    def _delete_timelines(self):
+        keys = list(r.scan_iter('timeline:*'))
+        if keys:
+            r.delete(*keys)
+
+    def _timeline(self, user, before=None):
+        actions, next_before = get_timeline(user, before)
+        return [action.action for action in actions], next_before
+
+    def test_actions_are_pushed_to_subscribers(self):
+        Action.objects.create(user=self.actor, action='Прокоментував', target=self.youtuber)
+        create_action(self.actor, 'Доданий тег', self.youtuber)
+        flush_actions(r)
+        with self.assertNumQueries(2):
+            self.assertEqual(self._timeline(self.follower), (['Доданий тег', 'Прокоментував'], None))
+        self.assertEqual(self._timeline(self.actor), ([], None))
+        self.assertEqual(self._timeline(self.outsider), ([], None))
+
+        self.outsider.profile.subscriptions.add(self.youtuber)
+        self.assertEqual(len(self._timeline(self.outsider)[0]), 2)
+        self.follower.profile.subscriptions.remove(self.youtuber)
+        self.assertEqual(self._timeline(self.follower), ([], None))
+
+    def test_timeline_is_paginated(self):
+        for number in range(TIMELINE_PAGE_SIZE + 2):
+            Action.objects.create(user=self.actor, action=f'Дія {number}', target=self.youtuber)
+        first_page, before = self._timeline(self.follower)
+        self.assertEqual(first_page[0], f'Дія {TIMELINE_PAGE_SIZE + 1}')
+        self.assertEqual(len(first_page), TIMELINE_PAGE_SIZE)
+        self.assertEqual(self._timeline(self.follower, before), (['Дія 1', 'Дія 0'], None))
+
+        self.client.force_login(self.follower)
+        response = self.client.get(reverse('dashboard'), {'before': before})
+        self.assertContains(response, 'Дія 0')
+        self.assertNotContains(response, 'id="older-actions"')
+
+    def test_actions_created_at_once_are_paginated(self):
+        created = timezone.now()
+        for number in range(TIMELINE_PAGE_SIZE + 2):
+            Action.objects.create(user=self.actor, action=f'Дія {number}', target=self.youtuber,
+                                  created=created)
+        first_page, before = self._timeline(self.follower)
+        second_page, _ = self._timeline(self.follower, before)
+        self.assertEqual(sorted(first_page + second_page),
+                         sorted(f'Дія {number}' for number in range(TIMELINE_PAGE_SIZE + 2)))
+
+    def test_big_channels_are_read_on_demand(self):
+        with mock.patch('youtube_base.actions.timeline.FANOUT_LIMIT', 1):
+            Youtuber.objects.filter(id=self.youtuber.id).update(subscriber_count=2)
+            Action.objects.create(user=self.actor, action='Прокоментував', target=self.youtuber)
+            self.assertFalse(r.exists(user_timeline_key(self.follower.id)))
+            self.assertEqual(self._timeline(self.follower), (['Прокоментував'], None))
+            self.assertEqual(self._timeline(self.actor), ([], None))
+            self.assertEqual(self._timeline(self.outsider), ([], None))
+
+    def test_rebuild_restores_timelines(self):
+        Action.objects.create(user=self.actor, action='Прокоментував', target=self.youtuber)
+        self._delete_timelines()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self._timeline(self.follower), (['Прокоментував'], None))
+
+
+class StreamTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='actor', password='12345')
+        self.youtubers = [Youtuber.objects.create(channel_title=f'Channel {number}',
+                                                  slug_name=f'channel-{number}')
+                          for number in range(3)]
+        self.category = Category.objects.create(name='Ігри')
+        ContentType.objects.get_for_model(Youtuber)
+        ContentType.objects.get_for_model(Category)
+
+    def test_targets_are_loaded_per_content_type(self):
+        for number in range(100):
+            target = self.category if number % 10 == 0 else self.youtubers[number % 3]
+            Action.objects.create(user=self.user, action=f'Дія {number}', target=target)
+        Action.objects.create(user=self.user, action='Увійшов')
+        gone = Youtuber.objects.create(channel_title='Gone', slug_name='gone')
+        Action.objects.create(user=self.user, action='Доданий канал', target=gone)
+        gone.delete()
+
+        with self.assertNumQueries(3):
+            stream = build_stream(Action.objects.select_related('user').order_by('id'))
+        self.assertEqual(len(stream), 102)
+        self.assertEqual(stream[0], ActionRecord(stream[0].id, 'actor', 'Дія 0',
+                                                 stream[0].created, 'Ігри', None))
+        self.assertEqual(stream[1].target_title, 'Channel 1')
+        self.assertEqual(stream[1].target_url, self.youtubers[1].get_absolute_url())
+        self.assertEqual(stream[100].target_title, None)
+        self.assertEqual(stream[101].target_title, None)
+
+    def test_dashboard_links_targets(self):
+        self.addCleanup(lambda: [r.delete(key) for key in r.scan_iter('timeline:*')])
+        follower = User.objects.create_user(username='follower', password='12345')
+        Profile.objects.create(user=follower)
+        follower.profile.subscriptions.add(self.youtubers[0])
+        Action.objects.create(user=self.user, action='Прокоментував', target=self.youtubers[0])
+        self.client.force_login(follower)
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(
+            response, f'<a href="{self.youtubers[0].get_absolute_url()}">Прокоментував</a>')
+
+
+class PartitionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='actor', password='12345')
+
+    def _partition_of(self, action):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM actions_action WHERE id = %s',
+                           [action.id])
+            return cursor.fetchone()[0]
+
+    def test_new_partitions_take_rows_from_default(self):
+        later = month_start(timezone.now(), 12)
+        action = Action.objects.create(user=self.user, action='Увійшов',
+                                       created=later + datetime.timedelta(days=3))
+        self.assertEqual(self._partition_of(action), DEFAULT_PARTITION)
+
+        created = create_partitions(months_ahead=1, now=later)
+        self.assertEqual(created, [partition_name(later), partition_name(month_start(later, 1))])
+        self.assertEqual(self._partition_of(action), partition_name(later))
+        self.assertEqual(create_partitions(months_ahead=1, now=later), [])
+
+    def test_expired_partitions_are_archived(self):
+        old = month_start(timezone.now(), -24)
+        create_partitions(months_ahead=0, now=old)
+        Action.objects.create(user=self.user, action='Старий вхід',
+                              created=old + datetime.timedelta(days=1))
+        recent = Action.objects.create(user=self.user, action='Увійшов')
+        # A table with pending deferred foreign key checks can not be dropped.
+        connection.check_constraints()
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command('manage_action_partitions', archive_dir=archive_dir, stdout=StringIO())
+            with gzip.open(os.path.join(archive_dir, f'{partition_name(old)}.csv.gz'), 'rt') as archive:
+                self.assertIn('Старий вхід', archive.read())
+        self.assertNotIn(partition_name(old), get_partitions())
+        self.assertEqual(list(Action.objects.all()), [recent])
+
+    def test_expired_partitions_are_detached(self):
+        old = month_start(timezone.now(), -24)
+        create_partitions(months_ahead=0, now=old)
+        Action.objects.create(user=self.user, action='Старий вхід',
+                              created=old + datetime.timedelta(days=1))
+        self.assertEqual(expire_partitions(), [partition_name(old)])
+        self.assertFalse(Action.objects.exists())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {partition_name(old)}')
+            self.assertEqual(cursor.fetchone()[0], 1)
 
-# Create your tests here.
+    def test_sidebar_reads_only_recent_partitions(self):
+        create_partitions(months_ahead=0, now=month_start(timezone.now(), -6))
+        with CaptureQueriesContext(connection) as queries:
+            build_sidebar()
+        sql = next(query['sql'] for query in queries if 'actions_action' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertNotIn(DEFAULT_PARTITION, plan)
+        self.assertNotIn(partition_name(month_start(timezone.now(), -6)), plan)
+        self.assertNotIn(partition_name(month_start(timezone.now(), 2)), plan)
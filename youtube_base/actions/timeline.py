@@ -0,0 +1,198 @@
+import datetime
+import heapq
+import logging
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from redis import RedisError
+
+from users.models import Profile
+from youtube_base.actions.models import Action
+from youtubers.models import Youtuber
+from youtubers.redis_client import r
+
+logger = logging.getLogger(__name__)
+
+#: (int): The number of latest actions kept in a timeline.
+TIMELINE_LENGTH = 1000
+
+#: (int): The number of subscribers above which the actions on a channel are not pushed to every
+#: subscriber. The timelines of its subscribers read them from the channel instead.
+FANOUT_LIMIT = 10_000
+
+#: (int): The number of actions on a dashboard page.
+TIMELINE_PAGE_SIZE = 10
+
+#: (timedelta): The margin around the creation times of a page in the query that loads it,
+#: covering their rounding to floats in the timeline members.
+CREATED_MARGIN = datetime.timedelta(milliseconds=1)
+
+
+def user_timeline_key(user_id):
+    """Returns the key of the sorted set of the action ids shown to a user."""
+    return f'timeline:user:{user_id}'
+
+
+def channel_timeline_key(youtuber_id):
+    """Returns the key of the sorted set of the ids of the actions on a channel."""
+    return f'timeline:youtuber:{youtuber_id}'
+
+
+def timeline_member(action):
+    """Returns the timeline member of an action: its id and its creation time as a timestamp."""
+    return f'{action.id}:{action.created.timestamp()!r}'
+
+
+def parse_member(member):
+    """Returns the action id and the creation time stored in a timeline member."""
+    action_id, _, created = member.decode().partition(':')
+    return int(action_id), datetime.datetime.fromtimestamp(float(created), datetime.timezone.utc)
+
+
+def _add(pipe, key, scores):
+    """Queues adding action ids to a timeline and cutting it to TIMELINE_LENGTH."""
+    pipe.zadd(key, scores)
+    pipe.zremrangebyrank(key, 0, -TIMELINE_LENGTH - 1)
+
+
+def fan_out(actions):
+    """
+    Pushes the ids of actions on channels to the timelines of the channels and their subscribers.
+
+    The ids are the scores, so a timeline is ordered from the newest action and a page starts
+    right after the id of the last action of the previous page. The members also hold the
+    creation times, see timeline_member, so the query that loads a page is bounded by time,
+    which limits it to the partitions of the months of the page. The actor of an action does not
+    get it in their own timeline. The channels with more than FANOUT_LIMIT subscribers only get
+    it in their own timeline, see get_timeline.
+
+    Args:
+        actions (list): The written Action instances.
+
+    """
+    youtuber_ct = ContentType.objects.get_for_model(Youtuber)
+    by_channel = defaultdict(list)
+    for action in actions:
+        if action.target_ct_id == youtuber_ct.id and action.target_id is not None:
+            by_channel[action.target_id].append(action)
+    if not by_channel:
+        return
+
+    small_channels = set(Youtuber.objects.filter(id__in=by_channel,
+                                                 subscriber_count__lte=FANOUT_LIMIT)
+                         .values_list('id', flat=True))
+    subscribers = defaultdict(list)
+    for youtuber_id, user_id in (Profile.subscriptions.through.objects
+                                 .filter(youtuber_id__in=small_channels)
+                                 .values_list('youtuber_id', 'profile__user_id')):
+        subscribers[youtuber_id].append(user_id)
+
+    timelines = defaultdict(dict)
+    for youtuber_id, channel_actions in by_channel.items():
+        timelines[channel_timeline_key(youtuber_id)].update(
+            (timeline_member(action), action.id) for action in channel_actions)
+        for user_id in subscribers[youtuber_id]:
+            timelines[user_timeline_key(user_id)].update(
+                (timeline_member(action), action.id) for action in channel_actions
+                if action.user_id != user_id)
+    with r.pipeline(transaction=False) as pipe:
+        for key, scores in timelines.items():
+            if scores:
+                _add(pipe, key, scores)
+        pipe.execute()
+
+
+def follow(user_id, youtuber_ids):
+    """Merges the latest actions on newly subscribed channels into the timeline of a user."""
+    key = user_timeline_key(user_id)
+    with r.pipeline(transaction=False) as pipe:
+        pipe.zunionstore(key, [key, *map(channel_timeline_key, youtuber_ids)], aggregate='MAX')
+        pipe.zremrangebyrank(key, 0, -TIMELINE_LENGTH - 1)
+        pipe.execute()
+
+
+def unfollow(user_id, youtuber_ids):
+    """Removes the actions on unsubscribed channels from the timeline of a user."""
+    with r.pipeline(transaction=False) as pipe:
+        for youtuber_id in youtuber_ids:
+            pipe.zrange(channel_timeline_key(youtuber_id), 0, -1)
+        members = {member for page in pipe.execute() for member in page}
+    if members:
+        r.zrem(user_timeline_key(user_id), *members)
+
+
+def get_timeline(user, before=None, page_size=TIMELINE_PAGE_SIZE):
+    """
+    Returns a page of the timeline of a user, from the newest action.
+
+    The page is read from the timeline of the user and, fan-out-on-read, from the timelines of the
+    subscribed channels with more than FANOUT_LIMIT subscribers, at most page_size ids from each,
+    and loaded with one query bounded by the creation times of the page, so only the partitions
+    of its months are read.
+
+    Args:
+        user (User): The user.
+        before (int): The id of the last action of the previous page, or None for the first page.
+        page_size (int): The number of actions on the page.
+
+    Returns:
+        (tuple): The Action instances of the page with their users, and the id to pass as before
+            for the next page, or None on the last page.
+
+    """
+    big_channels = (Profile.subscriptions.through.objects
+                    .filter(profile__user=user, youtuber__subscriber_count__gt=FANOUT_LIMIT)
+                    .values_list('youtuber_id', flat=True))
+    keys = [user_timeline_key(user.id), *map(channel_timeline_key, big_channels)]
+    maximum = '+inf' if before is None else f'({before}'
+    try:
+        with r.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zrevrangebyscore(key, maximum, '-inf', start=0, num=page_size)
+            pages = pipe.execute()
+    except RedisError:
+        logger.warning('Cannot read the timeline from Redis.', exc_info=True)
+        return [], None
+
+    merged = heapq.merge(*(map(parse_member, page) for page in pages),
+                         key=lambda member: member[0], reverse=True)
+    created = {}
+    for action_id, action_created in merged:
+        created.setdefault(action_id, action_created)
+        if len(created) == page_size:
+            break
+    if not created:
+        return [], None
+
+    actions = (Action.objects.select_related('user')
+               .filter(created__range=(min(created.values()) - CREATED_MARGIN,
+                                       max(created.values()) + CREATED_MARGIN))
+               .in_bulk(created))
+    # The channel timelines also hold the actions of the user and of the deleted rows.
+    page = [actions[action_id] for action_id in created
+            if action_id in actions and actions[action_id].user_id != user.id]
+    return page, min(created) if len(created) == page_size else None
+
+
+def rebuild_timelines(batch_size=1000):
+    """
+    Fills the timelines again from the actions on channels stored in Postgres.
+
+    Meant for the case when Redis lost its data; it reads the whole Action table.
+
+    Returns:
+        (int): The number of actions pushed to the timelines.
+
+    """
+    youtuber_ct = ContentType.objects.get_for_model(Youtuber)
+    actions = Action.objects.filter(target_ct=youtuber_ct).order_by('id')
+    pushed = 0
+    batch = []
+    for action in actions.iterator(chunk_size=batch_size):
+        batch.append(action)
+        if len(batch) == batch_size:
+            fan_out(batch)
+            pushed += len(batch)
+            batch = []
+    fan_out(batch)
+    return pushed + len(batch)
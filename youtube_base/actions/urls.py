@@ -0,0 +1,7 @@
+from django.urls import path
+
+from youtube_base.actions import views
+
+urlpatterns = [
+    path('dashboard/', views.dashboard, name='dashboard'),
+]
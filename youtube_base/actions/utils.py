@@ -1,13 +1,51 @@
 import datetime
-from django.utils import timezone
+import json
+import logging
+
+from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from redis import RedisError
+
 from youtube_base.actions.models import Action
+from youtube_base.actions.signals import actions_flushed
+from youtubers.redis_client import r
+
+logger = logging.getLogger(__name__)
+
+#: (int): The number of seconds during which the same action of a user on the same target is
+#: recorded only once.
+DEDUPE_TIMEOUT = 60
+
+#: (str): The Redis list the accepted actions wait in until flush_actions writes them.
+ACTION_BUFFER_KEY = 'actions:buffer'
+
+#: (str): The Redis list of the batch flush_actions is writing. It is cleared once the batch is
+#: committed.
+ACTION_PROCESSING_KEY = 'actions:processing'
+
+#: (str): The Redis lock held by the running flush_actions.
+FLUSH_LOCK_KEY = 'actions:flush-lock'
+
+#: (int): The number of seconds the flush lock outlives a flusher that died without releasing it.
+FLUSH_LOCK_TIMEOUT = 60
+
+
+def dedupe_key(user_id, action, target_ct_id, target_id):
+    """Returns the Redis key that marks an action as recorded for DEDUPE_TIMEOUT seconds."""
+    return f'actions:dedupe:{user_id}:{target_ct_id or ""}:{target_id or ""}:{action}'
 
 
 def create_action(user, action, target=None):
     """
     Create an action if no similar action was created in the last minute.
 
+    A similar action is detected with one atomic SET NX EX in Redis, so concurrent workers can
+    not record the same action twice. An accepted action is pushed into the action buffer and
+    written to the database later by flush_actions, so the request costs no database query.
+    If Redis is unreachable, the action is checked and saved in the database.
+
     Args:
         user (User): The User instance performing the action.
         action (str): A string describing the action performed.
@@ -17,17 +55,124 @@ def create_action(user, action, target=None):
         (bool): A boolean value. True if a new action was created, False otherwise.
 
     """
+    # The content types are cached by the ContentType manager after the first lookup.
+    target_ct_id = ContentType.objects.get_for_model(target).id if target else None
+    target_id = target.id if target else None
+    record = json.dumps([user.id, action, target_ct_id, target_id, timezone.now().isoformat()])
+    try:
+        accepted = r.set(dedupe_key(user.id, action, target_ct_id, target_id), 1,
+                         nx=True, ex=DEDUPE_TIMEOUT)
+        if accepted:
+            r.rpush(ACTION_BUFFER_KEY, record)
+    except RedisError:
+        logger.warning('Cannot buffer the action in Redis, saving it directly.', exc_info=True)
+        return _create_action_in_db(user, action, target)
+    return bool(accepted)
+
+
+def _create_action_in_db(user, action, target):
+    """Creates the action in the database unless a similar one was created in the last minute."""
     now = timezone.now()
-    last_minute = now - datetime.timedelta(seconds=60)
+    last_minute = now - datetime.timedelta(seconds=DEDUPE_TIMEOUT)
     similar_actions = Action.objects.filter(user=user.id,
                                             action=action,
-                                            created__gte=last_minute)
+                                            created__range=(last_minute, now))
     if target:
         target_ct = ContentType.objects.get_for_model(target)
         similar_actions = similar_actions.filter(target_ct=target_ct, target_id=target.id)
 
-    if not similar_actions:
-        action = Action(user=user, action=action, target=target)
-        action.save()
+    if not similar_actions.exists():
+        Action.objects.create(user=user, action=action, target=target)
         return True
     return False
+
+
+def flush_actions(redis_client, batch_size=1000):
+    """
+    Writes the buffered actions to the database with one bulk_create per batch.
+
+    A batch is claimed by moving its records with LMOVE from the buffer into the processing list,
+    and the processing list is cleared only after the batch is committed, so a batch is not lost
+    when the flusher dies in between; the next run writes it first. The FLUSH_LOCK_KEY lock lets
+    only one flusher run at a time, so no batch is written twice by concurrent flushers.
+    The records that cannot be parsed or written and the actions of the users deleted in the
+    meantime are logged and dropped. Other errors, e.g. an unreachable database, are raised and
+    the batch stays in the processing list.
+    The written actions are announced with the actions_flushed signal, because bulk_create sends
+    no post_save signals.
+
+    Args:
+        redis_client (redis.Redis): The Redis connection.
+        batch_size (int): The number of actions written at a time.
+
+    Returns:
+        (int): The number of written actions.
+
+    """
+    lock = redis_client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+    written = 0
+    try:
+        while True:
+            records = redis_client.lrange(ACTION_PROCESSING_KEY, 0, -1)
+            if not records:
+                with redis_client.pipeline() as pipe:
+                    for _ in range(batch_size):
+                        pipe.lmove(ACTION_BUFFER_KEY, ACTION_PROCESSING_KEY, 'LEFT', 'RIGHT')
+                    records = [record for record in pipe.execute() if record is not None]
+            if not records:
+                return written
+
+            actions = _write_actions(_parse_records(records))
+            redis_client.delete(ACTION_PROCESSING_KEY)
+            lock.extend(FLUSH_LOCK_TIMEOUT, replace_ttl=True)
+            actions_flushed.send(sender=Action, actions=actions)
+            written += len(actions)
+    finally:
+        lock.release()
+
+
+def _parse_records(records):
+    """Returns the unsaved Action instances of the buffered records, dropping the broken ones."""
+    actions = []
+    for record in records:
+        try:
+            user_id, action, target_ct_id, target_id, created = json.loads(record)
+            actions.append(Action(user_id=user_id, action=action, target_ct_id=target_ct_id,
+                                  target_id=target_id,
+                                  created=datetime.datetime.fromisoformat(created)))
+        except (TypeError, ValueError):
+            logger.error('Dropping a broken buffered action: %r', record)
+    return actions
+
+
+def _write_actions(actions):
+    """
+    Saves the actions of the existing users, one by one if the batch contains invalid actions.
+
+    Returns:
+        (list): The saved actions.
+
+    """
+    user_ids = set(User.objects.filter(id__in={action.user_id for action in actions})
+                   .values_list('id', flat=True))
+    actions = [action for action in actions if action.user_id in user_ids]
+    try:
+        with transaction.atomic():
+            return Action.objects.bulk_create(actions)
+    except (DataError, IntegrityError):
+        pass
+
+    written = []
+    for action in actions:
+        try:
+            with transaction.atomic():
+                action.save()
+        except (DataError, IntegrityError):
+            logger.error('Dropping a buffered action that cannot be written: %r',
+                         [action.user_id, action.action, action.target_ct_id, action.target_id],
+                         exc_info=True)
+        else:
+            written.append(action)
+    return written
@@ -1,9 +1,25 @@
+from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
-from youtube_base.actions.models import Action
 
+from youtube_base.actions.streams import build_stream
+from youtube_base.actions.timeline import get_timeline
 
+
+@login_required
 def dashboard(request):
-    """Render the dashboard page with the latest 10 actions excluding the current user."""
-    actions = Action.objects.exclude(user=request.user).select_related('user')[:10]
-    return render(request,'actions/dashboard.html', {'sections': 'dashboard',
-                                                     'actions': actions})
+    """
+    Render the dashboard page with the actions on the channels the user is subscribed to.
+
+    The page is read from the timeline of the user, see timeline.get_timeline, and its targets
+    are loaded in bulk, see streams.build_stream. The 'before' GET
+    parameter is the id of the last action of the previous page.
+
+    """
+    try:
+        before = int(request.GET['before'])
+    except (KeyError, ValueError):
+        before = None
+    actions, next_before = get_timeline(request.user, before)
+    return render(request, 'actions/dashboard_page.html', {'sections': 'dashboard',
+                                                           'actions': build_stream(actions),
+                                                           'next_before': next_before})
@@ -36,6 +36,9 @@ ALLOWED_HOSTS = ['mywebsite', 'localhost', '127.0.0.1']
 
 SITE_ID = 1
 
+# The domain the absolute URLs of the feed and the sitemap are built with.
+SITE_DOMAIN = os.environ.get('SITE_DOMAIN', 'localhost:8000')
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -144,6 +147,14 @@ DATABASES = {
 REDIS_HOST = 'redis'
 REDIS_PORT = 6379
 REDIS_DB = 0
+REDIS_CACHE_DB = 1
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_CACHE_DB}',
+    }
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
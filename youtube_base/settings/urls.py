@@ -1,24 +1,20 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.contrib.sitemaps.views import sitemap
 from django.urls import include, path
 from debug_toolbar.toolbar import debug_toolbar_urls
 
 from youtubers import views
-from youtubers.sitemaps import YoutuberSitemap
-
-sitemaps = {
-    "youtubers": YoutuberSitemap,
-}
+from youtubers.sitemaps import sitemap_index, sitemap_section
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('test', views.TestTemplateView.as_view()),
     path('', include('youtubers.urls')),
     path('', include('users.urls')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps},
-         name='django.contrib.sitemaps.views.sitemap')
+    path('', include('youtube_base.actions.urls')),
+    path('sitemap.xml', sitemap_index, name='sitemap'),
+    path('sitemap-youtubers-<int:section>.xml', sitemap_section, name='sitemap_section'),
 ]
 
 if settings.DEBUG:
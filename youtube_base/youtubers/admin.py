@@ -10,7 +10,16 @@ class YoutuberAdmin(admin.ModelAdmin):
                     'channel_title',
                     'username', 'youtube_url',
                     'get_categories',
-                    'slug_name')
+                    'slug_name',
+                    'view_count',
+                    'unique_viewers',
+                    'comment_count',
+                    'subscriber_count',
+                    'tag_count')
+
+    def get_queryset(self, request):
+        """Loads the categories of the listed Youtubers with one query instead of one per row."""
+        return super().get_queryset(request).prefetch_related('categories')
 
     def get_categories(self, obj):
         """
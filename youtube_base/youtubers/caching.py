@@ -0,0 +1,58 @@
+from django.core.cache import cache
+
+
+def get_version(namespace):
+    """
+    Returns the current version of a cache namespace.
+
+    Cache keys of a namespace embed its version, so bumping the version invalidates every key of
+    the namespace at once without having to know or delete the keys.
+
+    Args:
+        namespace (str): The name of the cache namespace.
+
+    Returns:
+        (int): The current version of the namespace.
+
+    """
+    return cache.get_or_set(f'{namespace}:version', 1, None)
+
+
+def bump_version(namespace):
+    """Invalidates all keys of the namespace by moving it to a new version."""
+    key = f'{namespace}:version'
+    cache.add(key, 1, None)
+    cache.incr(key)
+
+
+def record_lookup(namespace, hit):
+    """Counts a cache hit or miss of the namespace."""
+    key = f'{namespace}:stats:{"hits" if hit else "misses"}'
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def get_stats(namespace):
+    """
+    Returns the hit and miss counters of a cache namespace.
+
+    Args:
+        namespace (str): The name of the cache namespace.
+
+    Returns:
+        (dict): The number of hits and misses and the hit rate.
+
+    """
+    hits = cache.get(f'{namespace}:stats:hits', 0)
+    misses = cache.get(f'{namespace}:stats:misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+    }
+
+
+def reset_stats(namespace):
+    """Resets the hit and miss counters of a cache namespace."""
+    cache.delete_many([f'{namespace}:stats:hits', f'{namespace}:stats:misses'])
@@ -0,0 +1,73 @@
+import gzip
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .caching import get_version
+
+
+def get_cached_document(namespace, render, timeout):
+    """
+    Returns a rendered document from the cache, rendering and caching it on a miss.
+
+    The document is cached both as it is and gzipped, under the current version of its namespace,
+    together with the time it was rendered, so it is rendered again only after the namespace is
+    bumped.
+
+    Args:
+        namespace (str): The cache namespace of the document.
+        render (callable): Returns the text of the document, or None if there is nothing to
+            render.
+        timeout (int): The number of seconds the document is cached for.
+
+    Returns:
+        (dict): The 'version', 'content', 'gzip' and 'rendered_at' of the document, or None if
+            there is nothing to render.
+
+    """
+    version = get_version(namespace)
+    key = f'{namespace}:{version}'
+    document = cache.get(key)
+    if document is None:
+        content = render()
+        if content is None:
+            return None
+        content = content.encode()
+        document = {'version': version, 'content': content, 'gzip': gzip.compress(content),
+                    'rendered_at': int(time.time())}
+        cache.set(key, document, timeout)
+    return document
+
+
+def cached_document_response(request, name, document, content_type):
+    """
+    Returns a cached document as a response, gzipped if the client accepts it.
+
+    A conditional request is answered with 304 Not Modified by the version and the render time of
+    the document, without touching its content.
+
+    Args:
+        request (HttpRequest): The request.
+        name (str): The name of the document in its ETag.
+        document (dict): The document, see get_cached_document.
+        content_type (str): The content type of the document.
+
+    Returns:
+        (HttpResponse): The response.
+
+    """
+    etag = 'W/' + quote_etag(f'{name}-{document["version"]}')
+    response = get_conditional_response(request, etag=etag, last_modified=document['rendered_at'])
+    if response is None:
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(document['gzip'], content_type=content_type)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(document['content'], content_type=content_type)
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(document['rendered_at'])
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,74 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from taggit.models import TaggedItem
+
+from users.models import Profile
+
+from .detail_cache import invalidate_detail
+from .models import Comment, Youtuber
+
+
+def update_counter(youtuber_id, field, delta):
+    """
+    Adds to a counter column of a Youtuber with one atomic "SET field = field + delta" UPDATE.
+
+    A counter never goes below zero. The cached detail page of the Youtuber is invalidated once
+    the transaction commits, because an UPDATE sends no post_save signal.
+
+    Args:
+        youtuber_id (int): The id of the Youtuber.
+        field (str): The counter column, e.g. 'comment_count'.
+        delta (int): The number added to the counter, negative to subtract.
+
+    """
+    youtubers = Youtuber.objects.filter(id=youtuber_id)
+    if delta < 0:
+        youtubers = youtubers.filter(**{f'{field}__gte': -delta})
+    youtubers.update(**{field: F(field) + delta})
+    transaction.on_commit(lambda: invalidate_detail(youtuber_id))
+
+
+def get_counter_sources():
+    """
+    Returns the rows every counter column counts.
+
+    Returns:
+        (dict): The QuerySet of the counted rows and the field that points to the Youtuber, by
+            counter column.
+
+    """
+    return {
+        'comment_count': (Comment.objects.all(), 'youtuber'),
+        'subscriber_count': (Profile.subscriptions.through.objects.all(), 'youtuber'),
+        'tag_count': (TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Youtuber)), 'object_id'),
+    }
+
+
+def reconcile_counters():
+    """
+    Recounts the counter columns of all Youtubers and fixes the ones that drifted.
+
+    Every counter is fixed with one UPDATE that writes only the rows whose stored value differs
+    from the count of its rows. The view counts are owned by persist_view_counts.
+
+    Returns:
+        (dict): The number of fixed Youtubers by counter column.
+
+    """
+    fixed = {}
+    for field, (rows, youtuber_field) in get_counter_sources().items():
+        actual = Coalesce(Subquery(
+            rows.filter(**{youtuber_field: OuterRef('pk')}).order_by()
+            .values(youtuber_field).annotate(count=Count('*')).values('count')
+        ), 0)
+        with transaction.atomic():
+            drifted = list(Youtuber.objects.alias(actual=actual).exclude(**{field: F('actual')})
+                           .values_list('id', flat=True))
+            Youtuber.objects.filter(id__in=drifted).update(**{field: actual})
+        for youtuber_id in drifted:
+            invalidate_detail(youtuber_id)
+        fixed[field] = len(drifted)
+    return fixed
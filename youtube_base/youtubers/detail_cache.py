@@ -0,0 +1,160 @@
+import time
+
+from django.core.cache import cache
+
+from .caching import bump_version, get_version
+from .models import Comment, Youtuber
+
+#: (int): The number of seconds the detail page data of a Youtuber is cached for.
+DETAIL_CACHE_TIMEOUT = 24 * 60 * 60
+
+#: (int): The number of latest comments shown on the detail page.
+DETAIL_COMMENTS = 5
+
+
+def detail_namespace(youtuber_id):
+    """Returns the cache namespace of the detail page of a Youtuber."""
+    return f'youtuber:{youtuber_id}:detail'
+
+
+def get_detail_version(youtuber_id):
+    """Returns the current version of the cached detail page of a Youtuber."""
+    return get_version(detail_namespace(youtuber_id))
+
+
+def invalidate_detail(youtuber_id):
+    """
+    Invalidates the cached object, tags, comments, category ids and fragments of a Youtuber at
+    once and remembers when its detail page changed, see get_detail_state.
+    """
+    namespace = detail_namespace(youtuber_id)
+    bump_version(namespace)
+    cache.set(f'{namespace}:modified', int(time.time()), None)
+    cache.delete(f'{namespace}:categories')
+
+
+def get_detail_state(youtuber_id):
+    """
+    Returns the version of the detail page of a Youtuber, the time it last changed and the ids of
+    the categories of the Youtuber.
+
+    They are read with one cache lookup, so they are cheap enough to answer conditional requests
+    and count the view before the Youtuber is loaded. When the cache has lost the time, the page
+    counts as changed now.
+
+    Args:
+        youtuber_id (int): The id of the Youtuber.
+
+    Returns:
+        (tuple): The version of the detail page, the Unix time of its last change and the list of
+            category ids.
+
+    """
+    namespace = detail_namespace(youtuber_id)
+    keys = [f'{namespace}:version', f'{namespace}:modified', f'{namespace}:categories']
+    version, modified, category_ids = map(cache.get_many(keys).get, keys)
+    if version is None:
+        version = get_version(namespace)
+    if modified is None:
+        modified = int(time.time())
+        cache.add(f'{namespace}:modified', modified, None)
+    if category_ids is None:
+        category_ids = list(Youtuber.categories.through.objects.filter(youtuber_id=youtuber_id)
+                            .values_list('category_id', flat=True))
+        cache.set(f'{namespace}:categories', category_ids, DETAIL_CACHE_TIMEOUT)
+    return version, modified, category_ids
+
+
+def get_youtuber_by_slug(slug_name):
+    """
+    Returns the Youtuber with the given slug from the cache or the database.
+
+    The slug is mapped to the id of the Youtuber, and the Youtuber is cached under its id and the
+    version of its detail page, so any save of the Youtuber is picked up on the next lookup.
+
+    Args:
+        slug_name (str): The slug of the Youtuber.
+
+    Returns:
+        (Youtuber): The Youtuber, or None if there is no Youtuber with the slug.
+
+    """
+    slug_key = f'youtuber:slug:{slug_name}'
+    youtuber_id = cache.get(slug_key)
+    if youtuber_id is not None:
+        key = f'{detail_namespace(youtuber_id)}:{get_detail_version(youtuber_id)}:object'
+        youtuber = cache.get(key)
+        if youtuber is None:
+            youtuber = Youtuber.objects.filter(id=youtuber_id).first()
+            if youtuber is not None:
+                cache.set(key, youtuber, DETAIL_CACHE_TIMEOUT)
+        # The slug may have moved to another Youtuber since it was cached.
+        if youtuber is not None and youtuber.slug_name == slug_name:
+            return youtuber
+
+    youtuber = Youtuber.objects.filter(slug_name=slug_name).first()
+    if youtuber is not None:
+        cache.set(slug_key, youtuber.id, DETAIL_CACHE_TIMEOUT)
+        key = f'{detail_namespace(youtuber.id)}:{get_detail_version(youtuber.id)}:object'
+        cache.set(key, youtuber, DETAIL_CACHE_TIMEOUT)
+    return youtuber
+
+
+def get_youtuber_id_by_slug(slug_name):
+    """
+    Returns the id of the Youtuber with the given slug from the cache.
+
+    When the slug is not cached, the Youtuber is loaded and cached with one indexed query, see
+    get_youtuber_by_slug, so the page built next finds it in the cache. The cached id may belong
+    to a Youtuber whose slug has changed since. The save that changed it invalidated its detail
+    page, so the detail state of the id no longer validates the old page.
+
+    Args:
+        slug_name (str): The slug of the Youtuber.
+
+    Returns:
+        (int): The id of the Youtuber, or None if there is no Youtuber with the slug.
+
+    """
+    youtuber_id = cache.get(f'youtuber:slug:{slug_name}')
+    if youtuber_id is None:
+        youtuber = get_youtuber_by_slug(slug_name)
+        youtuber_id = youtuber.id if youtuber is not None else None
+    return youtuber_id
+
+
+def get_detail_data(youtuber, version):
+    """
+    Returns the tag names and the latest comments of a Youtuber.
+
+    Both are cached as plain data rather than as rendered HTML, because the tag buttons and the
+    comment delete links are forms with a per-user CSRF token and the delete links depend on the
+    user.
+
+    Args:
+        youtuber (Youtuber): The Youtuber of the detail page.
+        version (int): The current version of the detail page of the Youtuber.
+
+    Returns:
+        (tuple): The list of tag names and the list of the latest comments as dicts with the id,
+            text, created_at, user and user_id keys.
+
+    """
+    prefix = f'{detail_namespace(youtuber.id)}:{version}'
+    cached = cache.get_many([f'{prefix}:tags', f'{prefix}:comments'])
+
+    tags = cached.get(f'{prefix}:tags')
+    if tags is None:
+        tags = list(youtuber.tags.values_list('name', flat=True))
+        cache.set(f'{prefix}:tags', tags, DETAIL_CACHE_TIMEOUT)
+
+    comments = cached.get(f'{prefix}:comments')
+    if comments is None:
+        comments = [
+            {'id': comment.id, 'text': comment.text, 'created_at': comment.created_at,
+             'user': str(comment.user), 'user_id': comment.user_id}
+            for comment in Comment.objects.filter(youtuber=youtuber).select_related('user')
+            .order_by('-created_at')[:DETAIL_COMMENTS]
+        ]
+        cache.set(f'{prefix}:comments', comments, DETAIL_CACHE_TIMEOUT)
+    return tags, comments
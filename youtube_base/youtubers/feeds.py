@@ -1,43 +1,63 @@
-import os
-
-import markdown
-from django.contrib.sites.models import Site
+from django.conf import settings
 from django.contrib.syndication.views import Feed
-from django.template.defaultfilters import truncatewords_html
-from django.urls import reverse_lazy
+from django.urls import reverse
 
+from .caching import bump_version
+from .conditional import cached_document_response, get_cached_document
 from .models import Youtuber
 
+#: (str): The cache namespace of the rendered feed.
+FEED_CACHE_NAMESPACE = 'feed:youtubers'
+
+#: (int): The number of seconds the rendered feed is cached for. It is replaced as soon as a
+#: Youtuber is added, deleted or renamed, see invalidate_feed; the timeout only bounds how long a
+#: renamed category is shown with its old name.
+FEED_CACHE_TIMEOUT = 60 * 60
+
+
+def invalidate_feed():
+    """Makes the next request of the feed render it again."""
+    bump_version(FEED_CACHE_NAMESPACE)
+
 
 class LatestYoutubersFeed(Feed):
-    """A Feed class that generates an RSS feed for the latest Youtubers."""
+    """
+    A Feed class that generates an RSS feed for the latest Youtubers.
+
+    The feed only reads: the links are built with the SITE_DOMAIN setting, the descriptions are
+    the excerpts rendered when the Youtubers are saved, and the whole document is cached until the
+    feed is invalidated.
+
+    """
     title = 'Українська база ютуберів.'
     desription = 'Новий ютубер у нашій базі.'
 
+    def __call__(self, request, *args, **kwargs):
+        """Returns the feed from the cache, rendering it on a miss, see get_cached_document."""
+        feed = get_cached_document(
+            FEED_CACHE_NAMESPACE,
+            lambda: super(LatestYoutubersFeed, self).__call__(request, *args, **kwargs)
+            .content.decode(),
+            FEED_CACHE_TIMEOUT,
+        )
+        return cached_document_response(request, 'feed', feed, 'application/rss+xml; charset=utf-8')
+
     def items(self):
         """Return the Youtuber objects that should be included in the feed."""
-        return Youtuber.objects.all()[:5]
-
-    def update_site_info(self):
-        """Update the current site's domain and name."""
-        site = Site.objects.get_current()
-        site.domain = os.environ.get('SITE_DOMAIN')
-        site.name = os.environ.get('SITE_NAME')
-        site.save()
+        return (Youtuber.objects.only('channel_title', 'slug_name', 'description_excerpt', 'created_at')
+                .prefetch_related('categories').order_by('-created_at')[:5])
 
     def link(self, item):
-        """Return the URL for the feed itself."""
-        self.update_site_info()
+        """Return the URL of the page the feed is about."""
+        return f'http://{settings.SITE_DOMAIN}{reverse("youtuber_list")}'
 
-        domain = Site.objects.get_current().domain
-        link_list = 'http://' + domain + reverse_lazy('youtuber_list')
-        return link_list
+    def feed_url(self):
+        """Return the URL of the feed itself, instead of one built from the Site row."""
+        return f'http://{settings.SITE_DOMAIN}{reverse("youtuber_feed")}'
 
     def item_link(self, item):
         """Return the URL for an individual item in the feed."""
-        domain = Site.objects.get_current().domain
-        item_link = 'http://' + domain + reverse_lazy('youtuber_detail', args=[item.slug_name])
-        return item_link
+        return f'http://{settings.SITE_DOMAIN}{reverse("youtuber_detail", args=[item.slug_name])}'
 
     def item_title(self, item):
         """Return the title for an individual item in the feed."""
@@ -45,9 +65,8 @@ class LatestYoutubersFeed(Feed):
 
     def item_description(self, item):
         """Return the description for an individual item in the feed."""
-        description = truncatewords_html(markdown.markdown(item.channel_description), 30)
         category_names = ", ".join(category.name for category in item.categories.all())
-        return f"Categories: {category_names}\n{description}"
+        return f"Categories: {category_names}\n{item.description_excerpt}"
 
     def item_pubdate(self, item):
         """Return the publication date for an individual item in the feed."""
@@ -0,0 +1,211 @@
+import uuid
+
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import TaggedItem
+
+from .models import Youtuber
+from .pagination import SortedIds
+from .redis_client import r
+
+#: (str): The prefix of all keys of the filter index.
+FILTER_KEY_PREFIX = 'youtuber:filter'
+
+#: (str): The Redis key that is set once the index is built. It disappears together with the sets
+#: when Redis loses its data.
+READY_KEY = f'{FILTER_KEY_PREFIX}:ready'
+
+
+def category_key(category_id):
+    """Returns the Redis key of the sorted set of the Youtuber ids in a category."""
+    return f'{FILTER_KEY_PREFIX}:category:{category_id}'
+
+
+def tag_key(tag_name):
+    """Returns the Redis key of the sorted set of the Youtuber ids with a tag."""
+    return f'{FILTER_KEY_PREFIX}:tag:{tag_name}'
+
+
+class FilterResult(SortedIds):
+    """
+    The ids of the Youtubers that match filter criteria, read from Redis a page at a time.
+
+    The ids are scored by themselves, so a page after or before a cursor id is a ZRANGEBYSCORE.
+    The union, the intersection or the difference of several sets is stored under a temporary key
+    in the same transaction that reads the page and deletes the key, so only the ids of the page
+    leave Redis.
+
+    Args:
+        redis_client (redis.Redis): The Redis connection.
+        include (list): The keys of the sets to combine.
+        exclude (list): The keys of the sets to leave out.
+        match_all (bool): Whether to intersect the included sets instead of joining them.
+
+    """
+    def __init__(self, redis_client, include, exclude=(), match_all=False):
+        self.redis = redis_client
+        self.include = include
+        self.exclude = exclude
+        self.match_all = match_all
+
+    def count(self):
+        """Returns the number of the matching Youtubers."""
+        return self._read(lambda redis, key: redis.zcard(key))
+
+    def __getitem__(self, index):
+        """Returns the ids of a slice of the matching Youtubers."""
+        start = index.start or 0
+        if index.stop is not None and index.stop <= start:
+            return []
+        stop = -1 if index.stop is None else index.stop - 1
+        return self._ids(self._read(lambda redis, key: redis.zrange(key, start, stop)))
+
+    def range(self, limit, after=None, before=None, reverse=False):
+        """Returns a page of the ids around a cursor id, see SortedIds.range."""
+        if reverse:
+            high = '+inf' if before is None else f'({before}'
+            return self._ids(self._read(
+                lambda redis, key: redis.zrevrangebyscore(key, high, '-inf', start=0, num=limit)))
+        low = '-inf' if after is None else f'({after}'
+        return self._ids(self._read(
+            lambda redis, key: redis.zrangebyscore(key, low, '+inf', start=0, num=limit)))
+
+    def _read(self, read):
+        """
+        Runs a read command on the sorted set of the matching ids.
+
+        Args:
+            read (callable): Called with the Redis connection or pipeline and the key of the set.
+
+        Returns:
+            The result of the command.
+
+        """
+        if len(self.include) == 1 and not self.exclude:
+            return read(self.redis, self.include[0])
+        result_key = f'{FILTER_KEY_PREFIX}:result:{uuid.uuid4().hex}'
+        with self.redis.pipeline() as pipe:
+            # The scores of a Youtuber are the same in every set, MIN keeps them.
+            if self.match_all:
+                pipe.zinterstore(result_key, self.include, aggregate='MIN')
+            else:
+                pipe.zunionstore(result_key, self.include, aggregate='MIN')
+            if self.exclude:
+                pipe.zdiffstore(result_key, [result_key, *self.exclude])
+            read(pipe, result_key)
+            pipe.delete(result_key)
+            return pipe.execute()[-2]
+
+    @staticmethod
+    def _ids(members):
+        """Converts the members read from Redis to Youtuber ids."""
+        return [int(youtuber_id) for youtuber_id in members]
+
+
+class FilterIndex:
+    """
+    An index of the Youtubers by category and by tag, kept in Redis sorted sets.
+
+    Every category and every tag has a sorted set of the ids of its Youtubers, scored by the ids,
+    so the filters of the YoutuberList are answered by Redis set operations: ZUNIONSTORE for any of
+    the chosen categories, ZINTERSTORE for all of them and ZDIFFSTORE for the excluded ones,
+    without joining the category and the tag tables in Postgres. The matching ids are paged in
+    Redis, see FilterResult. The sets are kept up to date by the signals of the category and tag
+    changes, see signals.py, and reconciled with Postgres by the rebuild_filter_index command.
+
+    Args:
+        redis_client (redis.Redis): The Redis connection.
+
+    """
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def add(self, key, *youtuber_ids):
+        """Adds Youtubers to the set of a category or a tag."""
+        if youtuber_ids:
+            self.redis.zadd(key, {youtuber_id: youtuber_id for youtuber_id in youtuber_ids})
+
+    def remove(self, key, *youtuber_ids):
+        """Removes Youtubers from the set of a category or a tag."""
+        if youtuber_ids:
+            self.redis.zrem(key, *youtuber_ids)
+
+    def delete(self, key):
+        """Drops the set of a deleted category or tag."""
+        self.redis.delete(key)
+
+    def match(self, criteria):
+        """
+        Returns the ids of the Youtubers that match the filter criteria.
+
+        Only the readiness of the index is checked here, the ids are read by the pages of the
+        result.
+
+        Args:
+            criteria (dict): The ids of the chosen categories under 'categories' with 'match'
+                set to 'all' if a Youtuber has to be in every one of them, or the name of the
+                chosen tag under 'tag'. The ids of the categories to leave out are under 'exclude'.
+
+        Returns:
+            (FilterResult): The ids of the matching Youtubers, an empty list without criteria, or
+                None if the index is not built.
+
+        """
+        if criteria.get('categories'):
+            include = [category_key(category_id) for category_id in criteria['categories']]
+        elif criteria.get('tag'):
+            include = [tag_key(criteria['tag'])]
+        else:
+            return []
+        if not self.redis.exists(READY_KEY):
+            return None
+        exclude = [category_key(category_id) for category_id in criteria.get('exclude', ())]
+        return FilterResult(self.redis, include, exclude, criteria.get('match') == 'all')
+
+    def rebuild(self, batch_size=10_000):
+        """
+        Replaces all sets of the index with the categories and the tags stored in Postgres.
+
+        The new sets are built under temporary keys and renamed over the old ones, so the filters
+        keep working during a rebuild. The sets of the deleted categories and tags are dropped.
+
+        Args:
+            batch_size (int): The number of memberships sent to Redis at a time.
+
+        Returns:
+            (int): The number of sets in the index.
+
+        """
+        build_id = uuid.uuid4().hex
+        memberships = [
+            (Youtuber.categories.through.objects.values_list('category_id', 'youtuber_id'),
+             category_key),
+            (TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Youtuber))
+             .values_list('tag__name', 'object_id'),
+             tag_key),
+        ]
+
+        keys = set()
+        with self.redis.pipeline(transaction=False) as pipe:
+            for queryset, get_key in memberships:
+                for number, (value, youtuber_id) in enumerate(queryset.iterator(), start=1):
+                    key = get_key(value)
+                    keys.add(key)
+                    pipe.zadd(f'{key}:{build_id}', {youtuber_id: youtuber_id})
+                    if number % batch_size == 0:
+                        pipe.execute()
+            pipe.execute()
+
+        stale = set(self.redis.scan_iter(f'{FILTER_KEY_PREFIX}:category:*'))
+        stale.update(self.redis.scan_iter(f'{FILTER_KEY_PREFIX}:tag:*'))
+        with self.redis.pipeline() as pipe:
+            for key in keys:
+                pipe.rename(f'{key}:{build_id}', key)
+            for key in stale - {key.encode() for key in keys}:
+                pipe.delete(key)
+            pipe.set(READY_KEY, build_id)
+            pipe.execute()
+        return len(keys)
+
+
+#: (FilterIndex): The filter index shared by the views and the signals.
+filter_index = FilterIndex(r)
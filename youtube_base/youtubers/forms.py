@@ -30,12 +30,25 @@ class CategoryForm(forms.Form):
         categories (forms.ModelMultipleChoiceField): A multiple choice field for selecting categories.
             The choices for this field are populated with all Category instances. The field uses a
             CheckboxSelectMultiple widget, allowing multiple categories to be selected at once.
+        match (forms.ChoiceField): Whether a Youtuber has to be in any or in all of the selected
+            categories. Any of them if it is not given.
+        exclude (forms.ModelMultipleChoiceField): The categories whose Youtubers are left out.
     """
     categories = forms.ModelMultipleChoiceField(
         queryset=Category.objects.all(),
         widget=forms.CheckboxSelectMultiple,
         required=False
     )
+    match = forms.ChoiceField(
+        choices=[('any', 'Будь-яка з обраних'), ('all', 'Усі обрані')],
+        widget=forms.RadioSelect,
+        required=False
+    )
+    exclude = forms.ModelMultipleChoiceField(
+        queryset=Category.objects.all(),
+        widget=forms.CheckboxSelectMultiple,
+        required=False
+    )
 
     def clean(self):
         """
@@ -97,4 +110,8 @@ class SearchForm(forms.Form):
         query (forms.CharField): A character field for inputting a search query.
 
     """
-    query = forms.CharField(label='Ваш запит:', widget=forms.TextInput(attrs={'id': 'search'}))
+    query = forms.CharField(label='Ваш запит:', widget=forms.TextInput(attrs={
+        'id': 'search',
+        'list': 'search-suggestions',
+        'autocomplete': 'off',
+    }))
@@ -0,0 +1,83 @@
+import random
+import time
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from youtubers.models import Youtuber
+from youtubers.search import search_queryset
+
+WORDS = ['ігри', 'огляд', 'новини', 'програмування', 'музика', 'подкаст', 'історія', 'кулінарія',
+         'подорожі', 'наука', 'технології', 'спорт', 'гумор', 'освіта', 'games', 'review', 'news',
+         'python', 'music', 'travel', 'science', 'football', 'podcast', 'cooking']
+
+
+class Command(BaseCommand):
+    """
+    Compares the query plans of the legacy and the indexed youtuber search.
+
+    The command fills the youtuber table with synthetic channels, runs EXPLAIN ANALYZE for the
+    search query built on the fly from the text columns and for the query that uses the stored
+    search_vector column, and prints both plans with their timings. All synthetic rows are rolled
+    back at the end unless --keep is given.
+
+    """
+    help = 'Compares the legacy and the indexed youtuber search on a large synthetic catalog.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help='Number of synthetic youtubers to insert.')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--query', default='огляд ігри', help='The search query to explain.')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the synthetic youtubers instead of rolling them back.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['rows'], options['batch_size'])
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Youtuber._meta.db_table}')
+
+            search_query = SearchQuery(options['query'], config='russian')
+            self._explain('Legacy search (vector built per row)', self._legacy_queryset(search_query))
+            self._explain('Indexed search (stored search_vector)', search_queryset(options['query']))
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def _seed(self, rows, batch_size):
+        """Inserts the synthetic youtubers in batches."""
+        rng = random.Random(0)
+        created = 0
+        while created < rows:
+            size = min(batch_size, rows - created)
+            Youtuber.objects.bulk_create([
+                Youtuber(
+                    channel_id=f'bench-{created + i}',
+                    channel_title=' '.join(rng.choices(WORDS, k=3)),
+                    username=f'bench{created + i}',
+                    channel_description=' '.join(rng.choices(WORDS, k=40)),
+                    slug_name=f'bench{created + i}',
+                )
+                for i in range(size)
+            ], batch_size=batch_size)
+            created += size
+            self.stdout.write(f'Inserted {created}/{rows} youtubers.', ending='\r')
+        self.stdout.write('')
+
+    def _legacy_queryset(self, search_query):
+        """Returns the search queryset that builds the search vector for every row."""
+        search_vector = SearchVector('channel_title', weight='A') + \
+            SearchVector('channel_description', weight='B', config='russian')
+        return Youtuber.objects.annotate(
+            search=search_vector, rank=SearchRank(search_vector, search_query)
+        ).filter(rank__gte=0.3).order_by('-rank')
+
+    def _explain(self, title, queryset):
+        """Prints the EXPLAIN ANALYZE output and the wall time of the given queryset."""
+        start = time.perf_counter()
+        plan = queryset.explain(analyze=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{title}: {elapsed:.1f} ms'))
+        self.stdout.write(plan)
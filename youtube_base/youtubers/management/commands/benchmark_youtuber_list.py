@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from youtubers.models import Category, Youtuber
+from youtubers.pagination import CursorPaginator
+from youtubers.serialaizer import YoutuberSerializer
+from youtubers.views import FILTER_SESSION_KEY, YoutuberList
+
+from .benchmark_search import WORDS
+
+
+class Command(BaseCommand):
+    """
+    Compares the session payload and the page latency of the YoutuberList before and after it
+    stored the filter criteria instead of the serialized result set.
+
+    The command fills one category with synthetic channels and measures, for the first and the
+    last page, what a GET request of the list costs: "before" decodes the session with the whole
+    serialized result set and slices the page out of it, "after" decodes the session with the
+    criteria and runs the keyset query of the page. All synthetic rows are rolled back at the end.
+
+    """
+    help = 'Compares the session size and page latency of the legacy and the current youtuber list.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5_000,
+                            help='Number of synthetic youtubers in the filtered category.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Number of times every page is requested.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            category = self._seed(options['rows'])
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Youtuber._meta.db_table}')
+                cursor.execute(f'ANALYZE {Youtuber.categories.through._meta.db_table}')
+            criteria = {'categories': [category.id]}
+            queryset = YoutuberList.filter_youtubers(criteria)
+
+            legacy_queryset = Youtuber.objects.filter(categories__in=[category])
+            start = time.perf_counter()
+            legacy = SessionStore().encode(
+                {'youtubers': YoutuberSerializer(legacy_queryset, many=True).data})
+            serialize_ms = (time.perf_counter() - start) * 1000
+            current = SessionStore().encode({FILTER_SESSION_KEY: criteria})
+            self.stdout.write(self.style.MIGRATE_HEADING('Session payload'))
+            self.stdout.write(f'before: {len(legacy):>10} bytes, serialized in {serialize_ms:.1f} ms '
+                              f'on every POST')
+            self.stdout.write(f' after: {len(current):>10} bytes')
+
+            last_cursor = CursorPaginator(queryset, YoutuberList.paginate_by).page().last_cursor
+            for name, cursor in (('first page', None), ('last page', last_cursor)):
+                self.stdout.write(self.style.MIGRATE_HEADING(f'GET latency, {name}'))
+                self._report('before', options['repeat'], lambda: list(CursorPaginator(
+                    SessionStore().decode(legacy)['youtubers'], YoutuberList.paginate_by
+                ).page(cursor)))
+                self._report(' after', options['repeat'], lambda: list(CursorPaginator(
+                    YoutuberList.filter_youtubers(SessionStore().decode(current)[FILTER_SESSION_KEY]),
+                    YoutuberList.paginate_by
+                ).page(cursor)))
+
+            transaction.set_rollback(True)
+
+    def _seed(self, rows):
+        """Creates a category with the synthetic youtubers."""
+        rng = random.Random(0)
+        category = Category.objects.create(name='benchmark')
+        youtubers = Youtuber.objects.bulk_create([
+            Youtuber(
+                channel_id=f'bench-{number}',
+                channel_title=' '.join(rng.choices(WORDS, k=3)),
+                username=f'bench{number}',
+                channel_description=' '.join(rng.choices(WORDS, k=40)),
+                slug_name=f'bench{number}',
+            )
+            for number in range(rows)
+        ], batch_size=1000)
+        Youtuber.categories.through.objects.bulk_create([
+            Youtuber.categories.through(youtuber_id=youtuber.id, category_id=category.id)
+            for youtuber in youtubers
+        ], batch_size=1000)
+        return category
+
+    def _report(self, name, repeat, request_page):
+        """Prints the median latency of the given page request in milliseconds."""
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            request_page()
+            latencies.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(f'{name}: median {statistics.median(latencies):8.2f} ms')
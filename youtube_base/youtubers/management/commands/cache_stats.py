@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from youtubers.caching import get_stats, reset_stats
+from youtubers.search import SEARCH_CACHE_NAMESPACE
+from youtubers.sidebar import SIDEBAR_CACHE_NAMESPACE
+
+
+class Command(BaseCommand):
+    """Prints the hit and miss counters of the shared cache namespaces."""
+    help = 'Prints the hit and miss counters of the shared cache namespaces.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('namespaces', nargs='*',
+                            default=[SEARCH_CACHE_NAMESPACE, SIDEBAR_CACHE_NAMESPACE],
+                            help='The namespaces to report. All namespaces by default.')
+        parser.add_argument('--reset', action='store_true', help='Reset the counters afterwards.')
+
+    def handle(self, *args, **options):
+        for namespace in options['namespaces']:
+            stats = get_stats(namespace)
+            self.stdout.write(f"{namespace}: {stats['hits']} hits, {stats['misses']} misses, "
+                              f"hit rate {stats['hit_rate']:.1%}")
+            if options['reset']:
+                reset_stats(namespace)
@@ -0,0 +1,130 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+from redis import RedisError
+
+from youtube_api.async_api import AsyncYoutubeApi
+from youtube_api.batch import YoutubeBatchApi
+from youtube_api.resolver import resolution_stats
+from youtubers.feeds import invalidate_feed
+from youtubers.filter_index import category_key, filter_index
+from youtubers.models import Category, Youtuber, render_description_excerpt
+from youtubers.search import invalidate_search_cache
+from youtubers.sitemaps import invalidate_sitemap
+
+
+class Command(BaseCommand):
+    """
+    Imports YouTube channels from a file of channel URLs.
+
+    The URLs are resolved to channel ids first, concurrently with AsyncYoutubeApi. URLs that
+    contain the channel id cost no request. Channels that already exist are skipped with a single
+    query, the snippets of the new channels are fetched with batched channels.list requests, and
+    the new Youtubers and their categories are inserted with bulk_create.
+
+    """
+    help = 'Imports YouTube channels from a file with one channel URL per line.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to a file with one channel URL per line.')
+        parser.add_argument('--category', type=int, action='append', default=[],
+                            dest='categories',
+                            help='Id of a category to assign to the new Youtubers. Repeatable.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Resolve the channels without writing to the database.')
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help='Maximum number of URL lookups in flight at a time.')
+
+    def handle(self, *args, **options):
+        urls = self._read_urls(options['file'])
+        categories = list(Category.objects.filter(id__in=options['categories']))
+        if len(categories) != len(set(options['categories'])):
+            raise CommandError('Some of the given categories do not exist.')
+
+        async_api = AsyncYoutubeApi(concurrency=options['concurrency'])
+        channel_ids, not_found = self._resolve(async_api, urls)
+        api = YoutubeBatchApi()
+
+        existing = set(Youtuber.objects.filter(channel_id__in=channel_ids)
+                       .values_list('channel_id', flat=True))
+        new_ids = [channel_id for channel_id in channel_ids if channel_id not in existing]
+        channels = api.get_channels(new_ids)
+        not_found += len(new_ids) - len(channels)
+
+        youtubers = [
+            Youtuber(
+                channel_id=channel['channel_id'],
+                channel_title=channel['channel_title'],
+                username=channel['channel_username'],
+                channel_description=channel['channel_description'],
+                description_excerpt=render_description_excerpt(channel['channel_description']),
+                youtube_url=f"https://www.youtube.com/channel/{channel['channel_id']}",
+                slug_name=slugify(channel['channel_username']),
+            )
+            for channel in channels.values()
+        ]
+
+        if options['dry_run']:
+            for youtuber in youtubers:
+                self.stdout.write(f'Would import {youtuber.channel_title} ({youtuber.channel_id})')
+        else:
+            self._save(youtubers, categories)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would import" if options["dry_run"] else "Imported"} {len(youtubers)} channels, '
+            f'skipped {len(existing)} existing, {not_found} not found, '
+            f'{async_api.requests_made + api.requests_made} API requests.'
+        ))
+        for path, stats in sorted(resolution_stats.get_stats().items()):
+            self.stdout.write(f'  {path}: {stats["resolutions"]} resolutions, '
+                              f'{stats["quota"]} quota units, {stats["avg_ms"]:.1f} ms on average')
+
+    def _read_urls(self, path):
+        """Reads the unique channel URLs from the file, skipping blank lines and comments."""
+        try:
+            with open(path, encoding='utf-8') as file:
+                lines = [line.strip() for line in file]
+        except OSError as error:
+            raise CommandError(f'Cannot read {path}: {error}')
+        return list(dict.fromkeys(line for line in lines if line and not line.startswith('#')))
+
+    def _resolve(self, api, urls):
+        """Resolves the URLs to unique channel ids concurrently and reports the progress."""
+        def report(number):
+            if number % 50 == 0 or number == len(urls):
+                self.stdout.write(f'Resolved {number}/{len(urls)} URLs.')
+
+        channel_ids = {}
+        not_found = 0
+        for url, channel_id in asyncio.run(api.resolve_channel_ids(urls, report)).items():
+            if channel_id:
+                channel_ids[channel_id] = url
+            else:
+                not_found += 1
+                self.stderr.write(f'Channel not found: {url}')
+        return list(channel_ids), not_found
+
+    def _save(self, youtubers, categories):
+        """Inserts the Youtubers and assigns the categories to them."""
+        Through = Youtuber.categories.through
+        with transaction.atomic():
+            Youtuber.objects.bulk_create(youtubers)
+            Through.objects.bulk_create([
+                Through(youtuber_id=youtuber.id, category_id=category.id)
+                for youtuber in youtubers
+                for category in categories
+            ])
+        if youtubers:
+            invalidate_search_cache()
+            invalidate_feed()
+        # bulk_create sends no post_save and m2m_changed signals.
+        ids = [youtuber.id for youtuber in youtubers]
+        try:
+            for category in categories:
+                filter_index.add(category_key(category.id), *ids)
+        except RedisError as error:
+            self.stderr.write(f'Cannot update the filter index, run rebuild_filter_index: {error}')
+        for youtuber in youtubers:
+            invalidate_sitemap(youtuber.id)
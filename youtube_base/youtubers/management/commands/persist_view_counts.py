@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from youtubers.redis_client import r
+from youtubers.view_counter import persist_view_counts
+
+
+class Command(BaseCommand):
+    """
+    Persists the view counters of the Youtubers from Redis into Postgres.
+
+    Meant to run periodically, e.g. every few minutes from cron. If Redis lost its data, the
+    persisted counts are first added back to Redis.
+
+    """
+    help = 'Persists the Redis view counters of the Youtubers into Postgres.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', dest='all_youtubers',
+                            help='Persist the counters of all Youtubers, not only the changed ones.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        persisted = persist_view_counts(r, options['all_youtubers'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Persisted the view counters of {persisted} Youtubers.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from youtubers.filter_index import filter_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the Redis sets of the category and tag filter index from Postgres.
+
+    Meant to run on deploy and periodically, e.g. nightly from cron, to reconcile the sets with the
+    changes that bypass the signals, such as bulk inserts and raw SQL.
+
+    """
+    help = 'Rebuilds the category and tag filter index of the Youtubers in Redis.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        sets = filter_index.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {sets} category and tag sets.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from youtubers.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """
+    Recounts the comment, subscriber and tag counters of the Youtubers and fixes the drifted ones.
+
+    The counters are kept up to date by the views, so they drift only through changes that bypass
+    them, such as the admin, fixtures and raw SQL. Meant to run periodically, e.g. nightly from
+    cron.
+
+    """
+    help = 'Fixes the comment, subscriber and tag counters of the Youtubers that drifted.'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            'Fixed ' + ', '.join(f'{count} {field}' for field, count in fixed.items()) + '.'))
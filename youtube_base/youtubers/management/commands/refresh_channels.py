@@ -0,0 +1,136 @@
+import hashlib
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from youtube_api.batch import YoutubeBatchApi
+from youtube_api.service import MAX_IDS_PER_REQUEST
+from youtubers.detail_cache import invalidate_detail
+from youtubers.feeds import invalidate_feed
+from youtubers.models import Youtuber, render_description_excerpt
+from youtubers.search import invalidate_search_cache
+from youtubers.sitemaps import invalidate_sitemap
+
+#: (int): The number of seconds the ETag of a batch is kept for.
+BATCH_ETAG_TIMEOUT = 7 * 24 * 60 * 60
+
+
+class Command(BaseCommand):
+    """
+    Refreshes the titles and descriptions of the channels from the YouTube API.
+
+    The channels are revisited in the order of their refreshed_at time, never refreshed ones first,
+    in batches of up to 50 ids per channels.list request. The ETag of the previous response for the
+    same batch is sent as If-None-Match, so a batch of unchanged channels costs an empty 304
+    response. Only the rows whose channel resource changed are written back, with one bulk_update
+    per batch, and refreshed_at of the whole batch is moved forward with one UPDATE. updated_at only
+    moves when the title or the description changed.
+
+    Every batch is committed on its own, so an interrupted run is resumed by running the command
+    again: the channels refreshed within --max-age hours are skipped.
+
+    """
+    help = 'Refreshes the channel titles and descriptions from the YouTube API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Maximum number of channels to refresh.')
+        parser.add_argument('--batch-size', type=int, default=MAX_IDS_PER_REQUEST,
+                            help='Number of channels per channels.list request, at most 50.')
+        parser.add_argument('--rate', type=float, default=5,
+                            help='Maximum number of API requests per second.')
+        parser.add_argument('--max-age', type=float, default=24,
+                            help='Refresh only the channels not refreshed within this many hours.')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, min(options['batch_size'], MAX_IDS_PER_REQUEST))
+        limit = options['limit']
+        interval = 1 / options['rate'] if options['rate'] > 0 else 0
+        cutoff = timezone.now() - timedelta(hours=options['max_age'])
+
+        queryset = (
+            Youtuber.objects
+            .exclude(channel_id='')
+            .filter(Q(refreshed_at__isnull=True) | Q(refreshed_at__lt=cutoff))
+            .order_by(F('refreshed_at').asc(nulls_first=True), 'id')
+            .only('id', 'channel_id', 'channel_title', 'channel_description', 'description_excerpt',
+                  'etag', 'updated_at')
+        )
+
+        api = YoutubeBatchApi()
+        totals = defaultdict(int)
+        next_request_at = time.monotonic()
+        while limit is None or totals['refreshed'] < limit:
+            size = batch_size if limit is None else min(batch_size, limit - totals['refreshed'])
+            youtubers = list(queryset[:size])
+            if not youtubers:
+                break
+
+            time.sleep(max(0, next_request_at - time.monotonic()))
+            next_request_at = time.monotonic() + interval
+            for key, count in self._refresh_batch(api, youtubers).items():
+                totals[key] += count
+            self.stdout.write(f'Refreshed {totals["refreshed"]} channels, '
+                              f'updated {totals["updated"]}.')
+
+        if totals['updated']:
+            invalidate_search_cache()
+            invalidate_feed()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {totals["refreshed"]} channels: {totals["updated"]} updated, '
+            f'{totals["not_modified"]} in unchanged batches, {totals["missing"]} not found, '
+            f'{api.requests_made} API requests.'
+        ))
+
+    def _refresh_batch(self, api, youtubers):
+        """Refreshes a batch of Youtubers and returns the counters of the batch."""
+        by_channel_id = defaultdict(list)
+        for youtuber in youtubers:
+            by_channel_id[youtuber.channel_id].append(youtuber)
+        channel_ids = sorted(by_channel_id)
+
+        etag_key = 'refresh_channels:etag:' + hashlib.md5(','.join(channel_ids).encode()).hexdigest()
+        etag, items = api.get_channels_if_changed(channel_ids, cache.get(etag_key))
+        counters = {'refreshed': len(youtubers)}
+        now = timezone.now()
+
+        changed = []
+        if items is None:
+            counters['not_modified'] = len(youtubers)
+        else:
+            cache.set(etag_key, etag, BATCH_ETAG_TIMEOUT)
+            counters['missing'] = len(by_channel_id) - len(items)
+            for item in items:
+                title = item['snippet']['title'][:100]
+                description = item['snippet'].get('description', '')
+                for youtuber in by_channel_id.get(item['id'], []):
+                    if youtuber.etag == item['etag']:
+                        continue
+                    # The ETag also changes with the parts of the snippet that are not stored.
+                    if (youtuber.channel_title, youtuber.channel_description) != (title, description):
+                        youtuber.channel_title = title
+                        youtuber.channel_description = description
+                        youtuber.description_excerpt = render_description_excerpt(description)
+                        youtuber.updated_at = now
+                        counters['updated'] = counters.get('updated', 0) + 1
+                    youtuber.etag = item['etag']
+                    changed.append(youtuber)
+
+        with transaction.atomic():
+            Youtuber.objects.bulk_update(
+                changed, ['channel_title', 'channel_description', 'description_excerpt', 'etag',
+                          'updated_at'])
+            Youtuber.objects.filter(id__in=[youtuber.id for youtuber in youtubers]).update(
+                refreshed_at=now)
+        # bulk_update sends no post_save signals.
+        for youtuber in changed:
+            invalidate_detail(youtuber.id)
+            invalidate_sitemap(youtuber.id)
+        return counters
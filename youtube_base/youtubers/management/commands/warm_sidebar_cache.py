@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from youtubers.sidebar import warm_sidebar
+
+
+class Command(BaseCommand):
+    """Loads the categories and the latest actions of the sidebar into the shared cache."""
+    help = 'Loads the sidebar into the shared cache.'
+
+    def handle(self, *args, **options):
+        sidebar = warm_sidebar()
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached {len(sidebar['categories'])} categories and {len(sidebar['actions'])} actions."
+        ))
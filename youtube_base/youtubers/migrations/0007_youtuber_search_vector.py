@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:04
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('youtubers', '0006_youtuber_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='youtuber',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('channel_title', config='russian', weight='A'), '||', django.contrib.postgres.search.SearchVector('channel_description', config='russian', weight='B'), django.contrib.postgres.search.SearchConfig('russian')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='youtuber',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='youtuber_search_vector_idx'),
+        ),
+    ]
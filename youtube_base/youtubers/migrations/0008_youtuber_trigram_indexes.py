@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:06
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('youtubers', '0007_youtuber_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='youtuber',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['channel_title'], name='youtuber_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='youtuber',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['username'], name='youtuber_username_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('youtubers', '0008_youtuber_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='youtuber',
+            name='etag',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='youtuber',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='youtuber',
+            index=models.Index(models.OrderBy(models.F('refreshed_at'), nulls_first=True), models.F('id'), name='youtuber_refreshed_at_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('youtubers', '0009_youtuber_refresh'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='youtuber',
+            name='unique_viewers',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='youtuber',
+            name='view_count',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(apps, schema_editor):
+    """Fills the new counters from the comments, subscriptions and tags of the Youtubers."""
+    Youtuber = apps.get_model('youtubers', 'Youtuber')
+    Comment = apps.get_model('youtubers', 'Comment')
+    Profile = apps.get_model('users', 'Profile')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+
+    content_type = ContentType.objects.filter(app_label='youtubers', model='youtuber').first()
+    sources = {
+        'comment_count': (Comment.objects.all(), 'youtuber'),
+        'subscriber_count': (Profile.subscriptions.through.objects.all(), 'youtuber'),
+        'tag_count': (TaggedItem.objects.filter(content_type=content_type), 'object_id'),
+    }
+    for field, (rows, youtuber_field) in sources.items():
+        Youtuber.objects.update(**{field: Coalesce(Subquery(
+            rows.filter(**{youtuber_field: OuterRef('pk')}).order_by()
+            .values(youtuber_field).annotate(count=Count('*')).values('count')
+        ), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        ('users', '0002_profile_subscriptions'),
+        ('youtubers', '0010_youtuber_view_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='youtuber',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='youtuber',
+            name='subscriber_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='youtuber',
+            name='tag_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_rows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='youtuber',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='youtuber',
+            index=models.Index(fields=['view_count', 'id'], name='youtuber_view_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtuber',
+            index=models.Index(fields=['comment_count', 'id'], name='youtuber_comment_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtuber',
+            index=models.Index(fields=['subscriber_count', 'id'], name='youtuber_subscriber_count_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:51
+
+import markdown
+from django.db import migrations, models
+from django.template.defaultfilters import truncatewords_html
+
+BATCH_SIZE = 1000
+
+
+def render_description_excerpt(description):
+    """A copy of models.render_description_excerpt as of this migration."""
+    return truncatewords_html(markdown.markdown(description or ''), 30)
+
+
+def render_excerpts(apps, schema_editor):
+    """Renders the description excerpts of the existing Youtubers in batches."""
+    Youtuber = apps.get_model('youtubers', 'Youtuber')
+    batch = []
+    for youtuber in Youtuber.objects.only('channel_description').iterator(chunk_size=BATCH_SIZE):
+        youtuber.description_excerpt = render_description_excerpt(youtuber.channel_description)
+        batch.append(youtuber)
+        if len(batch) == BATCH_SIZE:
+            Youtuber.objects.bulk_update(batch, ['description_excerpt'])
+            batch = []
+    Youtuber.objects.bulk_update(batch, ['description_excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('youtubers', '0011_youtuber_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='youtuber',
+            name='description_excerpt',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(render_excerpts, migrations.RunPython.noop),
+    ]
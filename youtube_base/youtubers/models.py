@@ -1,8 +1,21 @@
+import markdown
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import F
+from django.template.defaultfilters import truncatewords_html
 from django.urls import reverse
 from taggit.managers import TaggableManager
 
+#: (int): The number of words of the rendered description excerpt.
+DESCRIPTION_EXCERPT_WORDS = 30
+
+
+def render_description_excerpt(description):
+    """Returns the first words of a markdown channel description, rendered as HTML."""
+    return truncatewords_html(markdown.markdown(description or ''), DESCRIPTION_EXCERPT_WORDS)
+
 
 class Youtuber(models.Model):
     """The Youtuber model represents a YouTube channel.
@@ -13,6 +26,8 @@ class Youtuber(models.Model):
         channel_title: The title of the YouTube channel.
         username: The username of the Youtuber.
         channel_description: The description of the YouTube channel.
+        description_excerpt: The beginning of the description rendered from markdown, see
+            render_description_excerpt. It is rendered on save, so the feed does not render it.
         created_at: The date and time when the Youtuber was added.
         updated_at: The date and time when the Youtuber was last updated.
         youtube_url: The URL of the YouTube channel.
@@ -23,6 +38,15 @@ class Youtuber(models.Model):
         slug_name: The slugified version of the Youtuber's username.
         categories: The categories that the Youtuber belongs to. This is a many-to-many field
             referencing the Category model.
+        search_vector: The weighted full-text search document built from the channel title and
+            description. It is a generated column, so Postgres keeps it up to date on every write.
+        etag: The ETag of the channel resource the title and description were last taken from.
+        refreshed_at: The date and time when the channel was last checked against the YouTube API.
+        view_count: The number of page views, persisted from the Redis counters.
+        unique_viewers: The HyperLogLog estimate of the unique viewers, persisted from Redis.
+        comment_count: The number of comments, see counters.update_counter.
+        subscriber_count: The number of subscribed users.
+        tag_count: The number of tags.
 
     """
     id = models.AutoField(primary_key=True)
@@ -30,6 +54,7 @@ class Youtuber(models.Model):
     channel_title = models.CharField(max_length=100)
     username = models.CharField(max_length=100)
     channel_description = models.TextField(blank=True, null=True)
+    description_excerpt = models.TextField(blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     youtube_url = models.CharField(max_length=100, blank=True, null=True)
@@ -40,6 +65,19 @@ class Youtuber(models.Model):
     slug_name = models.SlugField(max_length=100, blank=True, null=True)
     categories = models.ManyToManyField('Category', related_name='youtubers')
     tags = TaggableManager()
+    search_vector = models.GeneratedField(
+        expression=SearchVector('channel_title', weight='A', config='russian')
+        + SearchVector('channel_description', weight='B', config='russian'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    etag = models.CharField(max_length=64, blank=True, default='')
+    refreshed_at = models.DateTimeField(blank=True, null=True)
+    view_count = models.PositiveBigIntegerField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    subscriber_count = models.PositiveIntegerField(default=0)
+    tag_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.channel_title
@@ -47,6 +85,26 @@ class Youtuber(models.Model):
     class Meta:
         verbose_name_plural = "Youtubers"
         ordering = ['id']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='youtuber_search_vector_idx'),
+            GinIndex(fields=['channel_title'], name='youtuber_title_trgm_idx',
+                     opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['username'], name='youtuber_username_trgm_idx',
+                     opclasses=['gin_trgm_ops']),
+            models.Index(F('refreshed_at').asc(nulls_first=True), F('id'),
+                         name='youtuber_refreshed_at_idx'),
+            models.Index(fields=['view_count', 'id'], name='youtuber_view_count_idx'),
+            models.Index(fields=['comment_count', 'id'], name='youtuber_comment_count_idx'),
+            models.Index(fields=['subscriber_count', 'id'], name='youtuber_subscriber_count_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Renders the description excerpt before the Youtuber is saved."""
+        self.description_excerpt = render_description_excerpt(self.channel_description)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'channel_description' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'description_excerpt'}
+        super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('youtuber_detail', args=[str(self.slug_name)])
@@ -0,0 +1,244 @@
+from django.core import signing
+from django.db.models import Q, QuerySet
+
+CURSOR_SALT = 'youtubers.pagination.cursor'
+
+
+class CursorPage:
+    """
+    A page of items returned by the CursorPaginator.
+
+    Unlike Django's Page it knows nothing about the total number of items. It only knows whether
+    there are items before and after it, and the opaque cursors that lead there.
+
+    Attributes:
+        object_list (list): The items of the page.
+        has_next (bool): Whether there are items after this page.
+        has_previous (bool): Whether there are items before this page.
+
+    """
+    def __init__(self, object_list, key, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self._key = key
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def next_cursor(self):
+        """
+        The cursor of the page that follows this one.
+
+        A page left empty by deleted items leads to the first page.
+
+        """
+        if not self.has_next:
+            return None
+        if not self.object_list:
+            return encode_cursor({})
+        return encode_cursor({'after': self._key(self.object_list[-1])})
+
+    @property
+    def previous_cursor(self):
+        """
+        The cursor of the page that precedes this one.
+
+        A page left empty by deleted items leads to the last page.
+
+        """
+        if not self.has_previous:
+            return None
+        if not self.object_list:
+            return self.last_cursor
+        return encode_cursor({'before': self._key(self.object_list[0])})
+
+    @property
+    def last_cursor(self):
+        """The cursor of the last page."""
+        return encode_cursor({'last': True})
+
+
+class SortedIds:
+    """
+    Base class of ascending ids kept outside the database that are read a page at a time, e.g.
+    from Redis.
+
+    The CursorPaginator pages them by id like a QuerySet, and Django's Paginator pages them with
+    count() and slices, so only the ids of the requested page are read.
+
+    """
+    def count(self):
+        """Returns the number of the ids."""
+        raise NotImplementedError
+
+    def __getitem__(self, index):
+        """Returns the ids of a slice with a non-negative start and stop."""
+        raise NotImplementedError
+
+    def range(self, limit, after=None, before=None, reverse=False):
+        """
+        Returns up to `limit` ids in ascending order, from the first id greater than `after`,
+        or, if `reverse` is set, in descending order, from the first id less than `before`.
+
+        """
+        raise NotImplementedError
+
+
+class CursorPaginator:
+    """
+    Keyset (cursor) paginator ordered by the id of the items.
+
+    A QuerySet is paginated in the database with "WHERE id > ? ORDER BY id LIMIT ?", so every page,
+    including the last one, costs a single indexed query and no COUNT(*). SortedIds are paginated
+    the same way by their range method. A list of ids or
+    serialized items is paginated by the position of the item the cursor points to, which keeps
+    the order of the list, e.g. the rank of search results.
+
+    A QuerySet can also be paginated from the highest value of another field, e.g. a counter, with
+    the id breaking the ties. The key of an item is then the pair of its value and its id.
+
+    Args:
+        data (QuerySet | SortedIds | list): The items to paginate.
+        per_page (int): The number of items per page.
+        order_field (str): The field a QuerySet is ordered by, descending, instead of the id.
+
+    """
+    def __init__(self, data, per_page, order_field=None):
+        self.data = data
+        self.per_page = per_page
+        self.order_field = order_field
+
+    def page(self, cursor=None):
+        """
+        Returns the page the cursor points to.
+
+        A missing, malformed or tampered cursor returns the first page.
+
+        Args:
+            cursor (str): The opaque cursor from a previous page.
+
+        Returns:
+            (CursorPage): The requested page.
+
+        """
+        position = decode_cursor(cursor)
+        if isinstance(self.data, QuerySet) and self.order_field:
+            return self._ordered_queryset_page(position)
+        if isinstance(self.data, QuerySet):
+            return self._queryset_page(position)
+        if isinstance(self.data, SortedIds):
+            return self._sorted_ids_page(position)
+        return self._sequence_page(position)
+
+    def _queryset_page(self, position):
+        """Returns a page of a QuerySet using the id of the boundary item as the key."""
+        per_page = self.per_page
+        if isinstance(position.get('after'), int):
+            items = list(self.data.filter(id__gt=position['after']).order_by('id')[:per_page + 1])
+            return CursorPage(items[:per_page], _get_key, len(items) > per_page, True)
+        if isinstance(position.get('before'), int):
+            items = list(self.data.filter(id__lt=position['before']).order_by('-id')[:per_page + 1])
+            return CursorPage(items[:per_page][::-1], _get_key, True, len(items) > per_page)
+        if 'last' in position:
+            items = list(self.data.order_by('-id')[:per_page + 1])
+            return CursorPage(items[:per_page][::-1], _get_key, False, len(items) > per_page)
+        items = list(self.data.order_by('id')[:per_page + 1])
+        return CursorPage(items[:per_page], _get_key, len(items) > per_page, False)
+
+    def _ordered_queryset_page(self, position):
+        """
+        Returns a page of a QuerySet ordered by the descending order field and id.
+
+        The boundary is written as "field <= ? AND (field < ? OR id < ?)", so the range on the
+        field can be read from an index on (field, id).
+
+        """
+        field, per_page = self.order_field, self.per_page
+
+        def get_key(item):
+            return [getattr(item, field), item.pk]
+
+        def beyond(key, direction):
+            value, pk = key
+            return (Q(**{f'{field}__{direction}e': value})
+                    & (Q(**{f'{field}__{direction}': value}) | Q(**{f'pk__{direction}': pk})))
+
+        descending = self.data.order_by(f'-{field}', '-pk')
+        ascending = self.data.order_by(field, 'pk')
+        if _is_key_pair(position.get('after')):
+            items = list(descending.filter(beyond(position['after'], 'lt'))[:per_page + 1])
+            return CursorPage(items[:per_page], get_key, len(items) > per_page, True)
+        if _is_key_pair(position.get('before')):
+            items = list(ascending.filter(beyond(position['before'], 'gt'))[:per_page + 1])
+            return CursorPage(items[:per_page][::-1], get_key, True, len(items) > per_page)
+        if 'last' in position:
+            items = list(ascending[:per_page + 1])
+            return CursorPage(items[:per_page][::-1], get_key, False, len(items) > per_page)
+        items = list(descending[:per_page + 1])
+        return CursorPage(items[:per_page], get_key, len(items) > per_page, False)
+
+    def _sorted_ids_page(self, position):
+        """Returns a page of SortedIds using the boundary id as the key."""
+        per_page = self.per_page
+        if isinstance(position.get('after'), int):
+            ids = self.data.range(per_page + 1, after=position['after'])
+            return CursorPage(ids[:per_page], _get_key, len(ids) > per_page, True)
+        if isinstance(position.get('before'), int):
+            ids = self.data.range(per_page + 1, before=position['before'], reverse=True)
+            return CursorPage(ids[:per_page][::-1], _get_key, True, len(ids) > per_page)
+        if 'last' in position:
+            ids = self.data.range(per_page + 1, reverse=True)
+            return CursorPage(ids[:per_page][::-1], _get_key, False, len(ids) > per_page)
+        ids = self.data.range(per_page + 1)
+        return CursorPage(ids[:per_page], _get_key, len(ids) > per_page, False)
+
+    def _sequence_page(self, position):
+        """Returns a page of a list using the position of the boundary item."""
+        keys = [_get_key(item) for item in self.data]
+        total = len(keys)
+        if 'after' in position and position['after'] in keys:
+            start = keys.index(position['after']) + 1
+        elif 'before' in position and position['before'] in keys:
+            start = max(keys.index(position['before']) - self.per_page, 0)
+        elif 'last' in position:
+            start = max(total - self.per_page, 0)
+        else:
+            start = 0
+        end = start + self.per_page
+        return CursorPage(list(self.data[start:end]), _get_key, end < total, start > 0)
+
+
+def encode_cursor(position):
+    """Encodes a page position into an opaque, signed cursor."""
+    return signing.dumps(position, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    """Decodes a cursor. An empty or invalid cursor decodes to the first page."""
+    if not cursor:
+        return {}
+    try:
+        position = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return {}
+    return position if isinstance(position, dict) else {}
+
+
+def _is_key_pair(key):
+    """Returns whether a cursor key is a pair of an order field value and an id."""
+    return isinstance(key, list) and len(key) == 2
+
+
+def _get_key(item):
+    """Returns the id of a model instance, a serialized item or the item itself."""
+    if isinstance(item, dict):
+        return item['id']
+    return getattr(item, 'pk', item)
@@ -0,0 +1,7 @@
+import redis
+from django.conf import settings
+
+#: (redis.Redis): The Redis connection shared by the views, the view counters and the channel
+#: cache. The short timeouts keep a page from hanging while Redis is unreachable.
+r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB,
+                socket_connect_timeout=1, socket_timeout=1)
@@ -0,0 +1,84 @@
+import hashlib
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db.models import F
+
+from .caching import bump_version, get_version, record_lookup
+from .models import Youtuber
+
+SEARCH_CACHE_NAMESPACE = 'search'
+SEARCH_CACHE_TIMEOUT = 60 * 15
+SEARCH_MIN_RANK = 0.3
+
+
+def normalize_query(query):
+    """
+    Normalizes a search query so that equivalent queries share one cache entry.
+
+    The Unicode form, the letter case and the whitespace of the query are folded.
+
+    Args:
+        query (str): The search query typed by the user.
+
+    Returns:
+        (str): The normalized query.
+
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+
+def search_queryset(query):
+    """
+    Returns the Youtubers matching the query, ordered by rank.
+
+    Matching rows are found with the GIN index on the stored search_vector column, and only
+    those rows are ranked.
+
+    Args:
+        query (str): The search query.
+
+    Returns:
+        (QuerySet): The matching Youtubers annotated with their rank.
+
+    """
+    search_query = SearchQuery(query, config='russian')
+    return Youtuber.objects.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query)
+    ).filter(rank__gte=SEARCH_MIN_RANK).order_by('-rank', 'id')
+
+
+def search_cache_key(normalized_query):
+    """Returns the cache key of a normalized query in the current version of the search cache."""
+    digest = hashlib.md5(normalized_query.encode()).hexdigest()
+    return f'{SEARCH_CACHE_NAMESPACE}:{get_version(SEARCH_CACHE_NAMESPACE)}:{digest}'
+
+
+def search_youtuber_ids(query):
+    """
+    Returns the ids of the Youtubers matching the query, ordered by rank.
+
+    The ranked ids are cached by the normalized query. The cache is versioned and moves to a new
+    version whenever the searchable text of a Youtuber changes.
+
+    Args:
+        query (str): The search query.
+
+    Returns:
+        (list): The ranked ids of the matching Youtubers.
+
+    """
+    normalized_query = normalize_query(query)
+    key = search_cache_key(normalized_query)
+    ids = cache.get(key)
+    record_lookup(SEARCH_CACHE_NAMESPACE, hit=ids is not None)
+    if ids is None:
+        ids = list(search_queryset(normalized_query).values_list('id', flat=True))
+        cache.set(key, ids, SEARCH_CACHE_TIMEOUT)
+    return ids
+
+
+def invalidate_search_cache():
+    """Invalidates all cached search results."""
+    bump_version(SEARCH_CACHE_NAMESPACE)
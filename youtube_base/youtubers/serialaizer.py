@@ -11,19 +11,19 @@ class YoutuberSerializer(serializers.ModelSerializer):
     datatypes that can then be easily rendered into JSON, XML or other content types. It also
     deserializes the received data back into complex types, after validating the received data.
 
-    The fields '__all__' in Meta class indicates that all fields in the Youtuber model should be
-    used.
+    All fields of the Youtuber model are used, except the generated search_vector column, which
+    only exists for full-text search.
 
     Attributes:
         model (Model): The model the serializer is tied to, in this case, the Youtuber model.
-        fields (str): The fields from the model to be serialized. '__all__' to include all fields.
+        exclude (tuple): The fields from the model that are not serialized.
 
     """
     absolute_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Youtuber
-        fields = '__all__'
+        exclude = ('search_vector',)
 
     def get_absolute_url(self, obj):
         return obj.get_absolute_url()
@@ -0,0 +1,76 @@
+import datetime
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from youtube_base.actions.models import Action
+from youtube_base.actions.streams import build_stream
+
+from .caching import bump_version, get_version, record_lookup
+from .models import Category
+
+SIDEBAR_CACHE_NAMESPACE = 'sidebar'
+
+#: (int): The number of seconds the sidebar is cached for. Changes invalidate it before that.
+SIDEBAR_CACHE_TIMEOUT = 24 * 60 * 60
+
+#: (int): The number of latest actions shown in the sidebar.
+SIDEBAR_ACTIONS = 10
+
+#: (timedelta): How old the actions shown in the sidebar may be. Bounding the query by time on
+#: both sides limits it to the partitions of the Action table of the last months.
+SIDEBAR_ACTIONS_WINDOW = datetime.timedelta(days=30)
+
+
+def sidebar_cache_key():
+    """Returns the cache key of the sidebar in the current version of the sidebar cache."""
+    return f'{SIDEBAR_CACHE_NAMESPACE}:{get_version(SIDEBAR_CACHE_NAMESPACE)}:data'
+
+
+def build_sidebar():
+    """
+    Loads the sidebar data from the database.
+
+    Returns:
+        (dict): All categories under 'categories' and the records of the latest actions of the
+            last SIDEBAR_ACTIONS_WINDOW under 'actions', see build_stream.
+
+    """
+    now = timezone.now()
+    return {
+        'categories': list(Category.objects.all()),
+        'actions': build_stream(Action.objects.select_related('user')
+                                .filter(created__range=(now - SIDEBAR_ACTIONS_WINDOW, now))
+                                .order_by('-created')[:SIDEBAR_ACTIONS]),
+    }
+
+
+def get_sidebar():
+    """
+    Returns the sidebar data from the shared cache, loading it from the database on a miss.
+
+    Every lookup is counted in the hit and miss counters of the sidebar namespace.
+
+    Returns:
+        (dict): The sidebar data, see build_sidebar.
+
+    """
+    key = sidebar_cache_key()
+    sidebar = cache.get(key)
+    record_lookup(SIDEBAR_CACHE_NAMESPACE, sidebar is not None)
+    if sidebar is None:
+        sidebar = build_sidebar()
+        cache.set(key, sidebar, SIDEBAR_CACHE_TIMEOUT)
+    return sidebar
+
+
+def warm_sidebar():
+    """Loads the sidebar into the cache, so the first requests of the workers are hits."""
+    sidebar = build_sidebar()
+    cache.set(sidebar_cache_key(), sidebar, SIDEBAR_CACHE_TIMEOUT)
+    return sidebar
+
+
+def invalidate_sidebar():
+    """Invalidates the cached sidebar of all workers."""
+    bump_version(SIDEBAR_CACHE_NAMESPACE)
@@ -0,0 +1,193 @@
+import logging
+from collections import defaultdict
+
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from redis import RedisError
+from taggit.models import Tag
+
+from youtube_base.actions.models import Action
+from youtube_base.actions.signals import actions_flushed
+
+from .detail_cache import invalidate_detail
+from .feeds import invalidate_feed
+from .filter_index import category_key, filter_index, tag_key
+from .models import Category, Comment, Youtuber
+from .search import invalidate_search_cache
+from .sitemaps import invalidate_sitemap
+from .sidebar import invalidate_sidebar
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ('channel_title', 'channel_description')
+
+
+def _search_fields(instance):
+    """Returns the searchable text of a Youtuber without loading deferred fields."""
+    return tuple(instance.__dict__.get(field) for field in SEARCH_FIELDS)
+
+
+@receiver(post_init, sender=Youtuber)
+def remember_search_fields(sender, instance, **kwargs):
+    """Remembers the searchable text of a Youtuber as it was loaded."""
+    instance._loaded_search_fields = _search_fields(instance)
+
+
+@receiver(post_save, sender=Youtuber)
+def invalidate_search_on_save(sender, instance, created, raw, **kwargs):
+    """
+    Invalidates the search cache and the feed when the title or the description of a Youtuber
+    changes.
+
+    New Youtubers and fixture rows always invalidate them. Saves that do not touch the title
+    or the description, such as adding categories, keep them.
+
+    """
+    if created or raw or instance._loaded_search_fields != _search_fields(instance):
+        invalidate_search_cache()
+        invalidate_feed()
+    instance._loaded_search_fields = _search_fields(instance)
+
+
+@receiver(post_delete, sender=Youtuber)
+def invalidate_search_on_delete(sender, instance, **kwargs):
+    """Invalidates the search cache and the feed when a Youtuber is deleted."""
+    invalidate_search_cache()
+    invalidate_feed()
+
+
+@receiver(post_save, sender=Youtuber)
+@receiver(post_delete, sender=Youtuber)
+def invalidate_detail_on_youtuber_change(sender, instance, **kwargs):
+    """Invalidates the cached detail page of a Youtuber when it is saved or deleted."""
+    invalidate_detail(instance.id)
+
+
+@receiver(post_save, sender=Youtuber)
+@receiver(post_delete, sender=Youtuber)
+def invalidate_sitemap_on_youtuber_change(sender, instance, **kwargs):
+    """Invalidates the sitemap section of a Youtuber and the sitemap index when it changes."""
+    invalidate_sitemap(instance.id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_detail_on_comment_change(sender, instance, **kwargs):
+    """Invalidates the cached comments of a Youtuber when a comment is added or deleted."""
+    invalidate_detail(instance.youtuber_id)
+
+
+@receiver(m2m_changed, sender=Youtuber.tags.through)
+def invalidate_detail_on_tags_change(sender, instance, action, reverse, **kwargs):
+    """Invalidates the cached tags of a Youtuber when tags are added to or removed from it."""
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Youtuber):
+        invalidate_detail(instance.id)
+
+
+def _update_filter_index(update, memberships, get_key):
+    """
+    Applies a change of memberships to the filter index.
+
+    Args:
+        update (callable): FilterIndex.add or FilterIndex.remove.
+        memberships (list): Tuples of the category id or tag name and the Youtuber id.
+        get_key (callable): category_key or tag_key.
+
+    """
+    youtuber_ids = defaultdict(list)
+    for value, youtuber_id in memberships:
+        youtuber_ids[get_key(value)].append(youtuber_id)
+    try:
+        for key, ids in youtuber_ids.items():
+            update(key, *ids)
+    except RedisError:
+        # The index is reconciled by the rebuild_filter_index command.
+        logger.warning('Cannot update the filter index.', exc_info=True)
+
+
+@receiver(m2m_changed, sender=Youtuber.categories.through)
+def update_on_categories_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Updates the category sets of the filter index and invalidates the cached category ids of the
+    Youtubers whose categories change.
+
+    """
+    if action == 'pre_clear':
+        # post_clear carries no pk_set, so the cleared ids are read beforehand.
+        related = instance.youtubers if reverse else instance.categories
+        instance._cleared_pk_set = set(related.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_pk_set', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        memberships = [(instance.id, youtuber_id) for youtuber_id in pk_set]
+    else:
+        memberships = [(category_id, instance.id) for category_id in pk_set]
+    update = filter_index.add if action == 'post_add' else filter_index.remove
+    _update_filter_index(update, memberships, category_key)
+    for youtuber_id in {youtuber_id for category_id, youtuber_id in memberships}:
+        invalidate_detail(youtuber_id)
+
+
+@receiver(m2m_changed, sender=Youtuber.tags.through)
+def update_filter_index_on_tags_change(sender, instance, action, pk_set, **kwargs):
+    """Updates the tag sets of the filter index when tags are added to or removed from a Youtuber."""
+    if not isinstance(instance, Youtuber):
+        return
+    if action == 'pre_clear':
+        instance._cleared_tag_names = list(instance.tags.names())
+        return
+    if action == 'post_clear':
+        names = instance.__dict__.pop('_cleared_tag_names', [])
+    elif action in ('post_add', 'post_remove'):
+        names = Tag.objects.filter(id__in=pk_set).values_list('name', flat=True)
+    else:
+        return
+    update = filter_index.add if action == 'post_add' else filter_index.remove
+    _update_filter_index(update, [(name, instance.id) for name in names], tag_key)
+
+
+@receiver(pre_delete, sender=Youtuber)
+def remember_filter_memberships(sender, instance, **kwargs):
+    """Reads the categories and tags of a Youtuber before the delete cascades to them."""
+    instance._filter_memberships = (
+        [category_key(category_id) for category_id in instance.categories.values_list('id', flat=True)]
+        + [tag_key(name) for name in instance.tags.names()]
+    )
+
+
+@receiver(post_delete, sender=Youtuber)
+def remove_from_filter_index(sender, instance, **kwargs):
+    """Removes a deleted Youtuber from the sets of its categories and tags."""
+    memberships = [(key, instance.id) for key in instance.__dict__.get('_filter_memberships', [])]
+    _update_filter_index(filter_index.remove, memberships, lambda key: key)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def drop_filter_set(sender, instance, **kwargs):
+    """Drops the set of a deleted category or tag from the filter index."""
+    key = category_key(instance.id) if sender is Category else tag_key(instance.name)
+    try:
+        filter_index.delete(key)
+    except RedisError:
+        logger.warning('Cannot update the filter index.', exc_info=True)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Action)
+@receiver(post_delete, sender=Action)
+def invalidate_sidebar_on_change(sender, instance, **kwargs):
+    """Invalidates the cached sidebar when a category or an action is saved or deleted."""
+    invalidate_sidebar()
+
+
+@receiver(actions_flushed, sender=Action)
+def invalidate_sidebar_on_flush(sender, actions, **kwargs):
+    """Invalidates the cached sidebar when buffered actions are written."""
+    if actions:
+        invalidate_sidebar()
@@ -1,23 +1,93 @@
-from django.contrib.sitemaps import Sitemap
+from django.conf import settings
+from django.db.models import F, Max
+from django.http import Http404
+from django.template.loader import render_to_string
+from django.urls import reverse
 
+from .caching import bump_version
+from .conditional import cached_document_response, get_cached_document
 from .models import Youtuber
 
+#: (int): The number of Youtuber ids a sitemap section covers. A sitemap may list at most 50,000
+#: URLs, so a section stays below the limit even when no id of its range is deleted.
+SITEMAP_SECTION_SIZE = 10_000
 
-class YoutuberSitemap(Sitemap):
-    """A Django sitemap for the Youtuber model.
+#: (int): The number of seconds a rendered sitemap is cached for. It is replaced as soon as a
+#: Youtuber of its range changes, see invalidate_sitemap.
+SITEMAP_CACHE_TIMEOUT = 24 * 60 * 60
 
-    Attributes:
-        changefreq (str): The frequency with which the content of the page is likely to change.
-        priority (float): The priority of this URL relative to other URLs on your site.
+#: (str): The cache namespace of the sitemap index.
+SITEMAP_INDEX_NAMESPACE = 'sitemap:youtubers:index'
+
+#: (str): How often the page of a Youtuber is likely to change.
+CHANGEFREQ = 'weekly'
+
+#: (float): The priority of the pages of the Youtubers relative to the other pages of the site.
+PRIORITY = 0.9
+
+
+def section_namespace(section):
+    """Returns the cache namespace of a numbered sitemap section."""
+    return f'sitemap:youtubers:{section}'
+
+
+def get_section(youtuber_id):
+    """Returns the number of the sitemap section that lists a Youtuber, starting from 1."""
+    return youtuber_id // SITEMAP_SECTION_SIZE + 1
+
+
+def invalidate_sitemap(youtuber_id):
+    """Invalidates the sitemap section of a Youtuber and the sitemap index."""
+    bump_version(section_namespace(get_section(youtuber_id)))
+    bump_version(SITEMAP_INDEX_NAMESPACE)
+
+
+def _render_index(request):
+    """Renders the sitemap index with a link and the last change of every non-empty section."""
+    base_url = f'{request.scheme}://{settings.SITE_DOMAIN}'
+    sections = (Youtuber.objects.annotate(section=F('id') / SITEMAP_SECTION_SIZE + 1)
+                .values('section').annotate(last_mod=Max('updated_at')).order_by('section'))
+    return render_to_string('sitemap_index.xml', {'sitemaps': [
+        {'location': base_url + reverse('sitemap_section', args=[item['section']]),
+         'last_mod': item['last_mod']}
+        for item in sections
+    ]})
+
+
+def _render_section(request, section):
+    """
+    Renders a sitemap section.
+
+    The section is read with one range query on the primary key, so a section costs the same
+    wherever it is in the table, and only the slug and the update time are loaded.
+
+    Returns:
+        (str): The XML of the section, or None if the section lists no Youtubers.
 
     """
-    changefreq = 'weekly'
-    priority = 0.9
+    base_url = f'{request.scheme}://{settings.SITE_DOMAIN}'
+    first_id = (section - 1) * SITEMAP_SECTION_SIZE
+    rows = (Youtuber.objects.filter(id__gte=first_id, id__lt=first_id + SITEMAP_SECTION_SIZE)
+            .order_by('id').values_list('slug_name', 'updated_at'))
+    urlset = [
+        {'location': base_url + reverse('youtuber_detail', args=[slug_name]),
+         'lastmod': updated_at, 'changefreq': CHANGEFREQ, 'priority': PRIORITY}
+        for slug_name, updated_at in rows
+    ]
+    return render_to_string('sitemap.xml', {'urlset': urlset}) if urlset else None
+
+
+def sitemap_index(request):
+    """Returns the sitemap index that links the numbered sections of the Youtubers."""
+    sitemap = get_cached_document(SITEMAP_INDEX_NAMESPACE, lambda: _render_index(request),
+                                  SITEMAP_CACHE_TIMEOUT)
+    return cached_document_response(request, 'sitemap-index', sitemap, 'application/xml')
 
-    def items(self):
-        """Returns a QuerySet of all Youtuber objects."""
-        return Youtuber.objects.all()
 
-    def lastmod(self, obj):
-        """Returns the date when the Youtuber object was last modified"""
-        return obj.updated_at
+def sitemap_section(request, section):
+    """Returns a numbered sitemap section with the pages of the Youtubers in its id range."""
+    sitemap = get_cached_document(section_namespace(section),
+                                  lambda: _render_section(request, section), SITEMAP_CACHE_TIMEOUT)
+    if sitemap is None:
+        raise Http404('Sitemap section not found.')
+    return cached_document_response(request, f'sitemap-{section}', sitemap, 'application/xml')
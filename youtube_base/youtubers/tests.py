@@ -1,12 +1,44 @@
+import asyncio
+import gzip
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+import redis
+
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser, User
 from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.cache import cache
+from django.core.management import call_command
 from django.core.paginator import Page, Paginator
-from django.test import RequestFactory, TestCase
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from tests.fake_youtube_api import FakeYoutubeApi
+from youtube_api.add_youtuber import YoutubeApi
+from youtube_api.async_api import AsyncYoutubeApi
+from youtube_api.cache import ChannelCache
+from youtube_api.resolver import ChannelResolver, handle_index, resolution_stats
+from youtube_api.service import execute, get_youtube_service
+from users.models import Profile
+from youtube_base.actions.models import Action
 
+from .filter_index import FILTER_KEY_PREFIX, READY_KEY, category_key, filter_index, tag_key
 from .forms import AddYoutuberForm, CommentForm
+from .caching import get_stats
 from .models import Category, Comment, Youtuber
-from .views import CommentAddView, YoutuberDetailView, YoutuberList
+from .pagination import CursorPage, CursorPaginator, encode_cursor
+from .search import SEARCH_CACHE_NAMESPACE, normalize_query, search_youtuber_ids
+from .sidebar import SIDEBAR_CACHE_NAMESPACE, get_sidebar
+from .sitemaps import SITEMAP_SECTION_SIZE
+from .trending import add_views, get_ranking
+from .view_counter import DIRTY_KEY, EPOCH_KEY, ViewCounter, viewers_key, views_key
+from .views import FILTER_SESSION_KEY, CommentAddView, YoutuberDetailView, YoutuberList, r, view_counter
 
 
 class PaginationTest(TestCase):
@@ -36,6 +68,136 @@ class PaginationTest(TestCase):
         self.assertEqual(page_data.number, 1)
 
 
+def _delete_filter_index():
+    keys = list(r.scan_iter(f'{FILTER_KEY_PREFIX}:*'))
+    if keys:
+        r.delete(*keys)
+
+
+class YoutuberListTest(TestCase):
+    def setUp(self):
+        self.music = Category.objects.create(name='Музика')
+        self.games = Category.objects.create(name='Ігри')
+        for number in range(4):
+            youtuber = Youtuber.objects.create(channel_title=f'Youtuber {number}',
+                                               channel_description='Long description ' * 100,
+                                               slug_name=f'youtuber-{number}')
+            youtuber.categories.add(self.music, self.games)
+        youtuber.tags.add('live')
+        filter_index.rebuild()
+        self.addCleanup(_delete_filter_index)
+
+    def _titles(self, response):
+        return [youtuber.channel_title for youtuber in response.context['youtubers']]
+
+    def test_session_keeps_only_the_criteria(self):
+        response = self.client.post(reverse('youtuber_list'),
+                                    {'categories': [self.music.id, self.games.id]})
+        self.assertEqual(self._titles(response), ['Youtuber 0', 'Youtuber 1', 'Youtuber 2'])
+        self.assertEqual(dict(self.client.session),
+                         {FILTER_SESSION_KEY: {'categories': [self.music.id, self.games.id]}})
+
+        cursor = response.context['youtubers'].next_cursor
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('youtuber_list'), {'cursor': cursor})
+        self.assertEqual(self._titles(response), ['Youtuber 3'])
+
+    def test_tag_filter(self):
+        response = self.client.post(reverse('youtuber_list'), {'tag': 'live'})
+        self.assertEqual(self._titles(response), ['Youtuber 3'])
+        self.assertEqual(self._titles(self.client.get(reverse('youtuber_list'))), ['Youtuber 3'])
+
+    def test_all_and_exclude_options(self):
+        self.music.youtubers.remove(Youtuber.objects.get(slug_name='youtuber-0'))
+        self.games.youtubers.remove(Youtuber.objects.get(slug_name='youtuber-1'))
+        data = {'categories': [self.music.id, self.games.id], 'match': 'all'}
+        response = self.client.post(reverse('youtuber_list'), data)
+        self.assertEqual(self._titles(response), ['Youtuber 2', 'Youtuber 3'])
+
+        data = {'categories': [self.music.id], 'exclude': [self.games.id]}
+        response = self.client.post(reverse('youtuber_list'), data)
+        self.assertEqual(self._titles(response), ['Youtuber 1'])
+
+    def test_postgres_answers_without_the_index(self):
+        criteria = {'categories': [self.music.id], 'exclude': [self.games.id]}
+        self.music.youtubers.remove(Youtuber.objects.get(slug_name='youtuber-0'))
+        self.games.youtubers.remove(Youtuber.objects.get(slug_name='youtuber-1'))
+        expected = filter_index.match(criteria)[:]
+        r.delete(READY_KEY)
+        self.assertIsNone(filter_index.match(criteria))
+        self.assertEqual(list(YoutuberList.filter_youtubers(criteria).values_list('id', flat=True)),
+                         expected)
+        with mock.patch.object(r, 'pipeline', side_effect=redis.ConnectionError):
+            response = self.client.post(reverse('youtuber_list'),
+                                        {'categories': [self.music.id, self.games.id],
+                                         'match': 'all'})
+        self.assertEqual(self._titles(response), ['Youtuber 2', 'Youtuber 3'])
+
+
+class FilterIndexTest(TestCase):
+    def setUp(self):
+        self.music = Category.objects.create(name='Музика')
+        self.games = Category.objects.create(name='Ігри')
+        self.youtuber = Youtuber.objects.create(channel_title='Indexed', slug_name='indexed')
+        self.other = Youtuber.objects.create(channel_title='Other', slug_name='other')
+        filter_index.rebuild()
+        self.addCleanup(_delete_filter_index)
+
+    def _members(self, key):
+        return {int(youtuber_id) for youtuber_id in r.zrange(key, 0, -1)}
+
+    def test_signals_keep_the_sets_up_to_date(self):
+        self.youtuber.categories.add(self.music, self.games)
+        self.games.youtubers.add(self.other)
+        self.youtuber.tags.add('live', 'music')
+        self.assertEqual(self._members(category_key(self.games.id)),
+                         {self.youtuber.id, self.other.id})
+        self.assertEqual(self._members(tag_key('live')), {self.youtuber.id})
+
+        self.games.youtubers.clear()
+        self.youtuber.tags.remove('music')
+        self.assertEqual(self._members(category_key(self.games.id)), set())
+        self.assertEqual(self._members(tag_key('music')), set())
+
+        self.youtuber.delete()
+        self.assertEqual(self._members(category_key(self.music.id)), set())
+        self.assertEqual(self._members(tag_key('live')), set())
+        self.music.delete()
+        self.assertFalse(r.exists(category_key(self.music.id)))
+
+    def test_rebuild_reconciles_with_postgres(self):
+        Youtuber.categories.through.objects.bulk_create([
+            Youtuber.categories.through(youtuber=self.other, category=self.music)])
+        r.zadd(category_key(self.games.id), {self.youtuber.id: self.youtuber.id})
+        self.assertEqual(filter_index.match({'categories': [self.music.id, self.games.id]})[:],
+                         [self.youtuber.id])
+
+        self.assertEqual(filter_index.rebuild(), 1)
+        self.assertEqual(filter_index.match({'categories': [self.music.id, self.games.id]})[:],
+                         [self.other.id])
+        self.assertFalse(r.exists(category_key(self.games.id)))
+
+    def test_result_is_paged_in_redis(self):
+        youtubers = [Youtuber.objects.create(channel_title=f'Youtuber {number}',
+                                             slug_name=f'youtuber-{number}')
+                     for number in range(5)]
+        ids = [youtuber.id for youtuber in youtubers]
+        self.music.youtubers.add(*youtubers)
+        self.games.youtubers.add(youtubers[1], self.other)
+        result = filter_index.match({'categories': [self.music.id, self.games.id],
+                                     'exclude': [self.games.id]})
+        self.assertEqual(result.count(), 4)
+        self.assertEqual(result[1:3], [ids[2], ids[3]])
+        self.assertEqual(result.range(2, after=ids[0]), [ids[2], ids[3]])
+        self.assertEqual(result.range(2, before=ids[4], reverse=True), [ids[3], ids[2]])
+        self.assertEqual(result.range(3, reverse=True), [ids[4], ids[3], ids[2]])
+        self.assertEqual(list(r.scan_iter(f'{FILTER_KEY_PREFIX}:result:*')), [])
+
+        page = CursorPaginator(filter_index.match({'categories': [self.music.id]}), 2).page()
+        self.assertEqual(list(page), ids[:2])
+        self.assertTrue(page.has_next)
+
+
 class YoutuberDetailViewTest(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
@@ -86,6 +248,13 @@ class YoutuberDetailViewTest(TestCase):
 
 class AddYoutuberViewTests(TestCase):
     def setUp(self):
+        api = FakeYoutubeApi({
+            'UC_x5XG1OV2P6uZZ5FSM9Ttw': {'title': 'Google for Developers', 'handle': 'googledevs'},
+        }).start()
+        self.addCleanup(api.stop)
+        env = mock.patch.dict(os.environ, {'API_KEY': 'test', 'YOUTUBE_API_ENDPOINT': api.url})
+        env.start()
+        self.addCleanup(env.stop)
         self.category = Category.objects.create(name='Test Category')
         self.existing_youtuber = Youtuber.objects.create(
             channel_id="UC_x5XG1OV2P6uZZ5FSM9Ttw",
@@ -113,3 +282,869 @@ class AddYoutuberViewTests(TestCase):
         self.assertEqual(youtubers_count, 1)
 
         self.assertContains(response, 'Такий ютубер вже існує на нашому сайті.')
+
+
+class YoutuberSearchTest(TestCase):
+    def setUp(self):
+        Youtuber.objects.create(channel_title='Кулінарний канал',
+                                channel_description='Рецепти домашньої кухні',
+                                slug_name='cooking')
+        Youtuber.objects.create(channel_title='Ігровий канал',
+                                channel_description='Огляди нових ігор',
+                                slug_name='games')
+
+    def test_search_uses_stored_vector(self):
+        response = self.client.get(reverse('youtuber_search'), {'query': 'кулінарний'})
+        self.assertEqual(response.status_code, 200)
+        results = list(response.context['results'])
+        self.assertEqual([youtuber.slug_name for youtuber in results], ['cooking'])
+
+    def test_search_vector_follows_updates(self):
+        youtuber = Youtuber.objects.get(slug_name='games')
+        youtuber.channel_title = 'Кулінарний канал для геймерів'
+        youtuber.save()
+        response = self.client.get(reverse('youtuber_search'), {'query': 'кулінарний'})
+        results = {youtuber.slug_name for youtuber in response.context['results']}
+        self.assertEqual(results, {'cooking', 'games'})
+
+
+class YoutuberAutocompleteTest(TestCase):
+    def setUp(self):
+        Youtuber.objects.create(channel_title='Теорія Ігор', username='teoriaihor',
+                                channel_description='Огляди ігор', slug_name='teoriaihor')
+        Youtuber.objects.create(channel_title='Burger Channel', username='burgerchannel',
+                                slug_name='burgerchannel')
+
+    def test_prefix_match(self):
+        response = self.client.get(reverse('youtuber_autocomplete'), {'q': 'Burg'})
+        self.assertEqual(response.json()['results'], [{
+            'title': 'Burger Channel',
+            'slug': 'burgerchannel',
+            'url': reverse('youtuber_detail', args=['burgerchannel']),
+        }])
+
+    def test_typo_tolerant_match(self):
+        response = self.client.get(reverse('youtuber_autocomplete'), {'q': 'теоря'})
+        slugs = [item['slug'] for item in response.json()['results']]
+        self.assertEqual(slugs, ['teoriaihor'])
+
+    def test_short_query(self):
+        response = self.client.get(reverse('youtuber_autocomplete'), {'q': 'b'})
+        self.assertEqual(response.json()['results'], [])
+
+
+class SearchCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.youtuber = Youtuber.objects.create(channel_title='Кулінарний канал',
+                                                slug_name='cooking')
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query('  КУЛІНАРНИЙ \t канал '), 'кулінарний канал')
+        self.assertEqual(normalize_query('ｋｕｌｉｎａｒ'), 'kulinar')
+
+    def test_equivalent_queries_share_entry(self):
+        self.assertEqual(search_youtuber_ids('Кулінарний'), [self.youtuber.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(search_youtuber_ids('  кулінарний '), [self.youtuber.id])
+        self.assertEqual(get_stats(SEARCH_CACHE_NAMESPACE)['hits'], 1)
+        self.assertEqual(get_stats(SEARCH_CACHE_NAMESPACE)['misses'], 1)
+
+    def test_title_change_invalidates(self):
+        search_youtuber_ids('кулінарний')
+        self.youtuber.channel_title = 'Ігровий канал'
+        self.youtuber.save()
+        self.assertEqual(search_youtuber_ids('кулінарний'), [])
+
+    def test_unrelated_save_keeps_entry(self):
+        search_youtuber_ids('кулінарний')
+        self.youtuber.twitch_url = 'https://twitch.tv/cooking'
+        self.youtuber.save()
+        with self.assertNumQueries(0):
+            search_youtuber_ids('кулінарний')
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        self.youtubers = [Youtuber.objects.create(channel_title=f'Youtuber {number}',
+                                                  slug_name=f'youtuber-{number}')
+                          for number in range(7)]
+        self.paginator = CursorPaginator(Youtuber.objects.all(), 3)
+
+    def _titles(self, page):
+        return [youtuber.channel_title for youtuber in page]
+
+    def test_queryset_pages(self):
+        with self.assertNumQueries(1):
+            first = self.paginator.page()
+        self.assertEqual(self._titles(first), ['Youtuber 0', 'Youtuber 1', 'Youtuber 2'])
+        self.assertFalse(first.has_previous)
+        self.assertTrue(first.has_next)
+
+        with self.assertNumQueries(1):
+            second = self.paginator.page(first.next_cursor)
+        self.assertEqual(self._titles(second), ['Youtuber 3', 'Youtuber 4', 'Youtuber 5'])
+        self.assertTrue(second.has_previous)
+
+        previous = self.paginator.page(second.previous_cursor)
+        self.assertEqual(self._titles(previous), self._titles(first))
+
+        with self.assertNumQueries(1):
+            last = self.paginator.page(first.last_cursor)
+        self.assertEqual(self._titles(last), ['Youtuber 4', 'Youtuber 5', 'Youtuber 6'])
+        self.assertFalse(last.has_next)
+        self.assertTrue(last.has_previous)
+
+    def test_invalid_cursor_returns_first_page(self):
+        with self.assertNumQueries(1):
+            page = self.paginator.page('Not the cursor!')
+        self.assertIsInstance(page, CursorPage)
+        self.assertEqual(self._titles(page), ['Youtuber 0', 'Youtuber 1', 'Youtuber 2'])
+
+    def test_ordered_queryset_pages(self):
+        for youtuber, comments in zip(self.youtubers, [3, 1, 3, 0, 3, 2, 1]):
+            youtuber.comment_count = comments
+            youtuber.save()
+        paginator = CursorPaginator(Youtuber.objects.all(), 3, 'comment_count')
+        first = paginator.page()
+        self.assertEqual(self._titles(first), ['Youtuber 4', 'Youtuber 2', 'Youtuber 0'])
+        with self.assertNumQueries(1):
+            second = paginator.page(first.next_cursor)
+        self.assertEqual(self._titles(second), ['Youtuber 5', 'Youtuber 6', 'Youtuber 1'])
+        self.assertEqual(self._titles(paginator.page(second.previous_cursor)), self._titles(first))
+        last = paginator.page(first.last_cursor)
+        self.assertEqual(self._titles(last), ['Youtuber 6', 'Youtuber 1', 'Youtuber 3'])
+        self.assertEqual(self._titles(paginator.page(last.previous_cursor)),
+                         ['Youtuber 2', 'Youtuber 0', 'Youtuber 5'])
+
+    def test_sequence_keeps_order(self):
+        ids = [youtuber.id for youtuber in reversed(self.youtubers)]
+        paginator = CursorPaginator(ids, 3)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        self.assertEqual(list(second), ids[3:6])
+        self.assertEqual(list(paginator.page(second.previous_cursor)), ids[:3])
+        self.assertEqual(list(paginator.page(first.last_cursor)), ids[4:])
+
+    def test_empty_page_cursors(self):
+        paginator = CursorPaginator([{'id': 1}, {'id': 2}], 2)
+        empty = paginator.page(encode_cursor({'after': 2}))
+        self.assertEqual(list(empty), [])
+        self.assertEqual(list(paginator.page(empty.previous_cursor)), [{'id': 1}, {'id': 2}])
+
+        last_id = self.youtubers[-1].id
+        empty = self.paginator.page(encode_cursor({'after': last_id}))
+        self.assertEqual(self._titles(empty), [])
+        self.assertEqual(self._titles(self.paginator.page(empty.previous_cursor)),
+                         ['Youtuber 4', 'Youtuber 5', 'Youtuber 6'])
+        empty = self.paginator.page(encode_cursor({'before': self.youtubers[0].id}))
+        self.assertEqual(self._titles(self.paginator.page(empty.next_cursor)),
+                         ['Youtuber 0', 'Youtuber 1', 'Youtuber 2'])
+
+
+class ImportChannelsCommandTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Ігри')
+        self.addCleanup(r.delete, category_key(self.category.id))
+        self.api = FakeYoutubeApi({
+            f'UC{number:03}': {'title': f'Channel {number}', 'handle': f'channel{number}'}
+            for number in range(60)
+        }).start()
+        self.addCleanup(self.api.stop)
+        handle_index.clear()
+        env = mock.patch.dict(os.environ, {'API_KEY': 'test', 'YOUTUBE_API_ENDPOINT': self.api.url})
+        env.start()
+        self.addCleanup(env.stop)
+        Youtuber.objects.create(channel_id='UC000', channel_title='Channel 0', slug_name='channel0')
+
+    def _write_urls(self, urls):
+        file = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False)
+        file.write('\n'.join(urls))
+        file.close()
+        self.addCleanup(os.unlink, file.name)
+        return file.name
+
+    def test_import(self):
+        urls = [f'https://www.youtube.com/channel/UC{number:03}' for number in range(58)]
+        urls += ['https://www.youtube.com/@channel59', 'https://www.youtube.com/@missing', '']
+        out = StringIO()
+        call_command('import_channels', self._write_urls(urls), category=[self.category.id],
+                     stdout=out, stderr=StringIO())
+
+        self.assertIn('Resolved 50/60 URLs.', out.getvalue())
+        self.assertIn('Resolved 60/60 URLs.', out.getvalue())
+        self.assertEqual(Youtuber.objects.count(), 59)
+        self.assertEqual(self.category.youtubers.count(), 58)
+        self.assertEqual(r.zcard(category_key(self.category.id)), 58)
+        self.assertEqual(len(self.api.requests_for('channels')), 4)
+        self.assertEqual(len(self.api.requests_for('search')), 0)
+        youtuber = Youtuber.objects.get(channel_id='UC059')
+        self.assertEqual(youtuber.channel_title, 'Channel 59')
+        self.assertEqual(youtuber.slug_name, 'channel59')
+
+    def test_dry_run(self):
+        path = self._write_urls(['https://www.youtube.com/channel/UC001'])
+        out = StringIO()
+        call_command('import_channels', path, dry_run=True, stdout=out, stderr=StringIO())
+        self.assertIn('Would import Channel 1 (UC001)', out.getvalue())
+        self.assertEqual(Youtuber.objects.count(), 1)
+
+    def test_service_is_shared_and_connections_are_kept_alive(self):
+        service = get_youtube_service()
+        self.assertIs(get_youtube_service(), service)
+        for _ in range(5):
+            execute(service.channels().list(part='snippet', id='UC001'))
+        self.assertEqual(self.api.connections, 1)
+
+
+class AsyncYoutubeApiTest(SimpleTestCase):
+    def setUp(self):
+        self.api = FakeYoutubeApi({
+            f'UC{number:03}': {'title': f'Channel {number}', 'handle': f'channel{number}'}
+            for number in range(10)
+        }).start()
+        self.addCleanup(self.api.stop)
+        handle_index.clear()
+        env = mock.patch.dict(os.environ, {'API_KEY': 'test', 'YOUTUBE_API_ENDPOINT': self.api.url})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_get_channels_concurrently(self):
+        self.api.delay = 0.1
+        urls = [f'https://www.youtube.com/@channel{number}' for number in range(10)]
+        urls.append('https://www.youtube.com/@missing')
+        start = time.perf_counter()
+        channels = asyncio.run(AsyncYoutubeApi(concurrency=11).get_channels(urls))
+
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(channels[urls[3]]['channel_id'], 'UC003')
+        self.assertEqual(channels[urls[3]]['channel_username'], 'channel3')
+        self.assertIsNone(channels[urls[-1]])
+
+    def test_retries_unavailable_api(self):
+        self.api.failures = 2
+        api = AsyncYoutubeApi(backoff=0.01)
+        channel = asyncio.run(api.get_channel('https://www.youtube.com/channel/UC001'))
+        self.assertEqual(channel['channel_title'], 'Channel 1')
+        self.assertEqual(api.requests_made, 3)
+
+    def test_timeout(self):
+        self.api.delay = 0.5
+        api = AsyncYoutubeApi(timeout=0.1, retries=1, backoff=0.01)
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(api.resolve_channel_id('https://www.youtube.com/@channel1'))
+        self.assertEqual(api.requests_made, 2)
+
+    def test_timed_out_calls_keep_their_slot(self):
+        self.api.delay = 0.3
+        api = AsyncYoutubeApi(concurrency=1, timeout=0.1, retries=1, backoff=0.01)
+        start = time.perf_counter()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(api.get_channel('https://www.youtube.com/channel/UC001'))
+        # The retry waits for the thread of the timed out call to finish.
+        self.assertGreaterEqual(time.perf_counter() - start, 0.3)
+
+
+class ChannelCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.api = FakeYoutubeApi({
+            'UC001': {'title': 'Channel 1', 'description': 'Description', 'handle': 'channel1'},
+        }).start()
+        self.addCleanup(self.api.stop)
+        handle_index.clear()
+        env = mock.patch.dict(os.environ, {'API_KEY': 'test', 'YOUTUBE_API_ENDPOINT': self.api.url})
+        env.start()
+        self.addCleanup(env.stop)
+        self.cache = ChannelCache(r)
+        self.cache.key_prefix = 'test:youtube_api:channel'
+        self.addCleanup(lambda: [r.delete(key) for key in r.scan_iter('test:youtube_api:*')])
+
+    def test_lookups_are_cached_by_url_and_id(self):
+        api = YoutubeApi('https://www.youtube.com/@channel1', cache=self.cache)
+        self.assertTrue(api.get_channel_data())
+        self.assertEqual(len(self.api.requests), 1)
+
+        for url in ('https://www.youtube.com/@Channel1/', 'https://www.youtube.com/channel/UC001'):
+            api = YoutubeApi(url, cache=self.cache)
+            api.get_channel_data()
+            self.assertEqual(api.channel_id, 'UC001')
+            self.assertEqual(api.channel_title, 'Channel 1')
+            self.assertEqual(api.channel_description, 'Description')
+        self.assertEqual(len(self.api.requests), 1)
+
+    def test_not_found_is_cached(self):
+        for _ in range(2):
+            api = YoutubeApi('https://www.youtube.com/@missing', cache=self.cache)
+            self.assertFalse(api.get_channel_data())
+        self.assertEqual(len(self.api.requests), 1)
+        self.assertLessEqual(r.ttl(self.cache.url_key('https://www.youtube.com/@missing')),
+                             self.cache.negative_ttl)
+
+    def test_refresh_bypasses_cache(self):
+        YoutubeApi('https://www.youtube.com/@channel1', cache=self.cache).get_channel_data()
+        self.api.channels['UC001']['title'] = 'Renamed'
+        api = YoutubeApi('https://www.youtube.com/@channel1', cache=self.cache, refresh=True)
+        api.get_channel_data()
+        self.assertEqual(api.channel_title, 'Renamed')
+        self.assertEqual(self.cache.get('https://www.youtube.com/@channel1')['channel_title'],
+                         'Renamed')
+
+
+class ChannelResolverTest(SimpleTestCase):
+    def setUp(self):
+        self.api = FakeYoutubeApi({
+            'UC001': {'title': 'Channel 1', 'handle': 'channel1'},
+        }).start()
+        self.addCleanup(self.api.stop)
+        handle_index.clear()
+        resolution_stats.reset()
+        env = mock.patch.dict(os.environ, {'API_KEY': 'test', 'YOUTUBE_API_ENDPOINT': self.api.url})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_id_url_uses_channels_list(self):
+        item = ChannelResolver().get_channel('https://www.youtube.com/channel/UC001')
+        self.assertEqual(item['snippet']['title'], 'Channel 1')
+        self.assertEqual(self.api.requests_for('channels'), [{'part': 'snippet', 'id': 'UC001',
+                                                              'key': 'test', 'alt': 'json'}])
+        self.assertEqual(ChannelResolver().resolve_channel_id(
+            'https://www.youtube.com/channel/UC001'), 'UC001')
+        self.assertEqual(len(self.api.requests), 1)
+
+    def test_handle_url_uses_for_handle_and_index(self):
+        resolver = ChannelResolver()
+        self.assertEqual(resolver.get_channel('https://www.youtube.com/@channel1')['id'], 'UC001')
+        self.assertEqual(self.api.requests_for('channels')[0]['forHandle'], 'channel1')
+        self.assertEqual(resolver.resolve_channel_id('https://www.youtube.com/@CHANNEL1'), 'UC001')
+        self.assertEqual(resolver.requests_made, 1)
+        self.assertEqual(self.api.requests_for('search'), [])
+
+    def test_custom_url_falls_back_to_search(self):
+        resolver = ChannelResolver()
+        self.assertEqual(resolver.get_channel('https://www.youtube.com/c/channel1')['id'], 'UC001')
+        self.assertEqual(len(self.api.requests_for('search')), 1)
+        self.assertEqual(resolver.quota_spent, 101)
+
+        stats = resolution_stats.get_stats()
+        self.assertEqual(stats['custom']['resolutions'], 1)
+        self.assertEqual(stats['custom']['quota'], 101)
+
+
+class RefreshChannelsCommandTest(TestCase):
+    def setUp(self):
+        self.api = FakeYoutubeApi({
+            f'UC{number:03}': {'title': f'Channel {number}', 'description': 'New description'}
+            for number in range(5)
+        }).start()
+        self.addCleanup(self.api.stop)
+        env = mock.patch.dict(os.environ, {'API_KEY': 'test', 'YOUTUBE_API_ENDPOINT': self.api.url})
+        env.start()
+        self.addCleanup(env.stop)
+        cache.clear()
+        for number in range(6):
+            Youtuber.objects.create(channel_id=f'UC{number:03}', channel_title=f'Channel {number}',
+                                    channel_description='Old description')
+
+    def _refresh(self, **options):
+        call_command('refresh_channels', batch_size=2, rate=0, max_age=0, stdout=StringIO(),
+                     **options)
+
+    def test_refresh(self):
+        self._refresh()
+        self.assertEqual(len(self.api.requests_for('channels')), 3)
+        self.assertEqual(Youtuber.objects.filter(channel_description='New description').count(), 5)
+        self.assertFalse(Youtuber.objects.filter(refreshed_at__isnull=True).exists())
+
+        updated_at = dict(Youtuber.objects.values_list('id', 'updated_at'))
+        self.api.channels['UC004']['title'] = 'Renamed'
+        self._refresh()
+        self.assertEqual(len(self.api.requests_for('channels')), 6)
+        self.assertEqual(self.api.not_modified, 2)
+        renamed = Youtuber.objects.get(channel_id='UC004')
+        self.assertEqual(renamed.channel_title, 'Renamed')
+        self.assertEqual(
+            [youtuber_id for youtuber_id, updated in Youtuber.objects.values_list('id', 'updated_at')
+             if updated != updated_at[youtuber_id]],
+            [renamed.id],
+        )
+
+    def test_limit_resumes_with_least_recently_refreshed(self):
+        self._refresh(limit=3)
+        self.assertEqual(Youtuber.objects.filter(refreshed_at__isnull=True).count(), 3)
+        self.assertEqual(self.api.requests_for('channels')[0]['id'], 'UC000,UC001')
+        self.assertEqual(self.api.requests_for('channels')[1]['id'], 'UC002')
+
+        call_command('refresh_channels', rate=0, stdout=StringIO())
+        self.assertEqual(self.api.requests_for('channels')[2]['id'], 'UC003,UC004,UC005')
+        self.assertFalse(Youtuber.objects.filter(refreshed_at__isnull=True).exists())
+
+
+class YoutuberDetailCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='12345')
+        self.youtuber = Youtuber.objects.create(channel_title='Cached Youtuber',
+                                                channel_description='Cached description',
+                                                slug_name='cached-youtuber')
+        self.url = reverse('youtuber_detail', args=[self.youtuber.slug_name])
+
+    def test_anonymous_render_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Cached description')
+
+    def test_comments_and_tags_invalidate_cache(self):
+        self.client.get(self.url)
+        comment = Comment.objects.create(youtuber=self.youtuber, user=self.user, text='First!')
+        self.youtuber.tags.add('games')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'First!')
+        self.assertContains(response, 'id="tag-games"')
+
+        comment.delete()
+        self.youtuber.tags.remove('games')
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'First!')
+        self.assertNotContains(response, 'id="tag-games"')
+
+    def test_youtuber_save_invalidates_cache(self):
+        self.client.get(self.url)
+        self.youtuber.channel_description = 'New description'
+        self.youtuber.save()
+        self.assertContains(self.client.get(self.url), 'New description')
+
+        self.youtuber.slug_name = 'renamed'
+        self.youtuber.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_delete_links_stay_per_user(self):
+        Comment.objects.create(youtuber=self.youtuber, user=self.user, text='Mine')
+        self.client.get(self.url)
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(self.url), 'delete-comment-button')
+        self.client.force_login(User.objects.create_user(username='other', password='12345'))
+        self.assertNotContains(self.client.get(self.url), 'delete-comment-button')
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='12345')
+        self.youtuber = Youtuber.objects.create(channel_title='Conditional', slug_name='conditional',
+                                                channel_description='Опис')
+        self.url = reverse('youtuber_detail', args=['conditional'])
+
+    def test_detail_is_not_modified_until_it_changes(self):
+        view_counter.flush()
+        keys = [views_key(self.youtuber.id), viewers_key(self.youtuber.id), DIRTY_KEY]
+        r.delete(*keys)
+        self.addCleanup(r.delete, *keys)
+        response = self.client.get(self.url)
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        modified = response.headers['Last-Modified']
+        with mock.patch('youtubers.views.get_detail_data') as get_detail_data:
+            with self.assertNumQueries(0):
+                response = self.client.get(self.url, headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            view_counter.flush()
+            response = self.client.get(self.url, headers={'If-Modified-Since': modified})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers['ETag'], etag)
+            get_detail_data.assert_not_called()
+        view_counter.flush()
+        self.assertEqual(int(r.get(views_key(self.youtuber.id))), 3)
+
+        Comment.objects.create(youtuber=self.youtuber, user=self.user, text='Changed')
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertContains(response, 'Changed')
+        self.assertContains(response, '4 переглядів')
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_detail_etag_depends_on_user_and_messages(self):
+        etag = self.client.get(self.url).headers['ETag']
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+        etag = response.headers['ETag']
+        self.client.post(reverse('add_comment', args=['conditional']), {'text': ''})
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertContains(response, 'Будь-ласка введіть коректний коментар.')
+
+
+class FeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.old = Youtuber.objects.create(channel_title='Old channel', slug_name='old',
+                                           channel_description='Plain *markdown* text')
+        self.old.categories.add(Category.objects.create(name='Музика'))
+
+    def test_feed_is_rendered_once_without_writes(self):
+        url = reverse('youtuber_feed')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse([query for query in queries.captured_queries
+                          if not query['sql'].startswith('SELECT')])
+        self.assertContains(response, f'http://{settings.SITE_DOMAIN}/youtuber_list/old/')
+        self.assertContains(
+            response, f'<atom:link href="http://{settings.SITE_DOMAIN}{url}" rel="self"/>')
+        self.assertContains(response, 'Categories: Музика')
+        self.assertContains(response, '&lt;em&gt;markdown&lt;/em&gt;')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        response = self.client.get(url, headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        Youtuber.objects.create(channel_title='New channel', slug_name='new')
+        content = self.client.get(url).content.decode()
+        self.assertLess(content.index('New channel'), content.index('Old channel'))
+
+    def test_excerpt_is_rendered_on_save(self):
+        self.assertEqual(self.old.description_excerpt, '<p>Plain <em>markdown</em> text</p>')
+        self.old.channel_description = ' '.join(['word'] * 40)
+        self.old.save(update_fields=['channel_description'])
+        self.old.refresh_from_db()
+        self.assertTrue(self.old.description_excerpt.endswith('word …</p>'))
+
+
+class SitemapTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.first = Youtuber.objects.create(channel_title='First', slug_name='first')
+        self.far = Youtuber.objects.create(id=2 * SITEMAP_SECTION_SIZE + 5, channel_title='Far',
+                                           slug_name='far')
+
+    def test_index_links_non_empty_sections(self):
+        response = self.client.get(reverse('sitemap'))
+        self.assertContains(response, reverse('sitemap_section', args=[1]))
+        self.assertContains(response, reverse('sitemap_section', args=[3]))
+        self.assertNotContains(response, reverse('sitemap_section', args=[2]))
+        self.assertEqual(self.client.get(reverse('sitemap_section', args=[2])).status_code, 404)
+
+    def test_section_is_cached_until_its_range_changes(self):
+        url = reverse('sitemap_section', args=[1])
+        response = self.client.get(url)
+        self.assertContains(response, reverse('youtuber_detail', args=['first']))
+        self.assertNotContains(response, reverse('youtuber_detail', args=['far']))
+        with self.assertNumQueries(0):
+            response = self.client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn(b'/first/', gzip.decompress(response.content))
+        response = self.client.get(url, headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        self.far.channel_title = 'Still far'
+        self.far.save()
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        self.first.slug_name = 'renamed'
+        self.first.save()
+        self.assertContains(self.client.get(url), reverse('youtuber_detail', args=['renamed']))
+
+
+class SidebarCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='actor', password='12345')
+        self.category = Category.objects.create(name='Музика')
+
+    def _sidebar_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('category_list'))
+        return response, [query['sql'] for query in queries
+                          if 'youtubers_category' in query['sql'] or 'actions_action' in query['sql']]
+
+    def test_steady_state_costs_no_queries(self):
+        call_command('warm_sidebar_cache', stdout=StringIO())
+        for _ in range(2):
+            response, queries = self._sidebar_queries()
+            self.assertEqual(queries, [])
+        self.assertContains(response, 'Музика')
+        self.assertEqual(get_stats(SIDEBAR_CACHE_NAMESPACE)['misses'], 0)
+
+    def test_categories_and_actions_invalidate_sidebar(self):
+        self._sidebar_queries()
+        Category.objects.create(name='Наука')
+        Action.objects.create(user=self.user, action='Доданий канал')
+        response, queries = self._sidebar_queries()
+        self.assertNotEqual(queries, [])
+        self.assertContains(response, 'Наука')
+        self.assertContains(response, 'actor: Доданий канал')
+
+        self.category.delete()
+        self.assertNotContains(self.client.get(reverse('category_list')), 'Музика')
+
+
+class ViewCounterTest(TestCase):
+    def setUp(self):
+        self.youtuber = Youtuber.objects.create(channel_title='Counted', slug_name='counted')
+        self.other = Youtuber.objects.create(channel_title='Other', slug_name='other')
+        self.keys = [views_key(self.youtuber.id), viewers_key(self.youtuber.id),
+                     views_key(self.other.id), viewers_key(self.other.id), DIRTY_KEY, EPOCH_KEY]
+        r.delete(*self.keys)
+        self.addCleanup(r.delete, *self.keys)
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_views_are_buffered_and_flushed_in_one_pipeline(self):
+        counter = ViewCounter(r, flush_interval=60, max_pending=3)
+        counter.record(self.youtuber.id, 'user:1')
+        counter.record(self.youtuber.id, 'user:1')
+        self.assertIsNone(r.get(views_key(self.youtuber.id)))
+        self.assertEqual(counter.get_count(self.youtuber), 2)
+
+        counter.record(self.other.id, 'user:2')
+        self._wait_for(lambda: r.exists(DIRTY_KEY))
+        self.assertEqual(int(r.get(views_key(self.youtuber.id))), 2)
+        self.assertEqual(r.pfcount(viewers_key(self.youtuber.id)), 1)
+        self.assertEqual(counter.get_count(self.youtuber), 2)
+
+    def test_unreachable_redis_keeps_the_buffer(self):
+        counter = ViewCounter(r, flush_interval=60)
+        counter.record(self.youtuber.id, 'user:1')
+        with mock.patch.object(r, 'pipeline', side_effect=redis.ConnectionError), \
+                self.assertLogs('youtubers.view_counter', 'WARNING'):
+            self.assertFalse(counter.flush())
+        self.assertEqual(counter.get_count(self.youtuber), 1)
+        self.assertTrue(counter.flush())
+        self.assertEqual(int(r.get(views_key(self.youtuber.id))), 1)
+
+    def test_persist_and_restore(self):
+        counter = ViewCounter(r, flush_interval=60)
+        for viewer in ('user:1', 'user:2', 'user:2'):
+            counter.record(self.youtuber.id, viewer)
+        counter.flush()
+        call_command('persist_view_counts', stdout=StringIO())
+        self.youtuber.refresh_from_db()
+        self.assertEqual((self.youtuber.view_count, self.youtuber.unique_viewers), (3, 2))
+        self.assertFalse(r.exists(DIRTY_KEY))
+
+        # Redis loses its data, and a view is counted before the next persist run.
+        r.delete(*self.keys)
+        counter.record(self.youtuber.id, 'user:3')
+        counter.flush()
+        call_command('persist_view_counts', stdout=StringIO())
+        self.youtuber.refresh_from_db()
+        self.assertEqual(self.youtuber.view_count, 4)
+        self.assertEqual(int(r.get(views_key(self.youtuber.id))), 4)
+
+    def test_detail_page_does_not_block_on_redis(self):
+        self.addCleanup(view_counter.flush)
+        flushing_threads = []
+        with mock.patch.object(view_counter, 'max_pending', 1), \
+                mock.patch.object(view_counter, 'flush',
+                                  side_effect=lambda: flushing_threads.append(
+                                      threading.current_thread()) or True):
+            response = self.client.get(reverse('youtuber_detail', args=['counted']))
+            self._wait_for(lambda: flushing_threads)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(threading.current_thread(), flushing_threads)
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Ігри')
+        self.youtuber = Youtuber.objects.create(channel_title='Trending', slug_name='trending')
+        self.youtuber.categories.add(self.category)
+        self.other = Youtuber.objects.create(channel_title='Steady', slug_name='steady')
+        self._delete_keys()
+        self.addCleanup(self._delete_keys)
+
+    def _delete_keys(self):
+        keys = list(r.scan_iter('trending:*'))
+        if keys:
+            r.delete(*keys)
+
+    def _add_views(self, views, hours_ago=0):
+        with r.pipeline(transaction=False) as pipe:
+            add_views(pipe, views, {self.youtuber.id: [self.category.id]},
+                      now=time.time() - hours_ago * 3600)
+            pipe.execute()
+
+    def _counter_keys(self):
+        return [views_key(self.youtuber.id), viewers_key(self.youtuber.id),
+                views_key(self.other.id), viewers_key(self.other.id), DIRTY_KEY]
+
+    def test_flushed_views_are_ranked_overall_and_per_category(self):
+        counter = ViewCounter(r, flush_interval=60)
+        counter.record(self.youtuber.id, 'user:1', [self.category.id])
+        counter.record(self.other.id, 'user:1')
+        counter.record(self.other.id, 'user:2')
+        counter.flush()
+        self.addCleanup(r.delete, *self._counter_keys())
+
+        self.assertEqual(get_ranking(r, 'hour'), [(self.other.id, 2), (self.youtuber.id, 1)])
+        self.assertEqual(get_ranking(r, 'week', self.category.id), [(self.youtuber.id, 1)])
+
+    def test_older_views_decay(self):
+        self._add_views({self.youtuber.id: 10}, hours_ago=12)
+        self._add_views({self.other.id: 3})
+        self.assertEqual([youtuber_id for youtuber_id, score in get_ranking(r, 'day')],
+                         [self.other.id, self.youtuber.id])
+        self.assertEqual([youtuber_id for youtuber_id, score in get_ranking(r, 'all')],
+                         [self.youtuber.id, self.other.id])
+        self.assertEqual(get_ranking(r, 'hour'), [(self.other.id, 3)])
+
+    def test_pages_hydrate_the_ranking_with_one_query(self):
+        self._add_views({self.youtuber.id: 2, self.other.id: 1})
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('trending_json'), {'window': 'hour'})
+        self.assertEqual([item['slug'] for item in response.json()['results']],
+                         ['trending', 'steady'])
+
+        response = self.client.get(reverse('trending'),
+                                   {'window': 'week', 'category': self.category.id})
+        self.assertContains(response, 'id="trending-1"')
+        self.assertNotContains(response, 'id="trending-2"')
+
+    def test_detail_page_counts_views_per_category(self):
+        self.addCleanup(r.delete, *self._counter_keys())
+        self.client.get(reverse('youtuber_detail', args=['trending']))
+        view_counter.flush()
+        self.assertEqual(get_ranking(r, 'day', self.category.id), [(self.youtuber.id, 1)])
+
+
+class CounterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='counter', password='12345')
+        self.youtuber = Youtuber.objects.create(channel_title='Counted', slug_name='counted')
+        self.client.force_login(self.user)
+
+    def _counters(self):
+        self.youtuber.refresh_from_db()
+        return self.youtuber.comment_count, self.youtuber.subscriber_count, self.youtuber.tag_count
+
+    def test_views_update_the_counters(self):
+        self.client.get(reverse('youtuber_detail', args=['counted']))
+        self.client.post(reverse('add_comment', args=['counted']), {'text': 'Hello'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('manage_subscribe', args=[self.youtuber.id]))
+        for _ in range(2):
+            self.client.post(reverse('add_tag', args=['counted']), {'tag': 'music'})
+        self.assertEqual(self._counters(), (1, 1, 1))
+        response = self.client.get(reverse('youtuber_detail', args=['counted']))
+        self.assertContains(response, 'Коментарі: 1')
+        self.assertContains(response, '1 підписників')
+
+        comment = Comment.objects.get(youtuber=self.youtuber)
+        self.client.post(reverse('comment_delete', args=[comment.id]))
+        self.client.post(reverse('manage_subscribe', args=[self.youtuber.id]))
+        self.assertEqual(self._counters(), (0, 0, 1))
+
+    def test_double_delete_counts_once(self):
+        for text in ('First', 'Second'):
+            self.client.post(reverse('add_comment', args=['counted']), {'text': text})
+        comment = Comment.objects.filter(youtuber=self.youtuber).first()
+        # The second request of a double submit loaded the comment before the first deleted it.
+        stale_comment = Comment.objects.get(id=comment.id)
+        self.client.post(reverse('comment_delete', args=[comment.id]))
+        with mock.patch('youtubers.views.get_object_or_404', return_value=stale_comment):
+            self.client.post(reverse('comment_delete', args=[comment.id]))
+        self.assertEqual(self._counters()[0], 1)
+
+    def test_reconcile_fixes_drift(self):
+        Comment.objects.create(youtuber=self.youtuber, user=self.user, text='Bypassed')
+        Profile.objects.create(user=self.user).subscriptions.add(self.youtuber)
+        Youtuber.objects.filter(id=self.youtuber.id).update(tag_count=5)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self._counters(), (1, 1, 0))
+
+    def test_lists_sort_by_counters(self):
+        other = Youtuber.objects.create(channel_title='Counted more', slug_name='counted-more',
+                                        comment_count=2)
+        category = Category.objects.create(name='Ігри')
+        category.youtubers.add(self.youtuber, other)
+        self.client.logout()
+        session = self.client.session
+        session[FILTER_SESSION_KEY] = {'categories': [category.id]}
+        session.save()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('youtuber_list'), {'sort': 'comments'})
+        self.assertEqual([youtuber.id for youtuber in response.context['youtubers']],
+                         [other.id, self.youtuber.id])
+        self.assertContains(response, '2 коментарів')
+
+        response = self.client.get(reverse('youtuber_search'),
+                                   {'query': 'Counted', 'sort': 'comments'})
+        self.assertEqual([youtuber.id for youtuber in response.context['results']],
+                         [other.id, self.youtuber.id])
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Checks the number of queries every page runs on a seeded dataset with cold caches, so an
+    N+1 query or a repeated lookup in a view or a template fails the suite.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='budget', password='12345')
+        Profile.objects.create(user=cls.user)
+        commenter = User.objects.create_user(username='commenter', password='12345')
+        cls.categories = [Category.objects.create(name=f'Category {number}') for number in range(3)]
+        for number in range(12):
+            youtuber = Youtuber.objects.create(channel_title=f'Budget channel {number}',
+                                               channel_description='Опис каналу',
+                                               slug_name=f'budget-{number}')
+            youtuber.categories.add(*cls.categories[:number % 3 + 1])
+            youtuber.tags.add(f'tag{number % 4}', 'shared')
+            for comment in range(3):
+                Comment.objects.create(youtuber=youtuber, user=commenter, text=f'Comment {comment}')
+            Action.objects.create(user=commenter, action='додав канал', target=youtuber)
+        cls.user.profile.subscriptions.add(*Youtuber.objects.all()[:5])
+
+    def setUp(self):
+        cache.clear()
+        _delete_filter_index()
+
+    def _assert_budget(self, budget, url, data=None, method='get'):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), budget, '\n'.join(
+            query['sql'] for query in queries.captured_queries))
+
+    def _assert_page_budgets(self, budgets):
+        pages = {
+            'home': (reverse('home'), None),
+            'category_list': (reverse('category_list'), None),
+            'detail': (reverse('youtuber_detail', args=['budget-5']), None),
+            'search': (reverse('youtuber_search'), {'query': 'Budget'}),
+            'trending': (reverse('trending'), None),
+            'feed': (reverse('youtuber_feed'), None),
+            'sitemap': (reverse('sitemap'), None),
+            'profile': (reverse('profile'), None),
+            'dashboard': (reverse('dashboard'), None),
+        }
+        for name, budget in budgets.items():
+            with self.subTest(page=name):
+                self._assert_budget(budget, *pages[name])
+
+    def test_anonymous_pages(self):
+        self._assert_page_budgets({'home': 3, 'category_list': 2, 'detail': 5, 'search': 3,
+                                   'trending': 4, 'feed': 3, 'sitemap': 2})
+
+    def test_authenticated_pages(self):
+        self.client.force_login(self.user)
+        self._assert_page_budgets({'home': 6, 'category_list': 5, 'detail': 8, 'search': 5,
+                                   'trending': 6, 'feed': 3, 'sitemap': 2, 'profile': 4,
+                                   'dashboard': 6})
+
+    def test_youtuber_list(self):
+        url = reverse('youtuber_list')
+        self._assert_budget(6, url, {'categories': [self.categories[0].id]}, method='post')
+        self._assert_budget(2, url)
+        self.client.force_login(self.user)
+        self._assert_budget(8, url, {'categories': [self.categories[0].id]}, method='post')
+        self._assert_budget(4, url)
+
+    def test_home_renders_its_context_once(self):
+        with mock.patch('youtubers.views.get_sidebar', wraps=get_sidebar) as sidebar:
+            self.client.get(reverse('home'))
+        self.assertEqual(sidebar.call_count, 1)
@@ -0,0 +1,181 @@
+import logging
+import time
+
+from redis import RedisError
+
+from .models import Youtuber
+
+logger = logging.getLogger(__name__)
+
+#: (tuple): The ranking windows, from the shortest. 'all' ranks the views of all time.
+TRENDING_WINDOWS = ('hour', 'day', 'week', 'all')
+
+#: (int): The number of Youtubers in a ranking.
+TRENDING_LIMIT = 50
+
+#: (int): The number of seconds a merged ranking is reused for before it is merged again.
+TRENDING_MERGE_TIMEOUT = 60
+
+#: (int): The number of seconds the hourly buckets are kept for. The day window reads 24 of them.
+HOUR_BUCKET_TIMEOUT = 26 * 60 * 60
+
+#: (int): The number of seconds the daily buckets are kept for. The week window reads 7 of them.
+DAY_BUCKET_TIMEOUT = 8 * 24 * 60 * 60
+
+#: (float): The number of hours after which a view weighs half as much in the day window.
+DAY_HALF_LIFE = 6
+
+#: (float): The number of days after which a view weighs half as much in the week window.
+WEEK_HALF_LIFE = 2
+
+
+def _scope(category_id):
+    """Returns the part of the keys that tells the overall rankings from the category ones."""
+    return 'all' if category_id is None else f'category:{category_id}'
+
+
+def hour_bucket_key(hour, category_id=None):
+    """Returns the key of the sorted set of the views counted in an hour since the epoch."""
+    return f'trending:{_scope(category_id)}:hour:{hour}'
+
+
+def day_bucket_key(day, category_id=None):
+    """Returns the key of the sorted set of the views counted in a day since the epoch."""
+    return f'trending:{_scope(category_id)}:day:{day}'
+
+
+def total_key(category_id=None):
+    """Returns the key of the sorted set of the views of all time."""
+    return f'trending:{_scope(category_id)}:total'
+
+
+def ranking_key(window, category_id=None):
+    """Returns the key of the sorted set a window is merged into."""
+    if window == 'all':
+        return total_key(category_id)
+    return f'trending:{_scope(category_id)}:{window}'
+
+
+def add_views(pipe, views, categories, now=None):
+    """
+    Queues the ZINCRBY commands that count views in the trending buckets.
+
+    Every view is counted in the current hourly and daily buckets and in the all-time set, once
+    overall and once for every category of the Youtuber. The buckets expire on their own once no
+    window reads them anymore.
+
+    Args:
+        pipe (redis.client.Pipeline): The pipeline the commands are queued on.
+        views (dict): The number of views by Youtuber id.
+        categories (dict): The category ids by Youtuber id.
+        now (float): The current Unix time.
+
+    """
+    now = time.time() if now is None else now
+    hour, day = int(now // 3600), int(now // 86400)
+    buckets = set()
+    for youtuber_id, count in views.items():
+        for category_id in (None, *categories.get(youtuber_id, ())):
+            hour_key, day_key = hour_bucket_key(hour, category_id), day_bucket_key(day, category_id)
+            pipe.zincrby(hour_key, count, youtuber_id)
+            pipe.zincrby(day_key, count, youtuber_id)
+            pipe.zincrby(total_key(category_id), count, youtuber_id)
+            buckets.update(((hour_key, HOUR_BUCKET_TIMEOUT), (day_key, DAY_BUCKET_TIMEOUT)))
+    for key, timeout in buckets:
+        pipe.expire(key, timeout)
+
+
+def window_weights(window, category_id=None, now=None):
+    """
+    Returns the buckets of a window and the weights they are merged with.
+
+    The hour window slides: the previous hour counts for the part of it that is still within the
+    last 60 minutes. The day and week windows decay exponentially, so a view from the last hour
+    outweighs one from the morning.
+
+    Args:
+        window (str): 'hour', 'day' or 'week'.
+        category_id (int): The category of the ranking, or None for the overall ranking.
+        now (float): The current Unix time.
+
+    Returns:
+        (dict): The weights by bucket key.
+
+    """
+    now = time.time() if now is None else now
+    hour, elapsed = divmod(now / 3600, 1)
+    hour = int(hour)
+    if window == 'hour':
+        return {hour_bucket_key(hour, category_id): 1,
+                hour_bucket_key(hour - 1, category_id): 1 - elapsed}
+    if window == 'day':
+        return {hour_bucket_key(hour - age, category_id): 0.5 ** (age / DAY_HALF_LIFE)
+                for age in range(24)}
+    day = int(now // 86400)
+    return {day_bucket_key(day - age, category_id): 0.5 ** (age / WEEK_HALF_LIFE)
+            for age in range(7)}
+
+
+def get_ranking(redis_client, window='day', category_id=None, limit=TRENDING_LIMIT):
+    """
+    Returns the most viewed Youtubers of a window.
+
+    A ranking is read with one ZREVRANGE. When the merged set of the window has expired, it is
+    merged again from the buckets with ZUNIONSTORE and kept for TRENDING_MERGE_TIMEOUT seconds,
+    so the merge cost is paid at most once a minute per ranking.
+
+    Args:
+        redis_client (redis.Redis): The Redis connection.
+        window (str): One of TRENDING_WINDOWS.
+        category_id (int): The category of the ranking, or None for the overall ranking.
+        limit (int): The number of Youtubers to return.
+
+    Returns:
+        (list): Tuples of the Youtuber id and its score, from the highest score.
+
+    """
+    key = ranking_key(window, category_id)
+    ranking = redis_client.zrevrange(key, 0, limit - 1, withscores=True)
+    # ZUNIONSTORE does not store empty results, so an empty ranking is merged every time.
+    if not ranking and window != 'all':
+        with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zunionstore(key, window_weights(window, category_id))
+            pipe.expire(key, TRENDING_MERGE_TIMEOUT)
+            pipe.zrevrange(key, 0, limit - 1, withscores=True)
+            ranking = pipe.execute()[-1]
+    return [(int(youtuber_id), score) for youtuber_id, score in ranking]
+
+
+def hydrate_ranking(ranking):
+    """
+    Loads the Youtubers of a ranking with one query.
+
+    Args:
+        ranking (list): Tuples of the Youtuber id and its score, see get_ranking.
+
+    Returns:
+        (list): Tuples of the Youtuber and its score in the order of the ranking. Deleted
+            Youtubers are left out.
+
+    """
+    youtubers = Youtuber.objects.in_bulk([youtuber_id for youtuber_id, score in ranking])
+    return [(youtubers[youtuber_id], score) for youtuber_id, score in ranking
+            if youtuber_id in youtubers]
+
+
+def get_trending(redis_client, window='day', category_id=None, limit=TRENDING_LIMIT):
+    """
+    Returns the loaded Youtubers of a ranking, see get_ranking and hydrate_ranking.
+
+    A ranking is an extra of the pages that show it, so an unreachable Redis only empties it.
+
+    Returns:
+        (list): Tuples of the Youtuber and its score, from the highest score.
+
+    """
+    try:
+        ranking = get_ranking(redis_client, window, category_id, limit)
+    except RedisError:
+        logger.warning('Cannot read the %s ranking from Redis.', window, exc_info=True)
+        ranking = []
+    return hydrate_ranking(ranking)
@@ -19,5 +19,8 @@ urlpatterns = [
     path('youtuber/<slug:slug_name>/add_tag/', views.TagAddView.as_view(), name='add_tag'),
     path('feed/', LatestYoutubersFeed(), name='youtuber_feed'),
     path('search/', views.youtuber_search, name='youtuber_search'),
+    path('search/autocomplete/', views.youtuber_autocomplete, name='youtuber_autocomplete'),
     path('youtuber/<int:youtuber_id>/', views.manage_subscribe, name='manage_subscribe'),
+    path('trending/', views.TrendingView.as_view(), name='trending'),
+    path('trending/json/', views.trending_json, name='trending_json'),
 ]
@@ -0,0 +1,247 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.db import DatabaseError
+from django.db.models import Value
+from django.db.models.functions import Greatest
+from redis import RedisError
+
+from .models import Youtuber
+from .trending import add_views
+
+logger = logging.getLogger(__name__)
+
+#: (str): The Redis set of the Youtuber ids whose counters changed since the last persist run.
+DIRTY_KEY = 'youtuber:views:dirty'
+
+#: (str): The Redis key that is set once the persisted counts are in Redis. It disappears
+#: together with the counters when Redis loses its data.
+EPOCH_KEY = 'youtuber:views:epoch'
+
+
+def views_key(youtuber_id):
+    """Returns the Redis key of the total view count of a Youtuber."""
+    return f'youtuber:{youtuber_id}:views'
+
+
+def viewers_key(youtuber_id):
+    """Returns the Redis key of the HyperLogLog of the unique viewers of a Youtuber."""
+    return f'youtuber:{youtuber_id}:viewers'
+
+
+class ViewCounter:
+    """
+    An in-process buffer of Youtuber page views that is flushed to Redis in pipelined batches.
+
+    A view is only counted in memory; the request never waits on Redis. A background thread of
+    the process flushes the buffer every `flush_interval` seconds, or as soon as `max_pending`
+    views are buffered, sending it to Redis with one pipeline: INCRBY of the view totals, PFADD of
+    the viewers into a HyperLogLog per Youtuber, SADD of the ids into the set that
+    persist_view_counts reads, and ZINCRBY of the trending buckets, see trending.add_views.
+
+    While Redis is unreachable the buffer is kept and the flush is retried with an exponential
+    backoff of up to `max_backoff` seconds. The buffer holds at most `max_buffered` views; the
+    views above that are dropped and logged.
+
+    Args:
+        redis_client (redis.Redis): The Redis connection.
+        flush_interval (float): The maximum number of seconds views are buffered for.
+        max_pending (int): The number of buffered views that triggers a flush.
+        max_buffered (int): The maximum number of views buffered while Redis is unreachable.
+        max_backoff (float): The maximum number of seconds between failed flushes.
+
+    """
+    def __init__(self, redis_client, flush_interval=5, max_pending=100, max_buffered=10_000,
+                 max_backoff=60):
+        self.redis = redis_client
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._views = Counter()
+        self._viewers = defaultdict(set)
+        self._categories = {}
+        self._pending = 0
+        self._dropped = 0
+        self._totals = {}
+
+    def record(self, youtuber_id, viewer, category_ids=()):
+        """
+        Counts a view of a Youtuber page.
+
+        Args:
+            youtuber_id (int): The id of the Youtuber.
+            viewer (str): An identifier of the viewer, e.g. the user id or the session key.
+            category_ids (list): The ids of the categories of the Youtuber, whose trending
+                rankings count the view too.
+
+        """
+        with self._lock:
+            self._start_flusher()
+            if self._pending >= self.max_buffered:
+                self._dropped += 1
+                return
+            self._views[youtuber_id] += 1
+            self._categories[youtuber_id] = tuple(category_ids)
+            self._pending += 1
+            if viewer:
+                self._viewers[youtuber_id].add(viewer)
+            if self._pending >= self.max_pending:
+                self._wake.set()
+
+    def _start_flusher(self):
+        """Starts the flushing thread, also in a process forked after it was started."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Flushes the buffer until the process exits, backing off while Redis is unreachable."""
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            backoff = self.flush_interval
+            while not self.flush():
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def get_count(self, youtuber, buffered=True):
+        """
+        Returns the approximate view count of a Youtuber without a round trip to Redis.
+
+        It is the total last seen in Redis by this process, or the count persisted in Postgres if
+        it is larger, plus the views buffered by this process unless `buffered` is False.
+
+        Args:
+            youtuber (Youtuber): The Youtuber.
+            buffered (bool): Whether to add the views not flushed yet.
+
+        Returns:
+            (int): The approximate number of views.
+
+        """
+        with self._lock:
+            total = max(self._totals.get(youtuber.id, 0), youtuber.view_count)
+            return total + self._views[youtuber.id] if buffered else total
+
+    def flush(self):
+        """
+        Sends the buffered views to Redis.
+
+        Returns:
+            (bool): Whether the buffer was flushed. False if Redis is unreachable.
+
+        """
+        with self._lock:
+            views, self._views = self._views, Counter()
+            viewers, self._viewers = self._viewers, defaultdict(set)
+            categories, self._categories = self._categories, {}
+            dropped, self._dropped = self._dropped, 0
+            self._pending = 0
+        if dropped:
+            logger.warning('Dropped %d views that did not fit into the buffer.', dropped)
+        if not views:
+            return True
+
+        ids = list(views)
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for youtuber_id in ids:
+                    pipe.incrby(views_key(youtuber_id), views[youtuber_id])
+                for youtuber_id, youtuber_viewers in viewers.items():
+                    pipe.pfadd(viewers_key(youtuber_id), *youtuber_viewers)
+                pipe.sadd(DIRTY_KEY, *ids)
+                add_views(pipe, views, categories)
+                totals = pipe.execute()[:len(ids)]
+        except RedisError:
+            logger.warning('Cannot flush %d buffered views to Redis.', sum(views.values()),
+                           exc_info=True)
+            with self._lock:
+                self._views.update(views)
+                self._pending += sum(views.values())
+                for youtuber_id, category_ids in categories.items():
+                    self._categories.setdefault(youtuber_id, category_ids)
+                for youtuber_id, youtuber_viewers in viewers.items():
+                    self._viewers[youtuber_id] |= youtuber_viewers
+            return False
+
+        with self._lock:
+            self._totals.update(zip(ids, totals))
+        return True
+
+
+def restore_view_counts(redis_client, batch_size=1000):
+    """
+    Adds the view counts persisted in Postgres back to Redis after Redis lost its data.
+
+    Redis lost its data if the EPOCH_KEY is missing. The persisted counts are added with INCRBY,
+    so the views counted since the loss are kept. The HyperLogLogs of the viewers cannot be
+    restored; the unique viewers column keeps the last persisted estimate.
+
+    Returns:
+        (bool): Whether the counts were restored.
+
+    """
+    if redis_client.exists(EPOCH_KEY):
+        return False
+    counts = Youtuber.objects.filter(view_count__gt=0).values_list('id', 'view_count')
+    with redis_client.pipeline(transaction=False) as pipe:
+        for number, (youtuber_id, view_count) in enumerate(counts.iterator(), start=1):
+            pipe.incrby(views_key(youtuber_id), view_count)
+            if number % batch_size == 0:
+                pipe.execute()
+        pipe.set(EPOCH_KEY, int(time.time()))
+        pipe.execute()
+    return True
+
+
+def persist_view_counts(redis_client, all_youtubers=False, batch_size=1000):
+    """
+    Copies the view totals and the unique viewer estimates from Redis into Postgres.
+
+    Only the Youtubers flushed since the last run are read, unless `all_youtubers` is True. The
+    columns never decrease, so a Redis that lost its data cannot wipe the persisted counts.
+
+    Args:
+        redis_client (redis.Redis): The Redis connection.
+        all_youtubers (bool): Whether to persist the counters of all Youtubers.
+        batch_size (int): The number of Youtubers read and written at a time.
+
+    Returns:
+        (int): The number of Youtubers persisted.
+
+    """
+    restore_view_counts(redis_client)
+    if all_youtubers:
+        ids = list(Youtuber.objects.values_list('id', flat=True))
+        batches = (ids[start:start + batch_size] for start in range(0, len(ids), batch_size))
+    else:
+        batches = iter(lambda: [int(youtuber_id) for youtuber_id in
+                                redis_client.spop(DIRTY_KEY, batch_size) or []], [])
+
+    persisted = 0
+    for ids in batches:
+        with redis_client.pipeline(transaction=False) as pipe:
+            for youtuber_id in ids:
+                pipe.get(views_key(youtuber_id))
+                pipe.pfcount(viewers_key(youtuber_id))
+            values = pipe.execute()
+        youtubers = [
+            Youtuber(id=youtuber_id,
+                     view_count=Greatest('view_count', Value(int(views or 0))),
+                     unique_viewers=Greatest('unique_viewers', Value(viewers)))
+            for youtuber_id, views, viewers in zip(ids, values[::2], values[1::2])
+        ]
+        try:
+            Youtuber.objects.bulk_update(youtubers, ['view_count', 'unique_viewers'])
+        except DatabaseError:
+            if not all_youtubers:
+                redis_client.sadd(DIRTY_KEY, *ids)
+            raise
+        persisted += len(ids)
+    return persisted
@@ -1,32 +1,82 @@
+import atexit
+import hashlib
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.functions import Greatest
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.utils.text import slugify
 from django.views import View
 from django.views.decorators.http import require_POST
 from django.views.generic import DetailView, ListView, TemplateView
 from django.views.generic.edit import FormView
 
-import redis
+from redis import RedisError
 from taggit.models import Tag
 
 from youtube_api.add_youtuber import YoutubeApi
+from youtube_api.cache import ChannelCache
+from users.models import Profile
 
 from . import models
+from .caching import get_version
+from .counters import update_counter
+from .detail_cache import get_detail_data, get_detail_state, get_youtuber_by_slug, get_youtuber_id_by_slug
+from .filter_index import filter_index
 from .forms import AddYoutuberForm, CategoryForm, CommentForm, SearchForm, TagForm
 from .models import Category, Comment, Youtuber
-from .serialaizer import YoutuberSerializer
+from .pagination import CursorPaginator
+from .redis_client import r
+from .search import SEARCH_CACHE_NAMESPACE, normalize_query, search_youtuber_ids
+from .sidebar import get_sidebar
+from .trending import TRENDING_WINDOWS, get_trending
+from .view_counter import ViewCounter
 from youtube_base.actions.utils import create_action
 from youtube_base.actions.models import Action
 
 
-r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+channel_cache = ChannelCache(r)
+view_counter = ViewCounter(r)
+atexit.register(view_counter.flush)
+
+#: (str): The session key of the filter criteria of the YoutuberList.
+FILTER_SESSION_KEY = 'youtuber_list_filter'
+
+#: (list): The values of the 'sort' parameter of the lists, the counter column they sort by, from
+#: the highest count, and their labels. The empty value keeps the default order.
+SORT_OPTIONS = [
+    ('', None, 'За замовчуванням'),
+    ('views', 'view_count', 'Перегляди'),
+    ('comments', 'comment_count', 'Коментарі'),
+    ('subscribers', 'subscriber_count', 'Підписники'),
+]
+
+SEARCH_PAGE_SIZE = 10
+
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_CACHE_TIMEOUT = 60 * 5
+
+
+def _get_sort(request):
+    """Returns the value of the 'sort' parameter and the counter column it sorts by."""
+    sort = request.GET.get('sort', '')
+    for value, field, label in SORT_OPTIONS:
+        if value == sort:
+            return value, field
+    return '', None
 
 
 class TestTemplateView(TemplateView):
@@ -42,9 +92,8 @@ class BaseCategoryMixin:
     """
     Mixin for views displaying categories.
 
-    This mixin provides a method to include categories in the context of a view. Categories are
-    retrieved from the cache, and if not present, they are fetched from the database and stored in
-    the cache.
+    This mixin provides a method to include categories in the context of a view. Categories and
+    the latest actions are retrieved from the shared sidebar cache, see get_sidebar.
 
     """
     def get_context_data(self, **kwargs):
@@ -55,15 +104,9 @@ class BaseCategoryMixin:
 
         """
         context = super().get_context_data(**kwargs)
-        categories = cache.get('all_categories')
-        actions = Action.objects.all().order_by('-created')[:10]
-
-        if categories is None:
-            categories = list(Category.objects.all())
-            cache.set('all_categories', categories)
-
-        context['categories'] = categories
-        context['actions'] = actions
+        sidebar = get_sidebar()
+        context['categories'] = sidebar['categories']
+        context['actions'] = sidebar['actions']
         return context
 
 
@@ -76,20 +119,6 @@ class HomeView(BaseCategoryMixin, TemplateView):
     """
     template_name = "youtubers/home.html"
 
-    def setup(self, request, *args, **kwargs):
-        """
-        Additional setup logic for the view.
-
-        Ensures that the context data, including categories, is prepared before rendering the
-            template.
-
-        Args:
-            (request): The HTTP request object.
-
-        """
-        super().setup(request, *args, **kwargs)
-        self.get_context_data()
-
 
 class AddYoutuberView(FormView):
     template_name = 'youtubers/add_youtuber.html'
@@ -107,7 +136,7 @@ class AddYoutuberView(FormView):
     def form_valid(self, form):
         url = form.cleaned_data['youtube_url']
         categories = form.cleaned_data['categories']
-        youtube_channel = YoutubeApi(url)
+        youtube_channel = YoutubeApi(url, cache=channel_cache)
         if youtube_channel.get_channel_data():
             if self.youtuber_exists(youtube_channel.channel_id):
                 form.add_error(None, 'Такий ютубер вже існує на нашому сайті.')
@@ -154,10 +183,19 @@ class YoutuberList(ListView):
 
     Attributes:
         model (Model): The model that this view displays. Set to the Youtuber model.
+        cursor_pagination (bool): Whether the list is paginated with opaque cursors instead of
+            page numbers. Cursor pages cost the same at any depth and do not count the rows.
+        list_fields (tuple): The fields of the Youtubers the list shows.
+
+    The list is sorted by the id, or by a counter column given in the 'sort' parameter, see
+    SORT_OPTIONS.
 
     """
     model = Youtuber
     paginate_by = 3
+    cursor_pagination = True
+    list_fields = ('id', 'channel_title', 'channel_description', 'youtube_url', 'slug_name',
+                   'view_count', 'comment_count', 'subscriber_count', 'tag_count')
     template_name = 'youtubers/youtuber_list.html'
 
     def post(self, request, *args, **kwargs):
@@ -165,9 +203,9 @@ class YoutuberList(ListView):
         Handles POST requests for the YoutuberList view.
 
         This method validates the submitted form and filters the list of Youtubers based on the
-        selected categories.
-        If the form is valid, it renders the 'youtubers/youtuber_list.html' template with the
-        filtered list of Youtubers.
+        selected categories or tag.
+        If the form is valid, it stores the filter criteria in the session and renders the first
+        page of the filtered list of Youtubers.
         If the form is not valid, it sends an error message and redirects the user to the home page.
 
         Args:
@@ -182,47 +220,100 @@ class YoutuberList(ListView):
         tag_form = TagForm(request.POST)
 
         if form.is_valid():
-            categories = form.cleaned_data['categories']
-            youtubers = Youtuber.objects.filter(categories__in=categories)
+            criteria = {'categories': sorted(category.id for category in form.cleaned_data['categories'])}
+            if form.cleaned_data['match'] == 'all':
+                criteria['match'] = 'all'
+            if form.cleaned_data['exclude']:
+                criteria['exclude'] = sorted(category.id for category in form.cleaned_data['exclude'])
         elif tag_form.is_valid():
-            tag = tag_form.cleaned_data['tag']
-            youtubers = Youtuber.objects.filter(tags__name__in=[tag])
+            criteria = {'tag': tag_form.cleaned_data['tag']}
         else:
             messages.error(request, 'Будь-ласка оберіть хоча б одну категорію.')
             return redirect('home')
 
-        return self.render_youtubers(request, youtubers)
+        request.session[FILTER_SESSION_KEY] = criteria
+        # Sessions of older versions hold the whole serialized result set.
+        request.session.pop('youtubers', None)
+        return self.render_youtubers(request, criteria)
 
-    def render_youtubers(self, request, youtubers):
+    @classmethod
+    def filter_youtubers(cls, criteria):
         """
-        Renders the 'youtubers/youtuber_list.html' template with the provided list of Youtubers.
+        Builds the QuerySet of the Youtubers that match the filter criteria.
+
+        It answers the filters when the filter index is unreachable or not built yet. The
+        categories are matched with subqueries on the category table of the Youtubers, so a
+        Youtuber in several of the chosen categories is listed once without DISTINCT, and the pages
+        are read with keyset queries on the primary key.
+
+        Args:
+            criteria (dict): The filter criteria, see FilterIndex.match.
+
+        Returns:
+            (QuerySet): The matching Youtubers with only the fields the list shows.
+
+        """
+        youtubers = Youtuber.objects.only(*cls.list_fields)
+        memberships = Youtuber.categories.through.objects
+        if criteria.get('categories'):
+            if criteria.get('match') == 'all':
+                for category_id in criteria['categories']:
+                    youtubers = youtubers.filter(id__in=memberships.filter(
+                        category_id=category_id).values('youtuber_id'))
+            else:
+                youtubers = youtubers.filter(id__in=memberships.filter(
+                    category_id__in=criteria['categories']).values('youtuber_id'))
+        elif criteria.get('tag'):
+            youtubers = youtubers.filter(tags__name=criteria['tag'])
+        else:
+            return youtubers.none()
+        if criteria.get('exclude'):
+            youtubers = youtubers.exclude(id__in=memberships.filter(
+                category_id__in=criteria['exclude']).values('youtuber_id'))
+        return youtubers
+
+    def render_youtubers(self, request, criteria):
+        """
+        Renders the 'youtubers/youtuber_list.html' template with the Youtubers that match the
+        filter criteria.
+
+        The ids of the matching Youtubers are paged in the filter index in Redis, and only the rows
+        of the requested page are loaded, with one query ordered by id. A list sorted by a counter
+        is read from Postgres through the index on the counter, and so is every list while Redis is
+        down or the index is not built.
 
         Args:
             request (HttpRequest): The request instance.
-            youtubers (QuerySet): The list of Youtubers to display.
+            criteria (dict): The filter criteria, see FilterIndex.match.
 
         Returns:
             (HttpResponse): The response instance. A rendered template with the paginated list of
                 Youtubers.
 
         """
-        page = request.POST.get('page', 1)
-        youtubers_paginated = self._get_paginated_data(youtubers, page)
-
-        serializer = YoutuberSerializer(youtubers, many=True)
-        youtubers = serializer.data
-        request.session["youtubers"] = youtubers
-
-        return render(request,
-                      'youtubers/youtuber_list.html',
-                      {'youtubers': youtubers_paginated})
+        sort, order_field = _get_sort(request)
+        context = None
+        if not order_field:
+            try:
+                youtuber_ids = filter_index.match(criteria)
+                if youtuber_ids is not None:
+                    context = self._get_page_context(request, youtuber_ids)
+            except RedisError:
+                pass
+        if context is None:
+            context = self._get_page_context(request, self.filter_youtubers(criteria), order_field)
+        context.update({'sort': sort,
+                        'sort_options': SORT_OPTIONS,
+                        'querystring': urlencode({'sort': sort}) if sort else ''})
+        return render(request, self.template_name, context)
 
     def get(self, request, *args, **kwargs):
         """
         Handles GET requests for the YoutuberList view.
 
-        This method retrieves the list of Youtubers from the session that was stored during the POST
-        request. It then renders the 'youtubers/youtuber_list.html' template with the list of Youtubers.
+        This method reads the filter criteria that were stored in the session during the POST
+        request and renders the requested page of the Youtubers that match them. Only the rows of
+        the page are loaded.
 
         Args:
             request (HttpRequest): The request instance.
@@ -231,10 +322,36 @@ class YoutuberList(ListView):
             (HttpResponse): The response instance. A rendered template with the list of Youtubers.
 
         """
-        page = request.GET.get('page', 1)
-        youtubers = request.session.get("youtubers", [])
-        youtubers_paginated = self._get_paginated_data(youtubers, page)
-        return render(request, self.template_name, {'youtubers': youtubers_paginated})
+        return self.render_youtubers(request, request.session.get(FILTER_SESSION_KEY, {}))
+
+    def _get_page_context(self, request, youtubers, order_field=None):
+        """
+        Builds the template context with the requested page of Youtubers.
+
+        Args:
+            request (HttpRequest): The request instance. The page is read from its 'cursor' or
+                'page' parameter, depending on the pagination mode.
+            youtubers (QuerySet | SortedIds | list): The Youtubers or the sorted ids of the
+                Youtubers to paginate. The ids of the requested page are replaced with the Youtubers.
+            order_field (str): The counter column a QuerySet is sorted by, from the highest count.
+
+        Returns:
+            (dict): The context with the page of Youtubers and the pagination mode.
+
+        """
+        params = request.POST if request.method == 'POST' else request.GET
+        if self.cursor_pagination:
+            paginator = CursorPaginator(youtubers, self.paginate_by, order_field)
+            youtubers_paginated = paginator.page(params.get('cursor'))
+        else:
+            if order_field:
+                youtubers = youtubers.order_by(f'-{order_field}', '-id')
+            youtubers_paginated = self._get_paginated_data(youtubers, params.get('page', 1))
+        if not isinstance(youtubers, QuerySet):
+            youtubers_paginated.object_list = list(
+                Youtuber.objects.only(*self.list_fields)
+                .filter(id__in=youtubers_paginated.object_list).order_by('id'))
+        return {'youtubers': youtubers_paginated, 'cursor_pagination': self.cursor_pagination}
 
     def _get_paginated_data(self, data, page):
         """
@@ -279,12 +396,51 @@ class YoutuberDetailView(DetailView):
     slug_url_kwarg = 'slug_name'
     template_name = 'youtubers/youtuber_detail.html'
 
+    def get_object(self, queryset=None):
+        """Returns the Youtuber from the detail cache, see get_youtuber_by_slug."""
+        youtuber = get_youtuber_by_slug(self.kwargs[self.slug_url_kwarg])
+        if youtuber is None:
+            raise Http404('Youtuber not found.')
+        return youtuber
+
+    def get(self, request, *args, **kwargs):
+        """
+        Answers a conditional request with 304 Not Modified before the page is built.
+
+        The weak ETag and the Last-Modified time come from the detail state of the Youtuber, see
+        get_detail_state, which changes with every save, comment, tag and counter update. It is
+        found by the id the slug maps to, so a 304 costs the slug lookup and one cache read, and
+        the Youtuber is only loaded when the page is built. The ETag also holds the id of the
+        user, because the page differs per user. The view count is not part of the validators, so
+        a revalidated page shows the count of its last change. While messages are pending the
+        page is always built, so they are not left for a later page.
+        A revalidated page is counted as a view too; the view is only buffered in memory.
+
+        """
+        youtuber_id = get_youtuber_id_by_slug(self.kwargs[self.slug_url_kwarg])
+        if youtuber_id is None:
+            raise Http404('Youtuber not found.')
+        self.detail_version, modified, category_ids = get_detail_state(youtuber_id)
+        view_counter.record(youtuber_id, self._get_viewer(), category_ids)
+        if len(messages.get_messages(request)):
+            return self._render(youtuber_id)
+
+        etag = 'W/' + quote_etag(f'{youtuber_id}-{self.detail_version}-{request.user.pk or 0}')
+        response = get_conditional_response(request, etag=etag, last_modified=modified)
+        if response is None:
+            response = self._render(youtuber_id)
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(modified)
+        return response
+
     def get_context_data(self, **kwargs):
         """
         Overridden method from Django's DetailView to modify the context data.
 
         This method retrieves the default context data from the superclass's method,
         then changes the key from 'object' to 'youtuber' for clarity in the template.
+        The tags, the latest comments and the header fragment come from the detail cache of the
+        Youtuber; only the subscription state is queried for every authenticated user.
 
         Returns:
             context (dict): The modified context data.
@@ -292,14 +448,102 @@ class YoutuberDetailView(DetailView):
         """
         context = super().get_context_data(**kwargs)
         context['youtuber'] = context.pop('object')
+        context['detail_version'] = self.detail_version
+        context['tags'], context['comments'] = get_detail_data(self.object, self.detail_version)
         context['form'] = CommentForm()
-        context['comments'] = Comment.objects.filter(youtuber=context['youtuber']).order_by('-created_at')[:5]
         context['tag_form'] = TagForm()
-        redis_key = f'youtuber:{self.object.id}:views'
-        context['total_views'] = r.incr(redis_key)
+        user = self.request.user
+        context['is_subscribed'] = (user.is_authenticated
+                                    and self.object.profiles.filter(user=user).exists())
+        context['total_views'] = view_counter.get_count(self.object)
+        return context
+
+    def _render(self, youtuber_id):
+        """Loads the Youtuber and builds the page."""
+        self.object = self.get_object()
+        if self.object.id != youtuber_id:
+            # The slug has moved to another Youtuber since its id was cached.
+            self.detail_version = get_detail_state(self.object.id)[0]
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+    def _get_viewer(self):
+        """Returns an identifier of the viewer for the unique viewer estimate."""
+        if self.request.user.is_authenticated:
+            return f'user:{self.request.user.id}'
+        if self.request.session.session_key:
+            return f'session:{self.request.session.session_key}'
+        return f"ip:{self.request.META.get('REMOTE_ADDR', '')}"
+
+
+def _get_trending_params(request):
+    """Returns the window and the category id of a trending ranking requested by the GET params."""
+    window = request.GET.get('window')
+    if window not in TRENDING_WINDOWS:
+        window = 'day'
+    try:
+        category_id = int(request.GET['category'])
+    except (KeyError, ValueError):
+        category_id = None
+    return window, category_id
+
+
+class TrendingView(BaseCategoryMixin, TemplateView):
+    """
+    TemplateView for displaying the trending Youtubers of the last hour, day or week, or the most
+    viewed ones of all time, overall or in a category.
+
+    The ranking is read from Redis, see trending.get_ranking, and its Youtubers are loaded with one
+    query.
+
+    Attributes:
+        template_name (str): The template to use for rendering the view.
+
+    """
+    template_name = 'youtubers/trending.html'
+
+    def get_context_data(self, **kwargs):
+        """
+        Adds the ranking, its window and its category to the context.
+
+        Returns:
+            (dict): The context data.
+
+        """
+        context = super().get_context_data(**kwargs)
+        window, category_id = _get_trending_params(self.request)
+        context['window'] = window
+        context['windows'] = TRENDING_WINDOWS
+        context['category'] = next((category for category in context['categories']
+                                    if category.id == category_id), None)
+        context['ranking'] = get_trending(r, window, category_id)
         return context
 
 
+def trending_json(request):
+    """
+    Returns a trending ranking as JSON.
+
+    Args:
+        request (HttpRequest): The request object. The window is read from the 'window' parameter
+            and the optional category id from the 'category' parameter.
+
+    Returns:
+        (JsonResponse): The Youtubers of the ranking with the id, title, slug, absolute URL and
+            score of each channel.
+
+    """
+    window, category_id = _get_trending_params(request)
+    results = [
+        {'id': youtuber.id,
+         'title': youtuber.channel_title,
+         'slug': youtuber.slug_name,
+         'url': youtuber.get_absolute_url(),
+         'score': score}
+        for youtuber, score in get_trending(r, window, category_id)
+    ]
+    return JsonResponse({'window': window, 'category': category_id, 'results': results})
+
+
 class CommentAddView(View):
     """A View for adding comments to a Youtuber."""
     def post(self, request, *args, **kwargs):
@@ -313,7 +557,9 @@ class CommentAddView(View):
             comment = form.save(commit=False)
             comment.youtuber = youtuber
             comment.user = request.user
-            comment.save()
+            with transaction.atomic():
+                comment.save()
+                update_counter(youtuber.id, 'comment_count', 1)
             return redirect('youtuber_detail', slug_name=youtuber.slug_name)
         else:
             messages.error(request, 'Будь-ласка введіть коректний коментар.')
@@ -323,12 +569,17 @@ class CommentAddView(View):
 class TagAddView(View):
     """A View for adding tags to a Youtuber."""
     def post(self, request, *args, **kwargs):
-        youtuber = get_object_or_404(Youtuber, slug_name=kwargs.get('slug_name'))
         tag_form = TagForm(request.POST)
-        if tag_form.is_valid():
-            tag_name = tag_form.cleaned_data['tag']
-            tag, created = Tag.objects.get_or_create(name=tag_name)
-            youtuber.tags.add(tag)
+        with transaction.atomic():
+            # The row lock keeps two requests from counting the same new tag twice.
+            youtuber = get_object_or_404(Youtuber.objects.select_for_update(),
+                                         slug_name=kwargs.get('slug_name'))
+            if tag_form.is_valid():
+                tag_name = tag_form.cleaned_data['tag']
+                tag, created = Tag.objects.get_or_create(name=tag_name)
+                if not youtuber.tags.filter(id=tag.id).exists():
+                    youtuber.tags.add(tag)
+                    update_counter(youtuber.id, 'tag_count', 1)
         return redirect('youtuber_detail', slug_name=youtuber.slug_name)
 
 
@@ -337,7 +588,11 @@ class CommentDeleteView(View):
     def post(self, request, *args, **kwargs):
         comment = get_object_or_404(Comment, id=kwargs.get('id'))
         if request.user == comment.user:
-            comment.delete()
+            with transaction.atomic():
+                # A double submit or a concurrent request may have deleted the comment already.
+                deleted = comment.delete()[1].get(Comment._meta.label, 0)
+                if deleted:
+                    update_counter(comment.youtuber_id, 'comment_count', -1)
             messages.success(request, 'Коментар видалено.')
         else:
             messages.error(request, 'Ви не можете видалити цей коментар.')
@@ -349,7 +604,11 @@ def youtuber_search(request):
     Searches for YouTubers based on the provided query.
 
     This function takes a query string as input and returns a list of YouTubers that match the
-    query. The search is performed based on the channel title and description.
+    query. The search is performed based on the channel title and description, using the stored
+    search_vector column so that matching rows are found through its GIN index. The ranked ids are
+    cached by the normalized query and paginated with cursors, so only the rows of the requested
+    page are loaded. The results can be sorted by a counter column instead of the rank, see
+    SORT_OPTIONS.
 
     Parameters:
         query (str): The search query string.
@@ -361,23 +620,76 @@ def youtuber_search(request):
     form = SearchForm()
     query = None
     results = []
+    total_results = 0
+    sort, order_field = _get_sort(request)
 
     if 'query' in request.GET:
         form = SearchForm(request.GET)
         if form.is_valid():
             query = form.cleaned_data['query']
-            search_vector = SearchVector('channel_title', weight='A') + \
-                SearchVector('channel_description', weight='B', config='russian')
-            search_query = SearchQuery(query, config='russian')
-            results = Youtuber.objects.annotate(
-                search=search_vector, rank=SearchRank(search_vector, search_query)
-            ).filter(rank__gte=0.3).order_by('-rank')
+            ids = search_youtuber_ids(query)
+            if order_field:
+                results = CursorPaginator(Youtuber.objects.filter(id__in=ids), SEARCH_PAGE_SIZE,
+                                          order_field).page(request.GET.get('cursor'))
+            else:
+                page = CursorPaginator(ids, SEARCH_PAGE_SIZE).page(request.GET.get('cursor'))
+                youtubers = Youtuber.objects.in_bulk(page.object_list)
+                page.object_list = [youtubers[youtuber_id] for youtuber_id in page
+                                    if youtuber_id in youtubers]
+                results = page
+            total_results = len(ids)
 
     return render(request,
                   'youtubers/search.html',
                   {'form': form,
                    'query': query,
-                   'results': results})
+                   'results': results,
+                   'total_results': total_results,
+                   'sort': sort,
+                   'sort_options': SORT_OPTIONS,
+                   'query_params': urlencode({'query': query or ''}),
+                   'querystring': urlencode({'query': query or '', 'sort': sort})})
+
+
+def youtuber_autocomplete(request):
+    """
+    Suggests channels for the search field while the user is typing.
+
+    Channels are matched by trigram word similarity against their title and username, which finds
+    both word prefixes and mistyped names. The lookups are served by the pg_trgm GIN indexes. The
+    suggestions for a prefix are cached, because the same prefixes are typed over and over, and
+    share the version of the search cache, so they are refreshed when a channel changes.
+
+    Args:
+        request (HttpRequest): The request object. The typed text is read from the 'q' parameter.
+
+    Returns:
+        (JsonResponse): The suggestions with the title, slug and absolute URL of each channel.
+
+    """
+    query = normalize_query(request.GET.get('q', ''))
+    if len(query) < AUTOCOMPLETE_MIN_LENGTH:
+        return JsonResponse({'results': []})
+
+    version = get_version(SEARCH_CACHE_NAMESPACE)
+    cache_key = f'autocomplete:{version}:{hashlib.md5(query.encode()).hexdigest()}'
+    results = cache.get(cache_key)
+    if results is None:
+        youtubers = Youtuber.objects.filter(
+            Q(channel_title__trigram_word_similar=query) | Q(username__trigram_word_similar=query)
+        ).annotate(
+            similarity=Greatest(TrigramWordSimilarity(query, 'channel_title'),
+                                TrigramWordSimilarity(query, 'username'))
+        ).order_by('-similarity', 'id').values_list('channel_title', 'slug_name')
+        results = [
+            {'title': title,
+             'slug': slug,
+             'url': reverse('youtuber_detail', args=[slug])}
+            for title, slug in youtubers[:AUTOCOMPLETE_LIMIT]
+        ]
+        cache.set(cache_key, results, AUTOCOMPLETE_CACHE_TIMEOUT)
+
+    return JsonResponse({'results': results})
 
 
 @login_required
@@ -394,9 +706,14 @@ def manage_subscribe(request, youtuber_id):
 
     """
     youtuber = get_object_or_404(Youtuber, id=youtuber_id)
-    if youtuber in request.user.profile.subscriptions.all():
-        request.user.profile.subscriptions.remove(youtuber)
-    else:
-        request.user.profile.subscriptions.add(youtuber)
+    with transaction.atomic():
+        # The lock keeps two requests of the user from counting the same subscription twice.
+        profile, created = Profile.objects.select_for_update().get_or_create(user=request.user)
+        if profile.subscriptions.filter(id=youtuber.id).exists():
+            profile.subscriptions.remove(youtuber)
+            update_counter(youtuber.id, 'subscriber_count', -1)
+        else:
+            profile.subscriptions.add(youtuber)
+            update_counter(youtuber.id, 'subscriber_count', 1)
 
     return redirect('youtuber_detail', slug_name=youtuber.slug_name)